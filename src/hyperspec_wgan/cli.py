@@ -58,6 +58,16 @@ PARAMS_HELP = """Specify extra parameters that you want to pass
 to the context initializer. Items must be separated by comma, keys - by colon,
 example: param1:value1,param2:value2. Each parameter is split by the first comma,
 so parameter values are allowed to contain colons, parameter keys are not."""
+HOST_HELP = """Interface to serve on."""
+PORT_HELP = """Port to serve on."""
+DATASET_HELP = """Name of the generator dataset to serve, either an exported
+generator or a generator checkpoint."""
+MEMORY_HELP = """Memory to plan for, such as `16G`. If not specified, the memory
+available to this process is used."""
+CORES_HELP = """Number of cores to plan for. If not specified, the cores
+available to this process are used."""
+MEMORY_FRACTION_HELP = """Fraction of the memory that the run may use."""
+APPLY_HELP = """Run the pipeline with the recommended runner and parameters."""
 CONFIG_HELP = """Specify a YAML configuration file to load the run
 command arguments from. If command line arguments are provided, they will
 override the loaded ones."""
@@ -143,3 +153,91 @@ def run(
             to_outputs=to_outputs,
             pipeline_name=pipeline,
         )
+
+
+@cli.command()
+@click.option("--host", type=str, default="127.0.0.1", help=HOST_HELP)
+@click.option("--port", type=int, default=8000, help=PORT_HELP)
+@click.option(
+    "--dataset", type=str, default="model_generator_scripted", help=DATASET_HELP
+)
+@click.option("--env", type=str, default=None, help=ENV_HELP)
+@click.option(
+    "--params", type=str, default="", help=PARAMS_HELP, callback=_split_params
+)
+def serve(host: str, port: int, dataset: str, env: str, params: Dict[str, Any]) -> None:
+    """Serve synthetic spectra from a trained generator over HTTP."""
+    # pylint: disable=import-outside-toplevel
+    from hyperspec_wgan.extras.serving import serve as serve_generator
+    from hyperspec_wgan.pipelines.model_training.models import as_sampler
+
+    package_name = str(Path(__file__).resolve().parent.name)
+    with KedroSession.create(
+        package_name=package_name, env=env, extra_params=params
+    ) as session:
+        context = session.load_context()
+        sampler = as_sampler(generator=context.catalog.load(dataset))
+        serve_generator(
+            sampler=sampler,
+            n_classes=len(context.params["metadata"]["labels"]) - 1,
+            host=host,
+            port=port,
+            **context.params["serve"],
+        )
+
+
+@cli.command()
+@click.option("--pipeline", type=str, default=None, help=PIPELINE_HELP)
+@click.option("--env", type=str, default=None, help=ENV_HELP)
+@click.option(
+    "--params", type=str, default="", help=PARAMS_HELP, callback=_split_params
+)
+@click.option("--memory", type=str, default=None, help=MEMORY_HELP)
+@click.option("--cores", type=int, default=None, help=CORES_HELP)
+@click.option("--memory-fraction", type=float, default=0.8, help=MEMORY_FRACTION_HELP)
+@click.option("--apply", "apply_plan", is_flag=True, help=APPLY_HELP)
+def plan(  # pylint: disable=too-many-arguments
+    pipeline: str,
+    env: str,
+    params: Dict[str, Any],
+    memory: str,
+    cores: int,
+    memory_fraction: float,
+    apply_plan: bool,
+) -> None:
+    """Predict the peak memory and runtime of each node without running it."""
+    # pylint: disable=import-outside-toplevel
+    from hyperspec_wgan.extras import planning
+    from hyperspec_wgan.pipeline_registry import register_pipelines
+
+    package_name = str(Path(__file__).resolve().parent.name)
+    with KedroSession.create(
+        package_name=package_name, env=env, extra_params=params
+    ) as session:
+        context = session.load_context()
+        pipeline_plan = planning.plan_pipeline(
+            pipeline=register_pipelines()[pipeline or "__default__"],
+            catalog=context.config_loader.get("catalog*", "catalog*/**"),
+            parameters=context.params,
+            memory=planning.parse_size(size=memory)
+            if memory
+            else planning.available_memory(),
+            cores=cores or planning.available_cores(),
+            memory_fraction=memory_fraction,
+            project_path=context.project_path,
+        )
+    click.echo(pipeline_plan.report())
+    if not apply_plan:
+        return
+    runner_class = load_obj(
+        obj_path=pipeline_plan.runner, default_obj_path="kedro.runner"
+    )
+    with KedroSession.create(
+        package_name=package_name,
+        env=env,
+        extra_params=dict(params, **pipeline_plan.parameters),
+    ) as session:
+        session.run(
+            runner=runner_class(**pipeline_plan.runner_kwargs),
+            pipeline_name=pipeline,
+        )
@@ -0,0 +1,207 @@
+# Copyright 2021 QuantumBlack Visual Analytics Limited
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES
+# OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE, AND
+# NONINFRINGEMENT. IN NO EVENT WILL THE LICENSOR OR OTHER CONTRIBUTORS
+# BE LIABLE FOR ANY CLAIM, DAMAGES, OR OTHER LIABILITY, WHETHER IN AN
+# ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF, OR IN
+# CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+#
+# The QuantumBlack Visual Analytics Limited ("QuantumBlack") name and logo
+# (either separately or in combination, "QuantumBlack Trademarks") are
+# trademarks of QuantumBlack. The License does not grant you any right or
+# license to the QuantumBlack Trademarks. You may not use the QuantumBlack
+# Trademarks or any confusingly similar mark as a trademark for your product,
+# or use the QuantumBlack Trademarks in any other manner that might cause
+# confusion in the marketplace, including but not limited to in advertising,
+# on websites, or on software.
+#
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Classical augmentations of batches of spectra.
+
+Every augmentation transforms a whole `(n, bands)` batch with array operations
+and per-sample random parameters. `Augmenter` chains them into a transform
+with the `(x, y) -> (x, y)` signature of `MixedDataset`, so batches are
+augmented as they are sampled rather than stored as extra arrays::
+
+    augmenter = Augmenter(augmentations=dict(gaussian_noise=dict(std=0.01),
+                                             mixup=dict(alpha=0.4)))
+    dataset = MixedDataset(x_real=x_train, y_real=y_train, transform=augmenter)
+"""
+
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import numpy as np
+from torch.utils.data import get_worker_info
+
+from . import distributed
+
+
+def gaussian_noise(
+    x: np.ndarray, y: np.ndarray, rng: np.random.Generator, std: float = 0.01
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Add independent Gaussian noise to every band."""
+    return x + std * rng.standard_normal(size=x.shape, dtype=np.float32), y
+
+
+def multiplicative_noise(
+    x: np.ndarray, y: np.ndarray, rng: np.random.Generator, std: float = 0.01
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Multiply every band by independent Gaussian gains around 1."""
+    return x * (1 + std * rng.standard_normal(size=x.shape, dtype=np.float32)), y
+
+
+def spectral_shift(
+    x: np.ndarray, y: np.ndarray, rng: np.random.Generator, max_shift: float = 1.0
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Shift each spectrum by a random fraction of bands, repeating the edges."""
+    bands = np.arange(x.shape[1], dtype=np.float32)
+    shift = rng.uniform(-max_shift, max_shift, size=(len(x), 1)).astype(np.float32)
+    position = np.clip(bands - shift, 0, x.shape[1] - 1)
+    lower = np.floor(position).astype(np.int64)
+    upper = np.minimum(lower + 1, x.shape[1] - 1)
+    weight = (position - lower).astype(x.dtype)
+    rows = np.arange(len(x))[:, None]
+    return (1 - weight) * x[rows, lower] + weight * x[rows, upper], y
+
+
+def smoothing(
+    x: np.ndarray,
+    y: np.ndarray,
+    rng: np.random.Generator,
+    width: int = 5,
+    max_strength: float = 1.0,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Blend each spectrum with its moving average over `width` bands."""
+    padded = np.pad(x, ((0, 0), (width // 2, (width - 1) // 2)), mode="edge")
+    cumulative = np.cumsum(padded, axis=1, dtype=np.float64)
+    cumulative = np.pad(cumulative, ((0, 0), (1, 0)))
+    smoothed = (cumulative[:, width:] - cumulative[:, :-width]) / width
+    strength = rng.uniform(0, max_strength, size=(len(x), 1))
+    return ((1 - strength) * x + strength * smoothed).astype(x.dtype), y
+
+
+def illumination(
+    x: np.ndarray,
+    y: np.ndarray,
+    rng: np.random.Generator,
+    low: float = 0.9,
+    high: float = 1.1,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Scale each spectrum by a random brightness factor."""
+    return x * rng.uniform(low, high, size=(len(x), 1)).astype(x.dtype), y
+
+
+def mixup(
+    x: np.ndarray, y: np.ndarray, rng: np.random.Generator, alpha: float = 0.4
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Mix each spectrum with a random spectrum of the same class in the batch.
+
+    Labels are unchanged since both spectra share them. A sample that is alone
+    in its class is mixed with itself.
+    """
+    order = np.lexsort((rng.random(len(y)), y))
+    sorted_y = y[order]
+    position = np.arange(len(y))
+    last = np.append(sorted_y[1:] != sorted_y[:-1], True)
+    first = np.searchsorted(sorted_y, sorted_y, side="left")
+    partner = np.empty_like(order)
+    partner[order] = order[np.where(last, first, position + 1)]
+    weight = rng.beta(alpha, alpha, size=(len(x), 1)).astype(x.dtype)
+    return weight * x + (1 - weight) * x[partner], y
+
+
+AUGMENTATIONS: Dict[str, Callable[..., Tuple[np.ndarray, np.ndarray]]] = dict(
+    gaussian_noise=gaussian_noise,
+    multiplicative_noise=multiplicative_noise,
+    spectral_shift=spectral_shift,
+    smoothing=smoothing,
+    illumination=illumination,
+    mixup=mixup,
+)
+
+
+class Augmenter:
+    """Apply a chain of augmentations to batches of spectra.
+
+    `augmentations` maps names in `AUGMENTATIONS` to their keyword arguments,
+    in the order they are applied. Random streams are derived from `seed`,
+    the data-parallel rank, the epoch set with `set_epoch`, and the seed that
+    PyTorch gives each DataLoader worker, so every rank, epoch, and worker
+    draws its own noise, and resumed training repeats the same noise.
+    """
+
+    def __init__(
+        self, augmentations: Dict[str, Dict[str, Any]], seed: int = 42
+    ) -> None:
+        self._augmentations = [
+            (AUGMENTATIONS[name], dict(kwargs or {}))
+            for name, kwargs in augmentations.items()
+        ]
+        self._seed = seed
+        self._epoch = 0
+        self._stream: Optional[Tuple[int, int, int]] = None
+        self._rng = np.random.default_rng(seed)
+
+    def set_epoch(self, epoch: int) -> None:
+        """Set the epoch used to seed the next pass over the data."""
+        self._epoch = epoch
+
+    def _generator(self) -> np.random.Generator:
+        info = get_worker_info()
+        stream = (
+            self._seed + distributed.rank(),
+            self._epoch,
+            info.seed if info is not None else 0,
+        )
+        if stream != self._stream:
+            self._stream = stream
+            self._rng = np.random.default_rng(list(stream))
+        return self._rng
+
+    def __call__(self, x: np.ndarray, y: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        rng = self._generator()
+        x = np.asarray(x, dtype=np.float32)
+        for function, kwargs in self._augmentations:
+            x, y = function(x, y, rng=rng, **kwargs)
+        return np.ascontiguousarray(x, dtype=np.float32), y
+
+
+def augment_classes(  # pylint: disable=too-many-arguments
+    x: np.ndarray,
+    y: np.ndarray,
+    augmenter: Augmenter,
+    samples_per_class: int,
+    seed: int = 42,
+    batch_size: int = 4096,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Augment `samples_per_class` spectra, drawn with replacement, per class."""
+    rng = np.random.default_rng(seed)
+    y = np.asarray(y)
+    index = np.sort(
+        np.concatenate(
+            [
+                rng.choice(np.flatnonzero(y == label), samples_per_class)
+                for label in np.unique(y)
+            ]
+        )
+    )
+    labels = y[index]
+    batches = [
+        augmenter(
+            x=x[index[start : start + batch_size]],
+            y=labels[start : start + batch_size],
+        )[0]
+        for start in range(0, len(index), batch_size)
+    ]
+    x = np.concatenate(batches) if batches else np.empty((0, 0), np.float32)
+    return x, labels
@@ -0,0 +1,226 @@
+# Copyright 2021 QuantumBlack Visual Analytics Limited
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES
+# OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE, AND
+# NONINFRINGEMENT. IN NO EVENT WILL THE LICENSOR OR OTHER CONTRIBUTORS
+# BE LIABLE FOR ANY CLAIM, DAMAGES, OR OTHER LIABILITY, WHETHER IN AN
+# ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF, OR IN
+# CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+#
+# The QuantumBlack Visual Analytics Limited ("QuantumBlack") name and logo
+# (either separately or in combination, "QuantumBlack Trademarks") are
+# trademarks of QuantumBlack. The License does not grant you any right or
+# license to the QuantumBlack Trademarks. You may not use the QuantumBlack
+# Trademarks or any confusingly similar mark as a trademark for your product,
+# or use the QuantumBlack Trademarks in any other manner that might cause
+# confusion in the marketplace, including but not limited to in advertising,
+# on websites, or on software.
+#
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Classical baselines for measuring the gain from augmented training data.
+
+`evaluate_baselines` fits SVM, random forest, and k-NN classifiers for every
+combination of model, synthetic source, augmentation ratio, and seed, in a
+pool of worker processes. PCA features, and the RBF kernel matrices used by
+the SVM, are computed once for the real and synthetic samples together and
+cached with `joblib.Memory`, so each job only selects rows of shared arrays
+and repeated runs skip the preprocessing altogether.
+"""
+
+import itertools
+import logging
+import time
+from typing import Any, Dict, List, Mapping, Optional
+
+import numpy as np
+from joblib import Memory, Parallel, delayed
+from sklearn.decomposition import PCA
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.metrics import accuracy_score, cohen_kappa_score
+from sklearn.metrics.pairwise import rbf_kernel
+from sklearn.neighbors import KNeighborsClassifier
+from sklearn.svm import SVC
+
+MODELS = dict(svm=SVC, random_forest=RandomForestClassifier, knn=KNeighborsClassifier)
+
+logger = logging.getLogger(__name__)
+
+
+def pca_features(
+    x_train: np.ndarray, x_other: np.ndarray, kwargs: Dict[str, Any]
+) -> Dict[str, np.ndarray]:
+    """Fit PCA on the real training samples and project all samples."""
+    pca = PCA(**kwargs).fit(x_train)
+    return dict(train=pca.transform(x_train), other=pca.transform(x_other))
+
+
+def kernel_matrices(
+    pool: np.ndarray, test: np.ndarray, gamma: float
+) -> Dict[str, np.ndarray]:
+    """Return float32 RBF kernels of the training pool and of the test samples."""
+    return dict(
+        pool=rbf_kernel(pool, gamma=gamma).astype(np.float32),
+        test=rbf_kernel(test, pool, gamma=gamma).astype(np.float32),
+    )
+
+
+def _select(
+    sources: Dict[str, slice], source: str, count: int, seed: int
+) -> np.ndarray:
+    real = np.arange(sources["real"].stop)
+    if source == "real" or count == 0:
+        return real
+    rng = np.random.default_rng(seed)
+    candidates = np.arange(sources[source].start, sources[source].stop)
+    chosen = rng.choice(candidates, size=min(count, len(candidates)), replace=False)
+    return np.concatenate([real, np.sort(chosen)])
+
+
+def _uses_seed(model: str, model_kwargs: Dict[str, Any]) -> bool:
+    if model == "svm":
+        return bool(model_kwargs.get("probability"))
+    return model == "random_forest"
+
+
+def _run_job(  # pylint: disable=too-many-arguments,too-many-locals
+    job: Dict[str, Any],
+    model_kwargs: Dict[str, Any],
+    features: np.ndarray,
+    y_pool: np.ndarray,
+    test_features: np.ndarray,
+    y_test: np.ndarray,
+    kernels: Optional[Dict[str, np.ndarray]],
+    gamma: float,
+) -> Dict[str, Any]:
+    started = time.perf_counter()
+    index = job.pop("index")
+    if job["model"] == "svm":
+        model_kwargs = dict(model_kwargs, random_state=job["seed"])
+        if kernels is not None:
+            model = SVC(kernel="precomputed", **model_kwargs)
+            model.fit(kernels["pool"][np.ix_(index, index)], y_pool[index])
+            predictions = model.predict(kernels["test"][:, index])
+        else:
+            model = SVC(kernel="rbf", gamma=gamma, **model_kwargs)
+            predictions = model.fit(features[index], y_pool[index]).predict(
+                test_features
+            )
+    else:
+        if job["model"] == "random_forest":
+            model_kwargs = dict(model_kwargs, random_state=job["seed"], n_jobs=1)
+        model = MODELS[job["model"]](**model_kwargs)
+        predictions = model.fit(features[index], y_pool[index]).predict(test_features)
+    return dict(
+        job,
+        samples=len(index),
+        accuracy=accuracy_score(y_test, predictions),
+        kappa=cohen_kappa_score(y_test, predictions),
+        wall_time=time.perf_counter() - started,
+    )
+
+
+def evaluate_baselines(  # pylint: disable=too-many-arguments,too-many-locals
+    real: Mapping[str, np.ndarray],
+    synthetic: Dict[str, Mapping[str, np.ndarray]],
+    models: Dict[str, Dict[str, Any]],
+    ratios: List[float],
+    seeds: List[int],
+    PCA_kwargs: Dict[str, Any],  # pylint: disable=invalid-name
+    gamma: Optional[float] = None,
+    max_kernel_samples: int = 10000,
+    cache: Optional[str] = None,
+    Parallel_kwargs: Optional[Dict[str, Any]] = None,  # pylint: disable=invalid-name
+) -> List[Dict[str, Any]]:
+    """Score baseline classifiers on the test split, one row per job.
+
+    Each synthetic source adds `ratio` synthetic samples per real training
+    sample, drawn from the first `max(ratios)` times as many samples of that
+    source. Ratio 0 is run once, as source `"real"`. Jobs whose result does
+    not depend on the seed, such as k-NN on all of the real samples, run for
+    the first seed only. The SVM uses precomputed kernels unless the pool of
+    samples exceeds `max_kernel_samples`.
+    """
+    memory = Memory(location=cache, verbose=0)
+    x_train = np.asarray(real["x_train"], dtype=np.float32)
+    n_train = len(x_train)
+    pool_size = int(round(max(ratios) * n_train))
+    sources, others, labels = {"real": slice(0, n_train)}, [], [real["y_train"]]
+    offset = n_train
+    for name, samples in synthetic.items():
+        size = min(pool_size, len(samples["y"]))
+        if size < pool_size:
+            logger.warning(
+                "Source '%s' has %d samples, fewer than the %d needed for ratio "
+                "%s; larger ratios use all of them.",
+                name,
+                size,
+                pool_size,
+                max(ratios),
+            )
+        index = np.sort(np.random.default_rng(0).permutation(len(samples["y"]))[:size])
+        others.append(np.asarray(samples["x"][index], dtype=np.float32))
+        labels.append(np.asarray(samples["y"])[index])
+        sources[name] = slice(offset, offset + size)
+        offset += size
+    x_test = np.asarray(real["x_test"], dtype=np.float32)
+    projected = memory.cache(pca_features)(
+        x_train=x_train,
+        x_other=np.concatenate([*others, x_test]),
+        kwargs=PCA_kwargs,
+    )
+    features = np.concatenate(
+        [projected["train"], projected["other"][: offset - n_train]]
+    )
+    test_features = projected["other"][offset - n_train :]
+    y_pool = np.concatenate(labels)
+    gamma = gamma or 1.0 / (features.shape[1] * features[:n_train].var())
+    kernels = None
+    if "svm" in models and len(features) <= max_kernel_samples:
+        kernels = memory.cache(kernel_matrices)(
+            pool=features, test=test_features, gamma=gamma
+        )
+
+    combinations = [("real", 0.0)] if 0 in ratios else []
+    combinations += [
+        (source, ratio) for source in synthetic for ratio in ratios if ratio
+    ]
+    jobs = []
+    for model, (source, ratio) in itertools.product(models, combinations):
+        count = int(round(ratio * n_train))
+        available = sources[source].stop - sources[source].start
+        sampled = source != "real" and 0 < count < available
+        for seed in seeds if sampled or _uses_seed(model, models[model]) else seeds[:1]:
+            jobs.append(
+                dict(
+                    model=model,
+                    source=source,
+                    ratio=ratio,
+                    seed=seed,
+                    index=_select(
+                        sources=sources, source=source, count=count, seed=seed
+                    ),
+                )
+            )
+    results: List[Dict[str, Any]] = Parallel(**(Parallel_kwargs or {}))(
+        delayed(_run_job)(
+            job=job,
+            model_kwargs=models[job["model"]],
+            features=features,
+            y_pool=y_pool,
+            test_features=test_features,
+            y_test=np.asarray(real["y_test"]),
+            kernels=kernels,
+            gamma=gamma,
+        )
+        for job in jobs
+    )
+    return results
@@ -0,0 +1,163 @@
+# Copyright 2021 QuantumBlack Visual Analytics Limited
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES
+# OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE, AND
+# NONINFRINGEMENT. IN NO EVENT WILL THE LICENSOR OR OTHER CONTRIBUTORS
+# BE LIABLE FOR ANY CLAIM, DAMAGES, OR OTHER LIABILITY, WHETHER IN AN
+# ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF, OR IN
+# CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+#
+# The QuantumBlack Visual Analytics Limited ("QuantumBlack") name and logo
+# (either separately or in combination, "QuantumBlack Trademarks") are
+# trademarks of QuantumBlack. The License does not grant you any right or
+# license to the QuantumBlack Trademarks. You may not use the QuantumBlack
+# Trademarks or any confusingly similar mark as a trademark for your product,
+# or use the QuantumBlack Trademarks in any other manner that might cause
+# confusion in the marketplace, including but not limited to in advertising,
+# on websites, or on software.
+#
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+"""Resumable training checkpoints.
+
+Each run writes its checkpoints under its own timestamped directory, within
+a directory named after a fingerprint of the run's configuration::
+
+    <directory>/<config fingerprint>/<run timestamp>/epoch-00004.pt
+
+so checkpoints are versioned per run, and a new run resumes from the latest
+checkpoint of an earlier run with the same configuration that did not
+complete. Once a run completes, the directories of earlier runs with the same
+configuration are removed. Checkpoints hold the
+state of every module and optimizer passed in, together with the Python,
+NumPy, and PyTorch random number generator states.
+"""
+
+import hashlib
+import json
+import logging
+import random
+from pathlib import PurePosixPath
+from typing import Any, Dict, List, Optional, Tuple, cast
+
+import fsspec
+import numpy as np
+import torch
+from kedro.io.core import generate_timestamp, get_filepath_str, get_protocol_and_path
+
+from .datasets.torch import TorchCheckpointDataSet
+
+logger = logging.getLogger(__name__)
+
+
+def capture_rng_state() -> Dict[str, Any]:
+    """Capture the Python, NumPy, and PyTorch random number generator states."""
+    name, keys, position, has_gauss, cached_gaussian = cast(
+        Tuple[str, np.ndarray, int, int, float], np.random.get_state()
+    )
+    return dict(
+        python=random.getstate(),
+        numpy=(name, keys.tolist(), position, has_gauss, cached_gaussian),
+        torch=torch.get_rng_state(),
+    )
+
+
+def restore_rng_state(state: Dict[str, Any]) -> None:
+    """Restore random number generator states captured by `capture_rng_state`."""
+    name, keys, position, has_gauss, cached_gaussian = state["numpy"]
+    random.setstate(state["python"])
+    np.random.set_state(
+        (name, np.array(keys, dtype=np.uint32), position, has_gauss, cached_gaussian)
+    )
+    torch.set_rng_state(state["torch"])
+
+
+def fingerprint(config: Any) -> str:
+    """Return a short hash of a JSON-serialisable configuration."""
+    token = json.dumps(config, sort_keys=True, default=repr)
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()[:16]
+
+
+class Checkpointer:
+    """Save and restore the training state of modules and optimizers.
+
+    Only checkpoints saved with an equal `config` are resumed, and at least
+    one checkpoint, the `keep` latest, is kept per run.
+    """
+
+    def __init__(  # pylint: disable=too-many-arguments
+        self,
+        directory: str,
+        every: int = 1,
+        keep: int = 2,
+        resume: bool = True,
+        config: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        if keep < 1:
+            raise ValueError(f"keep must be at least 1, got {keep}.")
+        protocol, path = get_protocol_and_path(filepath=directory)
+        self._protocol = protocol
+        self._directory = PurePosixPath(path) / fingerprint(config or {})
+        self._filesystem = fsspec.filesystem(protocol=protocol)
+        self._run = generate_timestamp()
+        self._every = every
+        self._keep = keep
+        self._resume = resume
+
+    def _checkpoints(self, run: str = "*") -> List[str]:
+        pattern = str(self._directory / run / "epoch-*.pt")
+        return sorted(self._filesystem.glob(pattern))
+
+    def _dataset(self, path: str) -> TorchCheckpointDataSet:
+        filepath = get_filepath_str(path=PurePosixPath(path), protocol=self._protocol)
+        return TorchCheckpointDataSet(filepath=filepath)
+
+    def restore(self, objects: Dict[str, Any]) -> int:
+        """Load the latest incomplete checkpoint into `objects`, if there is one.
+
+        Return the epoch to continue training from.
+        """
+        checkpoints = self._checkpoints()
+        if not self._resume or not checkpoints:
+            return 0
+        state = self._dataset(path=checkpoints[-1]).load()
+        if state["complete"]:
+            return 0
+        for name, obj in objects.items():
+            obj.load_state_dict(state["objects"][name])
+        restore_rng_state(state=state["rng"])
+        logger.info("Resuming from checkpoint %s", checkpoints[-1])
+        return int(state["epoch"]) + 1
+
+    def save(self, epoch: int, objects: Dict[str, Any], complete: bool = False) -> None:
+        """Save the state of `objects` after `epoch`, if a checkpoint is due."""
+        if not complete and (epoch + 1) % self._every:
+            return
+        path = self._directory / self._run / f"epoch-{epoch:05d}.pt"
+        self._dataset(path=str(path)).save(
+            dict(
+                epoch=epoch,
+                complete=complete,
+                objects={name: obj.state_dict() for name, obj in objects.items()},
+                rng=capture_rng_state(),
+            )
+        )
+        for stale in self._checkpoints(run=self._run)[: -self._keep]:
+            self._filesystem.rm(stale)
+        if complete:
+            self._remove_earlier_runs()
+
+    def _remove_earlier_runs(self) -> None:
+        for entry in self._filesystem.ls(str(self._directory), detail=True):
+            run = PurePosixPath(entry["name"]).name
+            if entry["type"] == "directory" and run < self._run:
+                self._filesystem.rm(entry["name"], recursive=True)
@@ -0,0 +1,336 @@
+# Copyright 2021 QuantumBlack Visual Analytics Limited
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES
+# OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE, AND
+# NONINFRINGEMENT. IN NO EVENT WILL THE LICENSOR OR OTHER CONTRIBUTORS
+# BE LIABLE FOR ANY CLAIM, DAMAGES, OR OTHER LIABILITY, WHETHER IN AN
+# ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF, OR IN
+# CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+#
+# The QuantumBlack Visual Analytics Limited ("QuantumBlack") name and logo
+# (either separately or in combination, "QuantumBlack Trademarks") are
+# trademarks of QuantumBlack. The License does not grant you any right or
+# license to the QuantumBlack Trademarks. You may not use the QuantumBlack
+# Trademarks or any confusingly similar mark as a trademark for your product,
+# or use the QuantumBlack Trademarks in any other manner that might cause
+# confusion in the marketplace, including but not limited to in advertising,
+# on websites, or on software.
+#
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Custom dataset module for bundles of NumPy arrays to be used with DataCatalog.
+
+A bundle is a single file holding several named arrays. Each member is stored
+either zlib-compressed or raw; raw members are aligned so that they can be
+memory-mapped in place. The member index is written as a JSON footer after the
+member data, so members can be streamed to the file as soon as they are ready::
+
+    <member> <padding> <member> <padding> ... <footer> <footer length> <magic>
+"""
+
+import json
+import tempfile
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
+from pathlib import PurePath
+from typing import (
+    IO,
+    Any,
+    Dict,
+    Iterable,
+    Iterator,
+    Mapping,
+    Optional,
+    Tuple,
+    Union,
+)
+
+import fsspec
+import numpy as np
+from kedro.io.core import (
+    AbstractDataSet,
+    DataSetError,
+    get_filepath_str,
+    get_protocol_and_path,
+)
+
+from .cache import ReadThroughCache, build_cache, open_cached
+
+MAGIC = b"HSWGANB1"
+ALIGNMENT = 64
+_TRAILER_SIZE = 8 + len(MAGIC)
+
+
+def _encode(array: np.ndarray, level: int) -> Tuple[bytes, Dict[str, Any]]:
+    array = np.ascontiguousarray(array)
+    header = dict(dtype=array.dtype.str, shape=list(array.shape))
+    if level:
+        return zlib.compress(array.tobytes(), level), dict(header, codec="zlib")
+    return array.tobytes(), dict(header, codec="raw")
+
+
+def _decode(buffer: bytes, header: Dict[str, Any]) -> np.ndarray:
+    if header["codec"] == "zlib":
+        buffer = zlib.decompress(buffer)
+    array = np.frombuffer(buffer, dtype=np.dtype(header["dtype"]))
+    return array.reshape(header["shape"])
+
+
+def _write_members(
+    openfile: IO[bytes], members: Iterable[Tuple[str, Iterable[bytes], Dict[str, Any]]]
+) -> None:
+    offset = 0
+    index: Dict[str, Dict[str, Any]] = {}
+    for key, buffers, header in members:
+        padding = -offset % ALIGNMENT
+        openfile.write(b"\0" * padding)
+        offset += padding
+        start = offset
+        for buffer in buffers:
+            openfile.write(buffer)
+            offset += len(buffer)
+        index[key] = dict(header, offset=start, length=offset - start)
+    footer = json.dumps(index).encode("utf-8")
+    openfile.write(footer)
+    openfile.write(len(footer).to_bytes(length=8, byteorder="little"))
+    openfile.write(MAGIC)
+
+
+class _Spool:
+    """Accumulate the rows of one member in a temporary file, batch by batch."""
+
+    def __init__(self, array: np.ndarray, level: int, spoolfile: IO[bytes]) -> None:
+        self._dtype = array.dtype
+        self._shape = array.shape[1:]
+        self._rows = 0
+        self._compressor = zlib.compressobj(level) if level else None
+        self._spoolfile = spoolfile
+
+    def append(self, array: np.ndarray) -> None:
+        """Append the rows of `array`, which must match the first batch."""
+        if array.dtype != self._dtype or array.shape[1:] != self._shape:
+            raise DataSetError(
+                f"Batch of dtype {array.dtype} and shape {array.shape} does not "
+                f"match dtype {self._dtype} and row shape {self._shape}."
+            )
+        buffer = np.ascontiguousarray(array).tobytes()
+        if self._compressor is not None:
+            buffer = self._compressor.compress(buffer)
+        self._spoolfile.write(buffer)
+        self._rows += len(array)
+
+    def finish(self) -> Tuple[Iterator[bytes], Dict[str, Any]]:
+        """Return the member's data, in chunks, and its header."""
+        codec = "raw"
+        if self._compressor is not None:
+            self._spoolfile.write(self._compressor.flush())
+            codec = "zlib"
+        self._spoolfile.seek(0)
+        chunks = iter(lambda: self._spoolfile.read(2**24), b"")
+        header = dict(
+            dtype=self._dtype.str, shape=[self._rows, *self._shape], codec=codec
+        )
+        return chunks, header
+
+
+class Bundle(Mapping[str, np.ndarray]):
+    """Read-only mapping that loads bundle members on first access."""
+
+    def __init__(
+        self,
+        filepath: str,
+        filesystem: Any,
+        members: Dict[str, Dict[str, Any]],
+        cache: Optional[ReadThroughCache],
+        mmap_path: Optional[str],
+    ) -> None:
+        self._filepath = filepath
+        self._filesystem = filesystem
+        self._members = members
+        self._cache = cache
+        self._mmap_path = mmap_path
+        self._loaded: Dict[str, np.ndarray] = {}
+
+    def __getitem__(self, key: str) -> np.ndarray:
+        if key not in self._loaded:
+            self._loaded[key] = self._read(header=self._members[key])
+        return self._loaded[key]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._members)
+
+    def __len__(self) -> int:
+        return len(self._members)
+
+    def __repr__(self) -> str:
+        return f"Bundle({self._filepath!r}, members={list(self._members)})"
+
+    def header(self, key: str) -> Dict[str, Any]:
+        """Return the dtype, shape, and codec of a member without loading it."""
+        return dict(self._members[key])
+
+    def map_raw(self) -> None:
+        """Memory-map every raw member now rather than on first access."""
+        for key, header in self._members.items():
+            raw = header["codec"] == "raw" and header["length"]
+            if self._mmap_path and raw and key not in self._loaded:
+                self._loaded[key] = self._read(header=header)
+
+    def _read(self, header: Dict[str, Any]) -> np.ndarray:
+        if self._mmap_path and header["codec"] == "raw" and header["length"]:
+            return np.memmap(
+                filename=self._mmap_path,
+                dtype=np.dtype(header["dtype"]),
+                mode="r",
+                offset=header["offset"],
+                shape=tuple(header["shape"]),
+            )
+        with open_cached(
+            filesystem=self._filesystem, path=self._filepath, cache=self._cache
+        ) as openfile:
+            openfile.seek(header["offset"])
+            return _decode(buffer=openfile.read(header["length"]), header=header)
+
+
+class BundleDataSet(AbstractDataSet):
+    """Load and save a `dict` of NumPy arrays with a single bundle file.
+
+    Example catalog entry::
+
+        model_input_classified:
+          type: hyperspec_wgan.extras.datasets.bundle.BundleDataSet
+          filepath: data/05_model_input/indian_pines/1dcnn/classified.bundle
+          compression_level: 6
+          uncompressed: [x_train, y_train]
+
+    Raw members are memory-mapped when the file is local, or when it is read
+    through a whole-file `cache`. With a block `cache`, only the blocks spanned
+    by the requested members are downloaded.
+
+    Besides a `dict` of arrays, an iterable of `dict` batches can be saved, in
+    which case each member is the concatenation of its batches. Batches are
+    spooled to temporary files as they arrive, so a generator of batches is
+    saved without holding more than one batch in memory.
+    """
+
+    def __init__(
+        self,
+        filepath: str,
+        compression_level: int = 6,
+        uncompressed: Iterable[str] = (),
+        max_workers: Optional[int] = None,
+        cache: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        protocol, path = get_protocol_and_path(filepath=filepath)
+        self._protocol = protocol
+        self._filepath = PurePath(path)
+        self._filesystem = fsspec.filesystem(protocol=protocol)
+        self._compression_level = compression_level
+        self._uncompressed = frozenset(uncompressed)
+        self._max_workers = max_workers
+        self._cache = build_cache(config=cache)
+
+    def _read_footer(self, filepath: str) -> Dict[str, Dict[str, Any]]:
+        with open_cached(
+            filesystem=self._filesystem, path=filepath, cache=self._cache
+        ) as openfile:
+            size = openfile.seek(0, 2)
+            openfile.seek(size - _TRAILER_SIZE)
+            trailer = openfile.read(_TRAILER_SIZE)
+            if trailer[8:] != MAGIC:
+                raise DataSetError(f"'{filepath}' is not a bundle file.")
+            length = int.from_bytes(trailer[:8], byteorder="little")
+            openfile.seek(size - _TRAILER_SIZE - length)
+            footer: Dict[str, Dict[str, Any]] = json.loads(
+                openfile.read(length).decode("utf-8")
+            )
+            return footer
+
+    def _load(self) -> Bundle:
+        filepath = get_filepath_str(path=self._filepath, protocol=self._protocol)
+        if self._protocol == "file":
+            return self._bundle(filepath=filepath, mmap_path=filepath)
+        if self._cache is not None and self._cache.block_size is None:
+            with self._cache.local_copy(
+                filesystem=self._filesystem, path=filepath
+            ) as local_path:
+                bundle = self._bundle(filepath=filepath, mmap_path=local_path)
+                bundle.map_raw()
+                return bundle
+        return self._bundle(filepath=filepath, mmap_path=None)
+
+    def _bundle(self, filepath: str, mmap_path: Optional[str]) -> Bundle:
+        return Bundle(
+            filepath=filepath,
+            filesystem=self._filesystem,
+            members=self._read_footer(filepath=filepath),
+            cache=self._cache,
+            mmap_path=mmap_path,
+        )
+
+    def _save(
+        self,
+        data: Union[Mapping[str, np.ndarray], Iterable[Mapping[str, np.ndarray]]],
+    ) -> None:
+        filepath = get_filepath_str(path=self._filepath, protocol=self._protocol)
+        if isinstance(data, Mapping):
+            self._save_arrays(filepath=filepath, data=data)
+        else:
+            self._save_batches(filepath=filepath, batches=data)
+
+    def _level(self, key: str) -> int:
+        return 0 if key in self._uncompressed else self._compression_level
+
+    def _save_arrays(self, filepath: str, data: Mapping[str, np.ndarray]) -> None:
+        with ThreadPoolExecutor(max_workers=self._max_workers) as executor:
+            encoded = executor.map(
+                lambda key: (key, *_encode(array=data[key], level=self._level(key))),
+                data,
+            )
+            with self._filesystem.open(path=filepath, mode="wb") as openfile:
+                _write_members(
+                    openfile=openfile,
+                    members=(
+                        (key, [buffer], header) for key, buffer, header in encoded
+                    ),
+                )
+
+    def _save_batches(
+        self, filepath: str, batches: Iterable[Mapping[str, np.ndarray]]
+    ) -> None:
+        spools: Dict[str, _Spool] = {}
+        with ExitStack() as stack:
+            for batch in batches:
+                for key, array in batch.items():
+                    if key not in spools:
+                        spools[key] = _Spool(
+                            array=array,
+                            level=self._level(key),
+                            spoolfile=stack.enter_context(tempfile.TemporaryFile()),
+                        )
+                    spools[key].append(array=array)
+            with self._filesystem.open(path=filepath, mode="wb") as openfile:
+                _write_members(
+                    openfile=openfile,
+                    members=((key, *spool.finish()) for key, spool in spools.items()),
+                )
+
+    def _exists(self) -> bool:
+        filepath = get_filepath_str(path=self._filepath, protocol=self._protocol)
+        return bool(self._filesystem.exists(filepath))
+
+    def _describe(self) -> Dict[str, Union[PurePath, str, int]]:
+        return dict(
+            filepath=self._filepath,
+            protocol=self._protocol,
+            compression_level=self._compression_level,
+        )
@@ -0,0 +1,329 @@
+# Copyright 2021 QuantumBlack Visual Analytics Limited
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES
+# OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE, AND
+# NONINFRINGEMENT. IN NO EVENT WILL THE LICENSOR OR OTHER CONTRIBUTORS
+# BE LIABLE FOR ANY CLAIM, DAMAGES, OR OTHER LIABILITY, WHETHER IN AN
+# ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF, OR IN
+# CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+#
+# The QuantumBlack Visual Analytics Limited ("QuantumBlack") name and logo
+# (either separately or in combination, "QuantumBlack Trademarks") are
+# trademarks of QuantumBlack. The License does not grant you any right or
+# license to the QuantumBlack Trademarks. You may not use the QuantumBlack
+# Trademarks or any confusingly similar mark as a trademark for your product,
+# or use the QuantumBlack Trademarks in any other manner that might cause
+# confusion in the marketplace, including but not limited to in advertising,
+# on websites, or on software.
+#
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Local read-through cache for datasets backed by remote file systems.
+
+Entries are keyed by the remote path together with its ETag (or modification
+time) and size, so a changed remote file is never served from a stale copy.
+Whole files or fixed-size blocks are written to a temporary file and renamed
+into place, and file locks serialise downloads and eviction, so several
+processes can share one cache directory. Whole files in use by a reader are
+locked against eviction until the reader has opened them, and their lock files
+are removed along with them.
+
+Each process keeps a running total of the cache size, starting from a scan of
+the directory, and only scans again to evict once that total exceeds
+`max_size`. Entries written by other processes meanwhile are found at the next
+scan, so the cache may briefly grow beyond `max_size`.
+"""
+
+import fcntl
+import hashlib
+import io
+import json
+import os
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+from typing import IO, Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+_VERSION_KEYS = ("ETag", "etag", "md5Hash", "mtime", "LastModified", "updated")
+
+
+class ReadThroughCache:
+    """Keep local copies of remote files within a size budget.
+
+    If `block_size` is not set, whole files are downloaded on first read.
+    Otherwise only the blocks touched by each read are downloaded, which
+    suits windowed reads of large files. Least recently used entries are
+    evicted once the cache grows beyond `max_size` bytes.
+    """
+
+    def __init__(
+        self,
+        directory: str = "~/.cache/hyperspec_wgan",
+        max_size: int = 8 * 2**30,
+        block_size: Optional[int] = None,
+    ) -> None:
+        self._directory = Path(directory).expanduser()
+        self._directory.mkdir(parents=True, exist_ok=True)
+        self._max_size = max_size
+        self._block_size = block_size
+        self._size: Optional[int] = None
+
+    def _key(self, filesystem: Any, path: str) -> Tuple[str, int]:
+        info = filesystem.info(path)
+        version = next(
+            (str(info[key]) for key in _VERSION_KEYS if info.get(key) is not None),
+            "",
+        )
+        protocol = filesystem.protocol
+        protocol = protocol if isinstance(protocol, str) else protocol[0]
+        token = json.dumps([protocol, path, version, info["size"]])
+        return hashlib.sha256(token.encode("utf-8")).hexdigest(), info["size"]
+
+    @contextmanager
+    def _lock(
+        self, name: str, shared: bool = False, blocking: bool = True
+    ) -> Iterator[bool]:
+        operation = fcntl.LOCK_SH if shared else fcntl.LOCK_EX
+        operation |= 0 if blocking else fcntl.LOCK_NB
+        path = self._directory / f"{name}.lock"
+        while True:
+            with open(path, mode="a", encoding="utf-8") as lockfile:
+                try:
+                    fcntl.flock(lockfile.fileno(), operation)
+                except BlockingIOError:
+                    yield False
+                    return
+                try:
+                    # A lock file removed while we waited no longer guards `name`.
+                    if _same_file(lockfile=lockfile, path=path):
+                        yield True
+                        return
+                finally:
+                    fcntl.flock(lockfile.fileno(), fcntl.LOCK_UN)
+
+    def _publish(self, target: Path, write: Any) -> None:
+        target.parent.mkdir(parents=True, exist_ok=True)
+        descriptor, temporary = tempfile.mkstemp(dir=target.parent, suffix=".tmp")
+        try:
+            with os.fdopen(descriptor, mode="wb") as openfile:
+                write(openfile)
+                size = openfile.tell()
+            os.replace(temporary, target)
+        except BaseException:
+            os.unlink(temporary)
+            raise
+        if self._size is not None and self._size + size <= self._max_size:
+            self._size += size
+        else:
+            self._evict(keep=target)
+
+    def _entries(self) -> List[Tuple[float, int, Path]]:
+        entries = []
+        for root, _, filenames in os.walk(self._directory):
+            for filename in filenames:
+                if filename.endswith((".lock", ".tmp")):
+                    continue
+                path = Path(root, filename)
+                try:
+                    stat = path.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+    def _remove(self, path: Path) -> bool:
+        if path.parent != self._directory:
+            path.unlink(missing_ok=True)
+            return True
+        with self._lock(name=path.name, blocking=False) as locked:
+            if locked:
+                path.unlink(missing_ok=True)
+                (self._directory / f"{path.name}.lock").unlink(missing_ok=True)
+            return locked
+
+    def _evict(self, keep: Path) -> None:
+        with self._lock(name="cache"):
+            entries = sorted(self._entries())
+            total = sum(size for _, size, _ in entries)
+            for _, size, path in entries:
+                if total <= self._max_size:
+                    break
+                if path != keep and self._remove(path=path):
+                    total -= size
+            self._size = total
+
+    @contextmanager
+    def local_copy(self, filesystem: Any, path: str) -> Iterator[str]:
+        """Yield the path of a complete local copy of a remote file.
+
+        The copy is not evicted before the context exits, so it can be opened
+        or memory-mapped safely; once open, it stays readable even if evicted.
+        """
+        key, _ = self._key(filesystem=filesystem, path=path)
+        target = self._directory / key
+        while True:
+            with self._lock(name=key, shared=True):
+                if target.exists():
+                    os.utime(target)
+                    yield str(target)
+                    return
+            with self._lock(name=key):
+                if not target.exists():
+                    self._publish(
+                        target=target,
+                        write=lambda openfile: _copy(filesystem, path, openfile),
+                    )
+
+    def read_blocks(
+        self, key: str, indices: range, open_remote: Callable[[], IO[bytes]]
+    ) -> Iterator[bytes]:
+        """Yield blocks of a remote file, downloading the missing ones.
+
+        `open_remote` is only called if a block is missing, and should return
+        the same open remote file on every call.
+        """
+        if self._block_size is None:
+            raise ValueError("Block reads need a cache with a `block_size`.")
+        for index in indices:
+            target = self._directory / f"{key}.blocks" / str(index)
+            try:
+                with open(target, mode="rb") as openfile:
+                    data = openfile.read()
+                os.utime(target)
+            except FileNotFoundError:
+                remotefile = open_remote()
+                remotefile.seek(index * self._block_size)
+                data = remotefile.read(self._block_size)
+                self._publish(
+                    target=target,
+                    write=lambda openfile, data=data: openfile.write(data),
+                )
+            yield data
+
+    def open(self, filesystem: Any, path: str) -> IO[bytes]:
+        """Open a remote file for reading through the cache."""
+        if self._block_size is None:
+            with self.local_copy(filesystem=filesystem, path=path) as local_path:
+                return open(local_path, mode="rb")
+        key, size = self._key(filesystem=filesystem, path=path)
+        raw = _BlockFile(
+            cache=self,
+            filesystem=filesystem,
+            path=path,
+            key=key,
+            size=size,
+            block_size=self._block_size,
+        )
+        return io.BufferedReader(raw, buffer_size=self._block_size)
+
+    @property
+    def block_size(self) -> Optional[int]:
+        """Return the block size, or `None` if whole files are cached."""
+        return self._block_size
+
+
+class _BlockFile(io.RawIOBase):  # pylint: disable=too-many-instance-attributes
+    def __init__(  # pylint: disable=too-many-arguments
+        self,
+        cache: ReadThroughCache,
+        filesystem: Any,
+        path: str,
+        key: str,
+        size: int,
+        block_size: int,
+    ) -> None:
+        super().__init__()
+        self._cache = cache
+        self._filesystem = filesystem
+        self._path = path
+        self._key = key
+        self._size = size
+        self._block_size = block_size
+        self._position = 0
+        self._remotefile: Optional[IO[bytes]] = None
+
+    def _remote(self) -> IO[bytes]:
+        if self._remotefile is None:
+            self._remotefile = self._filesystem.open(path=self._path)
+        return self._remotefile
+
+    def close(self) -> None:
+        if self._remotefile is not None:
+            self._remotefile.close()
+            self._remotefile = None
+        super().close()
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._position
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        origin = {io.SEEK_SET: 0, io.SEEK_CUR: self._position, io.SEEK_END: self._size}
+        self._position = max(origin[whence] + offset, 0)
+        return self._position
+
+    def readinto(self, buffer: Any) -> int:
+        block_size = self._block_size
+        start = self._position
+        stop = min(start + len(buffer), self._size)
+        if stop <= start:
+            return 0
+        view = memoryview(buffer).cast("B")
+        written = 0
+        indices = range(start // block_size, (stop - 1) // block_size + 1)
+        blocks = self._cache.read_blocks(
+            key=self._key, indices=indices, open_remote=self._remote
+        )
+        for index, block in zip(indices, blocks):
+            skip = start + written - index * block_size
+            chunk = block[skip : skip + stop - start - written]
+            if not chunk:
+                break
+            view[written : written + len(chunk)] = chunk
+            written += len(chunk)
+        self._position += written
+        return written
+
+
+def _same_file(lockfile: IO[str], path: Path) -> bool:
+    try:
+        return os.stat(path).st_ino == os.fstat(lockfile.fileno()).st_ino
+    except FileNotFoundError:
+        return False
+
+
+def _copy(filesystem: Any, path: str, openfile: IO[bytes]) -> None:
+    with filesystem.open(path=path) as remotefile:
+        while True:
+            chunk = remotefile.read(2**24)
+            if not chunk:
+                break
+            openfile.write(chunk)
+
+
+def open_cached(
+    filesystem: Any, path: str, cache: Optional[ReadThroughCache]
+) -> IO[bytes]:
+    """Open a file for reading, through `cache` if one is configured."""
+    if cache is None:
+        openfile: IO[bytes] = filesystem.open(path=path)
+        return openfile
+    return cache.open(filesystem=filesystem, path=path)
+
+
+def build_cache(config: Optional[Dict[str, Any]]) -> Optional[ReadThroughCache]:
+    """Build a cache from a catalog entry's `cache` section, if present."""
+    return ReadThroughCache(**config) if config is not None else None
@@ -29,25 +29,30 @@
 """Custom dataset module for MATLAB files to be used with DataCatalog."""
 
 from pathlib import PurePath
-from typing import Any, Dict, Union
+from typing import Any, Dict, Optional, Union
 
 import fsspec
 from kedro.io.core import AbstractDataSet, get_filepath_str, get_protocol_and_path
 from scipy.io import loadmat, savemat
 
+from .cache import build_cache, open_cached
+
 
 class MatlabDataSet(AbstractDataSet):
     """Load and save data with MATLAB files."""
 
-    def __init__(self, filepath: str) -> None:
+    def __init__(self, filepath: str, cache: Optional[Dict[str, Any]] = None) -> None:
         protocol, path = get_protocol_and_path(filepath=filepath)
         self._protocol = protocol
         self._filepath = PurePath(path)
         self._filesystem = fsspec.filesystem(protocol=protocol)
+        self._cache = build_cache(config=cache)
 
     def _load(self) -> Any:
         filepath = get_filepath_str(path=self._filepath, protocol=self._protocol)
-        with self._filesystem.open(path=filepath) as openfile:
+        with open_cached(
+            filesystem=self._filesystem, path=filepath, cache=self._cache
+        ) as openfile:
             return loadmat(file_name=openfile)
 
     def _save(self, data: Dict[str, Any]) -> Any:
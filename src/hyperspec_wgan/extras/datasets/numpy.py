@@ -29,25 +29,48 @@
 """Custom dataset module for NumPy files to be used with DataCatalog."""
 
 from pathlib import PurePath
-from typing import Any, Dict, Union
+from typing import Any, Dict, Literal, Optional, Union
 
 import fsspec
 import numpy as np
 from kedro.io.core import AbstractDataSet, get_filepath_str, get_protocol_and_path
 
+from .cache import build_cache, open_cached
+
 
 class NumpyDataSet(AbstractDataSet):
-    """Load and save data with NumPy files."""
+    """Load and save data with NumPy files.
+
+    With `mmap_mode`, arrays are memory-mapped instead of read, when the file
+    is local or read through a whole-file `cache`.
+    """
 
-    def __init__(self, filepath: str) -> None:
+    def __init__(
+        self,
+        filepath: str,
+        cache: Optional[Dict[str, Any]] = None,
+        mmap_mode: Optional[Literal["r+", "r", "w+", "c"]] = None,
+    ) -> None:
         protocol, path = get_protocol_and_path(filepath=filepath)
         self._protocol = protocol
         self._filepath = PurePath(path)
         self._filesystem = fsspec.filesystem(protocol=protocol)
+        self._cache = build_cache(config=cache)
+        self._mmap_mode = mmap_mode
 
     def _load(self) -> Any:
         filepath = get_filepath_str(path=self._filepath, protocol=self._protocol)
-        with self._filesystem.open(path=filepath) as openfile:
+        if self._mmap_mode is not None:
+            if self._protocol == "file":
+                return np.load(file=filepath, mmap_mode=self._mmap_mode)
+            if self._cache is not None and self._cache.block_size is None:
+                with self._cache.local_copy(
+                    filesystem=self._filesystem, path=filepath
+                ) as local_path:
+                    return np.load(file=local_path, mmap_mode=self._mmap_mode)
+        with open_cached(
+            filesystem=self._filesystem, path=filepath, cache=self._cache
+        ) as openfile:
             return np.load(file=openfile)
 
     def _save(self, data: np.ndarray) -> Any:
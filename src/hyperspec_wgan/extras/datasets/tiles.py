@@ -0,0 +1,120 @@
+# Copyright 2021 QuantumBlack Visual Analytics Limited
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES
+# OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE, AND
+# NONINFRINGEMENT. IN NO EVENT WILL THE LICENSOR OR OTHER CONTRIBUTORS
+# BE LIABLE FOR ANY CLAIM, DAMAGES, OR OTHER LIABILITY, WHETHER IN AN
+# ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF, OR IN
+# CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+#
+# The QuantumBlack Visual Analytics Limited ("QuantumBlack") name and logo
+# (either separately or in combination, "QuantumBlack Trademarks") are
+# trademarks of QuantumBlack. The License does not grant you any right or
+# license to the QuantumBlack Trademarks. You may not use the QuantumBlack
+# Trademarks or any confusingly similar mark as a trademark for your product,
+# or use the QuantumBlack Trademarks in any other manner that might cause
+# confusion in the marketplace, including but not limited to in advertising,
+# on websites, or on software.
+#
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Custom dataset module for tiled image pyramids to be used with DataCatalog."""
+
+import collections
+import io
+import json
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import PurePosixPath
+from typing import Any, Deque, Dict, Optional
+
+import fsspec
+import numpy as np
+from kedro.io.core import (
+    AbstractDataSet,
+    DataSetError,
+    get_filepath_str,
+    get_protocol_and_path,
+)
+from PIL import Image
+
+from hyperspec_wgan.extras.tiles import TilePyramid
+
+MANIFEST = "pyramid.json"
+
+
+class TiledImageWriter(AbstractDataSet):
+    """Save a `TilePyramid` as a directory of PNG tiles.
+
+    Tiles are written to `<filepath>/<level>/<row>_<column>.png` as they are
+    rendered, encoded by up to `max_workers` threads, followed by a
+    `pyramid.json` manifest. Any previous pyramid at `filepath` is removed.
+
+    Example catalog entry::
+
+        reporting_false_colour:
+          type: hyperspec_wgan.extras.datasets.tiles.TiledImageWriter
+          filepath: data/08_reporting/indian_pines/false_colour
+          save_args:
+            compress_level: 6
+    """
+
+    def __init__(
+        self,
+        filepath: str,
+        max_workers: int = 4,
+        save_args: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        protocol, path = get_protocol_and_path(filepath=filepath)
+        self._protocol = protocol
+        self._filepath = PurePosixPath(path)
+        self._filesystem = fsspec.filesystem(
+            protocol=protocol, **(dict(auto_mkdir=True) if protocol == "file" else {})
+        )
+        self._max_workers = max_workers
+        self._save_args = save_args or {}
+
+    def _load(self) -> None:
+        raise DataSetError(f"Loading not supported for '{self.__class__.__name__}'")
+
+    def _write(self, path: str, tile: np.ndarray) -> None:
+        buffer = io.BytesIO()
+        Image.fromarray(tile).save(buffer, format="PNG", **self._save_args)
+        with self._filesystem.open(path=path, mode="wb") as openfile:
+            openfile.write(buffer.getvalue())
+
+    def _save(self, data: TilePyramid) -> None:
+        directory = get_filepath_str(path=self._filepath, protocol=self._protocol)
+        if self._filesystem.exists(directory):
+            self._filesystem.rm(directory, recursive=True)
+        pending: Deque["Future[None]"] = collections.deque()
+        with ThreadPoolExecutor(max_workers=self._max_workers) as executor:
+            for (level, row, column), tile in data:
+                if len(pending) >= 2 * self._max_workers:
+                    pending.popleft().result()
+                path = f"{directory}/{level}/{row}_{column}.png"
+                pending.append(executor.submit(self._write, path, tile))
+            for future in pending:
+                future.result()
+        with self._filesystem.open(
+            path=f"{directory}/{MANIFEST}", mode="w"
+        ) as openfile:
+            json.dump(data.manifest(), openfile)
+
+    def _exists(self) -> bool:
+        directory = get_filepath_str(path=self._filepath, protocol=self._protocol)
+        return bool(self._filesystem.exists(f"{directory}/{MANIFEST}"))
+
+    def _describe(self) -> Dict[str, Any]:
+        return dict(
+            filepath=self._filepath,
+            protocol=self._protocol,
+            save_args=self._save_args,
+        )
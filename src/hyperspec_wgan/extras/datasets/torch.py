@@ -0,0 +1,154 @@
+# Copyright 2021 QuantumBlack Visual Analytics Limited
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES
+# OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE, AND
+# NONINFRINGEMENT. IN NO EVENT WILL THE LICENSOR OR OTHER CONTRIBUTORS
+# BE LIABLE FOR ANY CLAIM, DAMAGES, OR OTHER LIABILITY, WHETHER IN AN
+# ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF, OR IN
+# CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+#
+# The QuantumBlack Visual Analytics Limited ("QuantumBlack") name and logo
+# (either separately or in combination, "QuantumBlack Trademarks") are
+# trademarks of QuantumBlack. The License does not grant you any right or
+# license to the QuantumBlack Trademarks. You may not use the QuantumBlack
+# Trademarks or any confusingly similar mark as a trademark for your product,
+# or use the QuantumBlack Trademarks in any other manner that might cause
+# confusion in the marketplace, including but not limited to in advertising,
+# on websites, or on software.
+#
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+"""Custom dataset module for PyTorch models to be used with DataCatalog."""
+
+from pathlib import PurePosixPath
+from typing import IO, Any, Dict, Optional, Union
+
+import fsspec
+import torch
+from kedro.io.core import (
+    AbstractVersionedDataSet,
+    DataSetError,
+    Version,
+    get_filepath_str,
+    get_protocol_and_path,
+)
+
+
+class TorchCheckpointDataSet(AbstractVersionedDataSet):
+    """Load and save PyTorch checkpoints, such as state dicts, with versioning.
+
+    Checkpoints are written to a temporary file that is then moved into place,
+    so an interrupted save never leaves a truncated checkpoint behind. Local
+    checkpoints are loaded from their path, so that `load_args` such as
+    `mmap: True` (PyTorch 2.1+) can map weights lazily instead of reading them.
+
+    Example catalog entry::
+
+        model_generator:
+          type: hyperspec_wgan.extras.datasets.torch.TorchCheckpointDataSet
+          filepath: data/06_models/indian_pines/generator.pt
+          versioned: True
+    """
+
+    def __init__(
+        self,
+        filepath: str,
+        version: Optional[Version] = None,
+        load_args: Optional[Dict[str, Any]] = None,
+        save_args: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        protocol, path = get_protocol_and_path(
+            filepath=filepath, version=version  # type: ignore[arg-type]
+        )
+        self._protocol = protocol
+        self._filesystem = fsspec.filesystem(
+            protocol=protocol, **(dict(auto_mkdir=True) if protocol == "file" else {})
+        )
+        super().__init__(
+            filepath=PurePosixPath(path),
+            version=version,
+            exists_function=self._filesystem.exists,
+            glob_function=self._filesystem.glob,
+        )
+        self._load_args = dict(dict(map_location="cpu"), **(load_args or {}))
+        self._save_args = save_args or {}
+
+    def _load(self) -> Any:
+        load_path = get_filepath_str(
+            path=self._get_load_path(), protocol=self._protocol
+        )
+        if self._protocol == "file":
+            return self._read(source=load_path)
+        with self._filesystem.open(path=load_path) as openfile:
+            return self._read(source=openfile)
+
+    def _read(self, source: Union[str, IO[bytes]]) -> Any:
+        return torch.load(source, **self._load_args)
+
+    def _write(self, data: Any, openfile: IO[bytes]) -> None:
+        torch.save(data, openfile, **self._save_args)
+
+    def _save(self, data: Any) -> None:
+        save_path = get_filepath_str(
+            path=self._get_save_path(), protocol=self._protocol
+        )
+        temporary_path = f"{save_path}.tmp"
+        with self._filesystem.open(path=temporary_path, mode="wb") as openfile:
+            self._write(data=data, openfile=openfile)
+        self._filesystem.mv(temporary_path, save_path)
+        self._invalidate_cache()
+
+    def _exists(self) -> bool:
+        try:
+            load_path = get_filepath_str(
+                path=self._get_load_path(), protocol=self._protocol
+            )
+        except DataSetError:
+            return False
+        return bool(self._filesystem.exists(load_path))
+
+    def _invalidate_cache(self) -> None:
+        filepath = get_filepath_str(path=self._filepath, protocol=self._protocol)
+        self._filesystem.invalidate_cache(filepath)
+
+    def _describe(self) -> Dict[str, Any]:
+        return dict(
+            filepath=self._filepath,
+            protocol=self._protocol,
+            version=self._version,
+            load_args=self._load_args,
+            save_args=self._save_args,
+        )
+
+
+class TorchScriptDataSet(TorchCheckpointDataSet):
+    """Load and save TorchScript modules, such as exported models, with versioning.
+
+    Modules are loaded with `torch.jit.load`, so they run without the Python
+    code that defined them.
+
+    Example catalog entry::
+
+        model_generator_scripted:
+          type: hyperspec_wgan.extras.datasets.torch.TorchScriptDataSet
+          filepath: data/06_models/indian_pines/generator_scripted.pt
+          versioned: True
+    """
+
+    def _read(self, source: Union[str, IO[bytes]]) -> torch.jit.ScriptModule:
+        module: torch.jit.ScriptModule = torch.jit.load(  # type: ignore[no-untyped-call]
+            source, **self._load_args
+        )
+        return module
+
+    def _write(self, data: torch.jit.ScriptModule, openfile: IO[bytes]) -> None:
+        torch.jit.save(data, openfile, **self._save_args)
@@ -0,0 +1,143 @@
+# Copyright 2021 QuantumBlack Visual Analytics Limited
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES
+# OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE, AND
+# NONINFRINGEMENT. IN NO EVENT WILL THE LICENSOR OR OTHER CONTRIBUTORS
+# BE LIABLE FOR ANY CLAIM, DAMAGES, OR OTHER LIABILITY, WHETHER IN AN
+# ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF, OR IN
+# CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+#
+# The QuantumBlack Visual Analytics Limited ("QuantumBlack") name and logo
+# (either separately or in combination, "QuantumBlack Trademarks") are
+# trademarks of QuantumBlack. The License does not grant you any right or
+# license to the QuantumBlack Trademarks. You may not use the QuantumBlack
+# Trademarks or any confusingly similar mark as a trademark for your product,
+# or use the QuantumBlack Trademarks in any other manner that might cause
+# confusion in the marketplace, including but not limited to in advertising,
+# on websites, or on software.
+#
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+"""Multi-process data-parallel training on CPUs with `torch.distributed`.
+
+`launch` runs a training function in `world_size` local processes joined in a
+gloo process group, and returns the result of rank 0. Inside the function,
+`all_reduce_gradients` averages gradients across ranks after each backward
+pass, so every rank applies the same update, and `all_reduce_buffers` keeps
+buffers such as BatchNorm running statistics in step. Outside a process group, all the
+helpers fall back to single-process behaviour.
+"""
+
+import os
+import tempfile
+from pathlib import Path
+from typing import Any, Callable, Iterable, Tuple
+
+import torch
+import torch.distributed as dist
+import torch.multiprocessing as mp
+from torch import nn
+
+
+def rank() -> int:
+    """Return the rank of this process, or 0 outside a process group."""
+    return dist.get_rank() if dist.is_available() and dist.is_initialized() else 0
+
+
+def world_size() -> int:
+    """Return the number of processes, or 1 outside a process group."""
+    if dist.is_available() and dist.is_initialized():
+        return dist.get_world_size()
+    return 1
+
+
+def broadcast_module(module: nn.Module) -> None:
+    """Copy the parameters and buffers of rank 0 to every other rank."""
+    if world_size() == 1:
+        return
+    for tensor in [*module.parameters(), *module.buffers()]:
+        dist.broadcast(tensor.data, src=0)
+
+
+def all_reduce_gradients(parameters: Iterable[nn.Parameter]) -> None:
+    """Average gradients across ranks with a single flattened all-reduce."""
+    size = world_size()
+    if size == 1:
+        return
+    gradients = [p.grad for p in parameters if p.grad is not None]
+    flat = torch.cat([gradient.reshape(-1) for gradient in gradients])
+    dist.all_reduce(flat)
+    flat /= size
+    offset = 0
+    for gradient in gradients:
+        gradient.copy_(flat[offset : offset + gradient.numel()].view_as(gradient))
+        offset += gradient.numel()
+
+
+def all_reduce_buffers(module: nn.Module) -> None:
+    """Average floating-point buffers, e.g. BatchNorm running statistics."""
+    size = world_size()
+    if size == 1:
+        return
+    for buffer in module.buffers():
+        if buffer.is_floating_point():
+            dist.all_reduce(buffer.data)
+            buffer.data /= size
+
+
+def seed_rank(seed: int, epoch: int) -> None:
+    """Give every rank its own, reproducible PyTorch random stream per epoch."""
+    size = world_size()
+    if size > 1:
+        torch.manual_seed(seed + epoch * size + rank())
+
+
+def _worker(  # pylint: disable=too-many-arguments
+    process_rank: int,
+    size: int,
+    rendezvous: str,
+    result_path: str,
+    function: Callable[..., Any],
+    args: Tuple[Any, ...],
+) -> None:
+    torch.set_num_threads(max(1, (os.cpu_count() or 1) // size))
+    dist.init_process_group(
+        backend="gloo",
+        init_method=f"file://{rendezvous}",
+        rank=process_rank,
+        world_size=size,
+    )
+    try:
+        result = function(*args)
+        if process_rank == 0:
+            torch.save(result, result_path)
+    finally:
+        dist.destroy_process_group()
+
+
+def launch(function: Callable[..., Any], size: int, *args: Any) -> Any:
+    """Run `function(*args)` in `size` processes and return rank 0's result.
+
+    `function` and `args` must be picklable, since the workers are spawned.
+    """
+    if size == 1:
+        return function(*args)
+    with tempfile.TemporaryDirectory() as directory:
+        rendezvous = str(Path(directory, "rendezvous"))
+        result_path = str(Path(directory, "result.pt"))
+        mp.spawn(  # type: ignore[attr-defined,no-untyped-call]
+            _worker,
+            args=(size, rendezvous, result_path, function, args),
+            nprocs=size,
+            join=True,
+        )
+        return torch.load(result_path)
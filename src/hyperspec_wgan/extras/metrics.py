@@ -0,0 +1,272 @@
+# Copyright 2021 QuantumBlack Visual Analytics Limited
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES
+# OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE, AND
+# NONINFRINGEMENT. IN NO EVENT WILL THE LICENSOR OR OTHER CONTRIBUTORS
+# BE LIABLE FOR ANY CLAIM, DAMAGES, OR OTHER LIABILITY, WHETHER IN AN
+# ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF, OR IN
+# CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+#
+# The QuantumBlack Visual Analytics Limited ("QuantumBlack") name and logo
+# (either separately or in combination, "QuantumBlack Trademarks") are
+# trademarks of QuantumBlack. The License does not grant you any right or
+# license to the QuantumBlack Trademarks. You may not use the QuantumBlack
+# Trademarks or any confusingly similar mark as a trademark for your product,
+# or use the QuantumBlack Trademarks in any other manner that might cause
+# confusion in the marketplace, including but not limited to in advertising,
+# on websites, or on software.
+#
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Sample-quality metrics for generated spectra.
+
+Every pairwise quantity is computed one block of `chunk_size` rows by
+`chunk_size` columns at a time, using matrix products for the distances, so
+memory stays bounded by the block size rather than the number of samples.
+Row blocks are spread across `n_jobs` threads, each running single-threaded
+BLAS to avoid oversubscribing the cores.
+"""
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, TypeVar
+
+import numpy as np
+from threadpoolctl import threadpool_limits
+
+T = TypeVar("T")
+
+
+def _chunks(n: int, chunk_size: int) -> List[slice]:
+    return [slice(i, min(i + chunk_size, n)) for i in range(0, n, chunk_size)]
+
+
+def _map_chunks(
+    function: Callable[[slice], T], n: int, chunk_size: int, n_jobs: int
+) -> List[T]:
+    chunks = _chunks(n=n, chunk_size=chunk_size)
+    n_jobs = (os.cpu_count() or 1) if n_jobs < 0 else n_jobs
+    if n_jobs == 1 or len(chunks) == 1:
+        return [function(chunk) for chunk in chunks]
+    with threadpool_limits(limits=1), ThreadPoolExecutor(max_workers=n_jobs) as pool:
+        return list(pool.map(function, chunks))
+
+
+def _squared_distances(
+    a: np.ndarray, b: np.ndarray, a_norms: np.ndarray, b_norms: np.ndarray
+) -> np.ndarray:
+    distances: np.ndarray = a_norms[:, None] + b_norms[None, :] - 2.0 * (a @ b.T)
+    np.maximum(distances, 0.0, out=distances)
+    return distances
+
+
+def _norms(x: np.ndarray) -> np.ndarray:
+    norms: np.ndarray = np.einsum("ij,ij->i", x, x)
+    return norms
+
+
+def _kernel_sum(
+    x: np.ndarray, y: np.ndarray, gamma: float, chunk_size: int, n_jobs: int
+) -> float:
+    x_norms, y_norms = _norms(x), _norms(y)
+
+    def block_sum(rows: slice) -> float:
+        total = 0.0
+        for columns in _chunks(n=len(y), chunk_size=chunk_size):
+            distances = _squared_distances(
+                a=x[rows], b=y[columns], a_norms=x_norms[rows], b_norms=y_norms[columns]
+            )
+            total += float(np.exp(-gamma * distances).sum())
+        return total
+
+    return sum(_map_chunks(block_sum, n=len(x), chunk_size=chunk_size, n_jobs=n_jobs))
+
+
+def median_gamma(x: np.ndarray, y: np.ndarray, max_samples: int = 1000) -> float:
+    """Return the RBF `gamma` given by the median heuristic on a subsample."""
+    rng = np.random.default_rng(seed=0)
+    z = np.concatenate([x, y])
+    z = z[rng.choice(len(z), size=min(len(z), max_samples), replace=False)]
+    distances = _squared_distances(a=z, b=z, a_norms=_norms(z), b_norms=_norms(z))
+    median = np.median(distances[np.triu_indices(len(z), k=1)])
+    return 1.0 / median if median > 0 else 1.0
+
+
+def mmd_rbf(
+    x: np.ndarray,
+    y: np.ndarray,
+    gamma: Optional[float] = None,
+    chunk_size: int = 1024,
+    n_jobs: int = -1,
+) -> float:
+    """Return the unbiased squared MMD between `x` and `y` with an RBF kernel.
+
+    The unbiased estimator needs at least two samples in each set.
+    """
+    n, m = len(x), len(y)
+    if min(n, m) < 2:
+        raise ValueError(f"MMD needs at least two samples per set, got {n} and {m}.")
+    gamma = median_gamma(x=x, y=y) if gamma is None else gamma
+    xx = (_kernel_sum(x, x, gamma, chunk_size, n_jobs) - n) / (n * (n - 1))
+    yy = (_kernel_sum(y, y, gamma, chunk_size, n_jobs) - m) / (m * (m - 1))
+    xy = _kernel_sum(x, y, gamma, chunk_size, n_jobs) / (n * m)
+    return xx + yy - 2.0 * xy
+
+
+def nearest_spectral_angles(
+    x: np.ndarray, y: np.ndarray, chunk_size: int = 1024, n_jobs: int = -1
+) -> np.ndarray:
+    """Return the spectral angle from each row of `x` to its nearest row of `y`."""
+    x = x / np.linalg.norm(x, axis=1, keepdims=True).clip(min=1e-12)
+    y = y / np.linalg.norm(y, axis=1, keepdims=True).clip(min=1e-12)
+
+    def block_angles(rows: slice) -> np.ndarray:
+        cosines = np.full(rows.stop - rows.start, -1.0)
+        for columns in _chunks(n=len(y), chunk_size=chunk_size):
+            np.maximum(cosines, (x[rows] @ y[columns].T).max(axis=1), out=cosines)
+        angles: np.ndarray = np.arccos(np.clip(cosines, -1.0, 1.0))
+        return angles
+
+    return np.concatenate(
+        _map_chunks(block_angles, n=len(x), chunk_size=chunk_size, n_jobs=n_jobs)
+    )
+
+
+def spectral_angle_stats(
+    x: np.ndarray, y: np.ndarray, chunk_size: int = 1024, n_jobs: int = -1
+) -> Dict[str, float]:
+    """Summarise spectral angles, in radians, from generated `x` to real `y`."""
+    angles = nearest_spectral_angles(x=x, y=y, chunk_size=chunk_size, n_jobs=n_jobs)
+    x_mean, y_mean = x.mean(axis=0), y.mean(axis=0)
+    cosine = x_mean @ y_mean / (np.linalg.norm(x_mean) * np.linalg.norm(y_mean))
+    return dict(
+        sam_mean_spectrum=float(np.arccos(np.clip(cosine, -1.0, 1.0))),
+        sam_nearest_mean=float(angles.mean()),
+        sam_nearest_median=float(np.median(angles)),
+        sam_nearest_p95=float(np.percentile(angles, 95)),
+    )
+
+
+def _kth_neighbour_radii(
+    x: np.ndarray, k: int, chunk_size: int, n_jobs: int
+) -> np.ndarray:
+    norms = _norms(x)
+
+    def block_radii(rows: slice) -> np.ndarray:
+        nearest = np.full((rows.stop - rows.start, k), np.inf)
+        for columns in _chunks(n=len(x), chunk_size=chunk_size):
+            distances = _squared_distances(
+                a=x[rows], b=x[columns], a_norms=norms[rows], b_norms=norms[columns]
+            )
+            overlap = np.arange(
+                max(rows.start, columns.start), min(rows.stop, columns.stop)
+            )
+            distances[overlap - rows.start, overlap - columns.start] = np.inf
+            candidates = np.concatenate([nearest, distances], axis=1)
+            nearest = np.partition(candidates, k - 1, axis=1)[:, :k]
+        radii: np.ndarray = nearest.max(axis=1)
+        return radii
+
+    return np.concatenate(
+        _map_chunks(block_radii, n=len(x), chunk_size=chunk_size, n_jobs=n_jobs)
+    )
+
+
+def _coverage(
+    queries: np.ndarray,
+    references: np.ndarray,
+    radii: np.ndarray,
+    chunk_size: int,
+    n_jobs: int,
+) -> float:
+    query_norms, reference_norms = _norms(queries), _norms(references)
+
+    def block_covered(rows: slice) -> np.ndarray:
+        covered = np.zeros(rows.stop - rows.start, dtype=bool)
+        for columns in _chunks(n=len(references), chunk_size=chunk_size):
+            distances = _squared_distances(
+                a=queries[rows],
+                b=references[columns],
+                a_norms=query_norms[rows],
+                b_norms=reference_norms[columns],
+            )
+            covered |= (distances <= radii[None, columns]).any(axis=1)
+        return covered
+
+    covered = _map_chunks(block_covered, len(queries), chunk_size, n_jobs)
+    return float(np.concatenate(covered).mean())
+
+
+def knn_precision_recall(
+    real: np.ndarray,
+    fake: np.ndarray,
+    k: int = 3,
+    chunk_size: int = 1024,
+    n_jobs: int = -1,
+) -> Dict[str, float]:
+    """Return k-NN precision and recall of `fake` samples against `real` ones.
+
+    Precision is the fraction of fake samples inside the k-NN ball of some
+    real sample; recall is the fraction of real samples inside the k-NN ball
+    of some fake sample (Kynkäänniemi et al., 2019).
+    """
+    real_radii = _kth_neighbour_radii(real, k, chunk_size, n_jobs)
+    fake_radii = _kth_neighbour_radii(fake, k, chunk_size, n_jobs)
+    return dict(
+        precision=_coverage(fake, real, real_radii, chunk_size, n_jobs),
+        recall=_coverage(real, fake, fake_radii, chunk_size, n_jobs),
+    )
+
+
+def _subsample(x: np.ndarray, max_samples: int, rng: np.random.Generator) -> Any:
+    if len(x) <= max_samples:
+        return np.asarray(x, dtype=np.float64)
+    index = np.sort(rng.choice(len(x), size=max_samples, replace=False))
+    return np.asarray(x[index], dtype=np.float64)
+
+
+def score_samples(  # pylint: disable=too-many-arguments
+    x_real: np.ndarray,
+    y_real: np.ndarray,
+    x_fake: np.ndarray,
+    y_fake: np.ndarray,
+    max_samples: int = 2000,
+    k: int = 3,
+    gamma: Optional[float] = None,
+    chunk_size: int = 1024,
+    n_jobs: int = -1,
+    seed: int = 42,
+) -> Dict[str, Dict[str, float]]:
+    """Score generated spectra against real spectra, class by class.
+
+    At most `max_samples` samples are drawn from each class of each set, so
+    that a small `max_samples` gives a cheap validation metric during training.
+    """
+    rng = np.random.default_rng(seed=seed)
+    scores = {}
+    for label in np.intersect1d(np.unique(y_real), np.unique(y_fake)):
+        real = _subsample(x=x_real[y_real == label], max_samples=max_samples, rng=rng)
+        fake = _subsample(x=x_fake[y_fake == label], max_samples=max_samples, rng=rng)
+        if min(len(real), len(fake)) <= k:
+            continue
+        scores[str(label)] = dict(
+            mmd=mmd_rbf(real, fake, gamma=gamma, chunk_size=chunk_size, n_jobs=n_jobs),
+            **spectral_angle_stats(fake, real, chunk_size=chunk_size, n_jobs=n_jobs),
+            **knn_precision_recall(
+                real, fake, k=k, chunk_size=chunk_size, n_jobs=n_jobs
+            ),
+        )
+    if scores:
+        scores["mean"] = {
+            metric: float(np.mean([score[metric] for score in scores.values()]))
+            for metric in next(iter(scores.values()))
+        }
+    return scores
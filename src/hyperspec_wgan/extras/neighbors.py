@@ -0,0 +1,167 @@
+# Copyright 2021 QuantumBlack Visual Analytics Limited
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES
+# OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE, AND
+# NONINFRINGEMENT. IN NO EVENT WILL THE LICENSOR OR OTHER CONTRIBUTORS
+# BE LIABLE FOR ANY CLAIM, DAMAGES, OR OTHER LIABILITY, WHETHER IN AN
+# ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF, OR IN
+# CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+#
+# The QuantumBlack Visual Analytics Limited ("QuantumBlack") name and logo
+# (either separately or in combination, "QuantumBlack Trademarks") are
+# trademarks of QuantumBlack. The License does not grant you any right or
+# license to the QuantumBlack Trademarks. You may not use the QuantumBlack
+# Trademarks or any confusingly similar mark as a trademark for your product,
+# or use the QuantumBlack Trademarks in any other manner that might cause
+# confusion in the marketplace, including but not limited to in advertising,
+# on websites, or on software.
+#
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+"""Nearest-neighbour index over real spectra for memorisation checks.
+
+Spectra are normalised to unit length, so that Euclidean distance between them
+is a monotonic function of the spectral angle, then projected with PCA into a
+KD-tree. A query takes the `candidates` nearest points in the projection and
+re-ranks them exactly by spectral angle in the full band space. This search is
+approximate, as the true nearest spectrum may fall outside the candidates;
+with `candidates=None`, every real spectrum is compared instead, block by
+block, and the result is exact.
+"""
+
+from typing import Dict, Iterable, Iterator, Optional, Tuple
+
+import numpy as np
+from sklearn.decomposition import PCA
+from sklearn.neighbors import KDTree
+
+
+def _normalise(x: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    x = np.asarray(x, dtype=np.float32)
+    norms = np.linalg.norm(x, axis=1)
+    return x / norms[:, None].clip(min=1e-12), norms
+
+
+class SpectralIndex:
+    """Index real spectra for batched nearest-neighbour queries.
+
+    Queries are approximate unless `candidates` is `None`.
+    """
+
+    def __init__(
+        self,
+        n_components: int = 15,
+        leaf_size: int = 40,
+        candidates: Optional[int] = 16,
+    ) -> None:
+        self._pca = PCA(n_components=n_components)
+        self._leaf_size = leaf_size
+        self._candidates = candidates
+        self._unit = np.empty((0, 0), dtype=np.float32)
+        self._norms = np.empty(0, dtype=np.float32)
+        self._tree: Optional[KDTree] = None
+        self._fitted = False
+
+    def fit(self, x: np.ndarray) -> "SpectralIndex":
+        """Build the index from real spectra."""
+        self._unit, self._norms = _normalise(x=x)
+        if self._candidates is not None:
+            self._tree = KDTree(
+                self._pca.fit_transform(X=self._unit), leaf_size=self._leaf_size
+            )
+        self._fitted = True
+        return self
+
+    def query(self, x: np.ndarray, chunk_size: int = 4096) -> Dict[str, np.ndarray]:
+        """Return the nearest real spectrum to each row of `x`.
+
+        The result holds the `index` of the nearest real spectrum, the spectral
+        `angle` to it in radians, and the Euclidean `distance` to it. Unless
+        the index is exact, the nearest of the `candidates` is returned, which
+        may be farther than the true nearest spectrum.
+        """
+        if not self._fitted:
+            raise ValueError("SpectralIndex must be fitted before it is queried.")
+        x = np.asarray(x, dtype=np.float32)
+        index = np.empty(len(x), dtype=np.int64)
+        angle = np.empty(len(x), dtype=np.float32)
+        distance = np.empty(len(x), dtype=np.float32)
+        for start in range(0, len(x), chunk_size):
+            rows = slice(start, start + chunk_size)
+            index[rows], angle[rows], distance[rows] = self._query_chunk(
+                x=x[rows], chunk_size=chunk_size
+            )
+        return dict(index=index, angle=angle, distance=distance)
+
+    def _nearest(self, unit: np.ndarray, chunk_size: int) -> np.ndarray:
+        if self._tree is not None and self._candidates is not None:
+            _, neighbours = self._tree.query(
+                X=self._pca.transform(X=unit), k=min(self._candidates, len(self._unit))
+            )
+            cosines = np.einsum("ij,ikj->ik", unit, self._unit[neighbours])
+            best: np.ndarray = neighbours[np.arange(len(unit)), cosines.argmax(axis=1)]
+            return best
+        rows = np.arange(len(unit))
+        best = np.full(len(unit), -np.inf, dtype=np.float32)
+        nearest = np.zeros(len(unit), dtype=np.int64)
+        for start in range(0, len(self._unit), chunk_size):
+            cosines = unit @ self._unit[start : start + chunk_size].T
+            columns = cosines.argmax(axis=1)
+            better = cosines[rows, columns] > best
+            best[better] = cosines[rows, columns][better]
+            nearest[better] = start + columns[better]
+        return nearest
+
+    def _query_chunk(self, x: np.ndarray, chunk_size: int) -> Tuple[np.ndarray, ...]:
+        unit, norms = _normalise(x=x)
+        nearest = self._nearest(unit=unit, chunk_size=chunk_size)
+        chord = np.linalg.norm(unit.astype(np.float64) - self._unit[nearest], axis=1)
+        cosine = 1.0 - chord**2 / 2.0
+        distance = np.sqrt(
+            np.maximum(
+                norms**2
+                + self._norms[nearest] ** 2
+                - 2.0 * norms * self._norms[nearest] * cosine,
+                0.0,
+            )
+        )
+        angle = 2.0 * np.arcsin(np.clip(chord / 2.0, 0.0, 1.0))
+        return nearest, angle, distance
+
+
+def screen_batches(
+    batches: Iterable[Tuple[np.ndarray, np.ndarray]],
+    index: SpectralIndex,
+    max_angle: float,
+    max_distance: float = 0.0,
+    drop: bool = True,
+) -> Iterator[Dict[str, np.ndarray]]:
+    """Flag, or drop, generated samples that nearly copy a real spectrum.
+
+    A sample is memorised if its nearest real spectrum is within `max_angle`
+    radians or `max_distance` Euclidean distance. With an approximate `index`,
+    some memorised samples may be missed. Batches are screened as they arrive,
+    so generation can stream through this function.
+    """
+    for x, y in batches:
+        nearest = index.query(x=x)
+        memorised = (nearest["angle"] <= max_angle) | (
+            nearest["distance"] <= max_distance
+        )
+        keep = ~memorised if drop else np.ones(len(x), dtype=bool)
+        yield dict(
+            x=x[keep],
+            y=y[keep],
+            nearest_angle=nearest["angle"][keep],
+            nearest_distance=nearest["distance"][keep],
+            memorised=memorised[keep],
+        )
@@ -0,0 +1,917 @@
+# Copyright 2021 QuantumBlack Visual Analytics Limited
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES
+# OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE, AND
+# NONINFRINGEMENT. IN NO EVENT WILL THE LICENSOR OR OTHER CONTRIBUTORS
+# BE LIABLE FOR ANY CLAIM, DAMAGES, OR OTHER LIABILITY, WHETHER IN AN
+# ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF, OR IN
+# CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+#
+# The QuantumBlack Visual Analytics Limited ("QuantumBlack") name and logo
+# (either separately or in combination, "QuantumBlack Trademarks") are
+# trademarks of QuantumBlack. The License does not grant you any right or
+# license to the QuantumBlack Trademarks. You may not use the QuantumBlack
+# Trademarks or any confusingly similar mark as a trademark for your product,
+# or use the QuantumBlack Trademarks in any other manner that might cause
+# confusion in the marketplace, including but not limited to in advertising,
+# on websites, or on software.
+#
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+"""Static memory and runtime planning for pipelines.
+
+A plan is made without running any node or loading any data. The shapes and
+dtypes of the pipeline's free inputs are read from `.npy`, `.mat`, and bundle
+headers, and are propagated node by node through cost models that predict
+each node's outputs, peak memory, and runtime. Where a node's peak depends on
+a batch or chunk size, the largest size that fits the memory budget is
+recommended, and the runner is chosen from the memory and cores available.
+
+Sizes that depend on the data, such as the number of labelled pixels, are
+upper bounds, and runtimes are rough figures from nominal throughputs.
+"""
+
+import heapq
+import inspect
+import math
+import os
+import re
+from copy import copy, deepcopy
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+import fsspec
+import numpy as np
+from kedro.pipeline.node import Node
+from kedro.pipeline.pipeline import Pipeline
+from scipy.io import whosmat
+
+from hyperspec_wgan.extras.datasets.bundle import BundleDataSet
+
+BANDWIDTH = 2e9  # bytes per second streamed through memory by NumPy
+FLOPS = 2e10  # floating point operations per second of multithreaded BLAS
+IO_THROUGHPUT = 2e8  # bytes per second read from or written to a dataset
+PNG_THROUGHPUT = 5e7  # bytes per second of pixels encoded as PNG
+TSNE_COST = 2.5e-7  # seconds per sample, iteration, and tree level of t-SNE
+WORKING_MEMORY = 2**30  # bytes of scikit-learn's chunked pairwise distances
+PROCESS_OVERHEAD = 2**28  # bytes of a ParallelRunner worker before any data
+
+_MATLAB_CLASSES = dict(
+    double="float64",
+    single="float32",
+    int8="int8",
+    uint8="uint8",
+    int16="int16",
+    uint16="uint16",
+    int32="int32",
+    uint32="uint32",
+    int64="int64",
+    uint64="uint64",
+    logical="bool",
+)
+_UNITS = dict(k=2**10, m=2**20, g=2**30, t=2**40)
+
+
+class ArraySpec:
+    """Shape and dtype of an array, exact or as an upper bound."""
+
+    def __init__(self, shape: Sequence[int], dtype: Any, bound: bool = False) -> None:
+        self.shape = tuple(int(size) for size in shape)
+        self.dtype = np.dtype(dtype)
+        self.bound = bound
+
+    @property
+    def nbytes(self) -> int:
+        """Return the size of the array in bytes."""
+        return int(np.prod(self.shape, dtype=np.int64)) * int(self.dtype.itemsize)
+
+    def __repr__(self) -> str:
+        return f"ArraySpec(shape={self.shape}, dtype={self.dtype.name})"
+
+
+class Chunk:
+    """A batch or chunk size parameter that bounds a node's working memory.
+
+    `path` locates the parameter within the node's `argument` input, and
+    `working` maps a size to the node's working memory in bytes.
+    """
+
+    def __init__(
+        self,
+        path: Sequence[str],
+        value: int,
+        working: Callable[[int], float],
+        argument: str = "kwargs",
+        low: int = 64,
+    ) -> None:
+        self.path = tuple(path)
+        self.value = value
+        self.working = working
+        self.argument = argument
+        self.low = low
+
+    def fit(self, budget: float) -> int:
+        """Return the largest halving of the size whose working memory fits."""
+        value = self.value
+        while value > self.low and self.working(value) > budget:
+            value = max(value // 2, self.low)
+        return value
+
+
+class Estimate:  # pylint: disable=too-many-instance-attributes
+    """Predicted outputs, working memory, and runtime of one node.
+
+    `working` excludes the node's inputs, which the planner adds to give the
+    node's peak memory. `outputs` follows the layout of the node function's
+    return value, with `None` wherever it cannot be predicted. Nodes without a
+    cost model, or whose input sizes are unknown, are not `known`.
+    """
+
+    def __init__(  # pylint: disable=too-many-arguments
+        self,
+        outputs: Any = None,
+        working: float = 0,
+        seconds: Optional[float] = None,
+        chunk: Optional[Chunk] = None,
+        bound: bool = False,
+        notes: Sequence[str] = (),
+        known: bool = True,
+    ) -> None:
+        self.outputs = outputs
+        self.working = working
+        self.seconds = seconds
+        self.chunk = chunk
+        self.bound = bound
+        self.notes = list(notes)
+        self.known = known
+        self.peak = 0.0
+
+
+class _UnknownSize(Exception):
+    pass
+
+
+CostModel = Callable[[Dict[str, Any], Dict[str, Any], int], Estimate]
+
+
+def _known(value: Any) -> Any:
+    if value is None:
+        raise _UnknownSize
+    return value
+
+
+def _nbytes(value: Any) -> int:
+    if isinstance(value, ArraySpec):
+        return value.nbytes
+    if isinstance(value, dict):
+        return sum(_nbytes(member) for member in value.values())
+    return 0
+
+
+def _bound(value: Any) -> bool:
+    if isinstance(value, ArraySpec):
+        return value.bound
+    if isinstance(value, dict):
+        return any(_bound(member) for member in value.values())
+    return False
+
+
+def _mark_bound(value: Any) -> None:
+    if isinstance(value, ArraySpec):
+        value.bound = True
+    elif isinstance(value, dict):
+        for member in value.values():
+            _mark_bound(member)
+
+
+def _floating(dtype: np.dtype) -> np.dtype:
+    dtype = np.dtype(dtype)
+    return dtype if dtype in (np.float16, np.float32) else np.dtype(np.float64)
+
+
+def _threads(n_jobs: Optional[int], cores: int) -> int:
+    if n_jobs is None:
+        return 1
+    return cores if n_jobs < 0 else min(n_jobs, cores)
+
+
+def _n_classes(parameters: Dict[str, Any]) -> int:
+    return len(parameters["metadata"]["labels"]) - 1
+
+
+def _numpy_spec(filepath: str) -> ArraySpec:
+    with fsspec.open(filepath) as openfile:
+        version = np.lib.format.read_magic(openfile)
+        read_header = (
+            np.lib.format.read_array_header_1_0
+            if version == (1, 0)
+            else np.lib.format.read_array_header_2_0
+        )
+        shape, _, dtype = read_header(openfile)
+    return ArraySpec(shape=shape, dtype=dtype)
+
+
+def _matlab_spec(filepath: str) -> Dict[str, ArraySpec]:
+    with fsspec.open(filepath) as openfile:
+        variables = whosmat(openfile)
+    return {
+        name: ArraySpec(shape=shape, dtype=_MATLAB_CLASSES.get(matlab_class, "O"))
+        for name, shape, matlab_class in variables
+    }
+
+
+def _bundle_spec(filepath: str, config: Dict[str, Any]) -> Dict[str, ArraySpec]:
+    bundle = BundleDataSet(filepath=filepath, cache=config.get("cache")).load()
+    return {
+        key: ArraySpec(
+            shape=bundle.header(key)["shape"], dtype=bundle.header(key)["dtype"]
+        )
+        for key in bundle
+    }
+
+
+def read_spec(config: Dict[str, Any], project_path: Union[str, Path] = ".") -> Any:
+    """Read array specs from the file of a catalog entry, without its data.
+
+    Returns an `ArraySpec` for `.npy` files, a `dict` of them for `.mat` and
+    bundle files, or `None` if the entry has no readable header.
+    """
+    filepath = str(config.get("filepath", ""))
+    if "://" not in filepath and not Path(filepath).is_absolute():
+        filepath = str(Path(project_path) / filepath)
+    readers: Dict[str, Callable[[], Any]] = dict(
+        NumpyDataSet=lambda: _numpy_spec(filepath=filepath),
+        MatlabDataSet=lambda: _matlab_spec(filepath=filepath),
+        BundleDataSet=lambda: _bundle_spec(filepath=filepath, config=config),
+    )
+    reader = readers.get(str(config.get("type", "")).rsplit(".", 1)[-1])
+    if reader is None or config.get("versioned"):
+        return None
+    try:
+        return reader()
+    except (OSError, ValueError, NotImplementedError):
+        return None
+
+
+def _extract(
+    inputs: Dict[str, Any], parameters: Dict[str, Any], cores: int
+) -> Estimate:
+    # pylint: disable=unused-argument
+    variables = _known(inputs["matlab_data"])
+    return Estimate(outputs=list(variables.values())[-1], seconds=0.0)
+
+
+def _scale(inputs: Dict[str, Any], parameters: Dict[str, Any], cores: int) -> Estimate:
+    # pylint: disable=unused-argument
+    image = _known(inputs["image"])
+    output = ArraySpec(shape=image.shape, dtype=_floating(image.dtype))
+    rows = max(int(np.prod(image.shape[:-1])), 2)
+    return Estimate(
+        outputs=output,
+        working=5 * output.nbytes,
+        seconds=output.nbytes * (12 + math.log2(rows)) / BANDWIDTH,
+        notes=["all four scalers are computed before one is selected"],
+    )
+
+
+def _separate(
+    inputs: Dict[str, Any], parameters: Dict[str, Any], cores: int
+) -> Estimate:
+    # pylint: disable=unused-argument
+    image = _known(inputs["image"])
+    ground_truth = _known(inputs["ground_truth"])
+    rows, bands = int(np.prod(image.shape[:-1])), image.shape[-1]
+    outputs = dict(
+        classified_x=ArraySpec(shape=(rows, bands), dtype=image.dtype),
+        unclassified_x=ArraySpec(shape=(rows, bands), dtype=image.dtype),
+        classified_y=ArraySpec(shape=(rows,), dtype=ground_truth.dtype),
+        unclassified_y=ArraySpec(shape=(rows,), dtype=ground_truth.dtype),
+    )
+    return Estimate(
+        outputs=outputs,
+        working=image.nbytes + ground_truth.nbytes + 2 * rows,
+        seconds=2 * image.nbytes / BANDWIDTH,
+        bound=True,
+        notes=["labelled and unlabelled pixel counts are upper bounds"],
+    )
+
+
+def _split(inputs: Dict[str, Any], parameters: Dict[str, Any], cores: int) -> Estimate:
+    # pylint: disable=unused-argument
+    x, y, kwargs = _known(inputs["x"]), _known(inputs["y"]), inputs["kwargs"]
+    rows = x.shape[0]
+    train = int(math.floor(kwargs["train_ratio"] * rows))
+    test = int(
+        math.floor(
+            0.1 / (kwargs["test_ratio"] + kwargs["valid_ratio"]) * (rows - train)
+        )
+    )
+    sizes = dict(train=train, test=test, valid=rows - train - test)
+    outputs = {}
+    for name, size in sizes.items():
+        outputs[f"x_{name}"] = ArraySpec(shape=(size, *x.shape[1:]), dtype=x.dtype)
+        outputs[f"y_{name}"] = ArraySpec(shape=(size,), dtype=y.dtype)
+    rest = (rows - train) / max(rows, 1) * (x.nbytes + y.nbytes)
+    return Estimate(
+        outputs=outputs,
+        working=_nbytes(outputs) + rest,
+        seconds=3 * (x.nbytes + y.nbytes) / BANDWIDTH,
+    )
+
+
+def _fit_pca(
+    inputs: Dict[str, Any], parameters: Dict[str, Any], cores: int
+) -> Estimate:
+    # pylint: disable=unused-argument
+    x, kwargs = _known(inputs["x"]), inputs["kwargs"]["PCA_kwargs"]
+    rows, columns = x.shape
+    dtype = _floating(x.dtype)
+    components = kwargs.get("n_components")
+    if not isinstance(components, int):
+        components = min(rows, columns)
+    solver = kwargs.get("svd_solver", "auto")
+    if solver == "auto":
+        small = max(rows, columns) <= 500 or components >= 0.8 * min(rows, columns)
+        solver = "full" if small else "randomized"
+    if solver == "full":
+        working = (rows + columns) * min(rows, columns) * dtype.itemsize
+        flops = 4 * rows * columns * min(rows, columns) + 8 * min(rows, columns) ** 3
+    else:
+        iterations = 7 if components < 0.1 * min(rows, columns) else 4
+        working = 3 * rows * (components + 10) * dtype.itemsize
+        flops = 2 * (2 * iterations + 2) * rows * columns * (components + 10)
+    outputs = dict(
+        x=ArraySpec(shape=(rows, components), dtype=dtype),
+        variance=ArraySpec(shape=(components,), dtype=dtype),
+    )
+    return Estimate(
+        outputs=outputs,
+        working=rows * columns * dtype.itemsize + working + _nbytes(outputs),
+        seconds=flops / FLOPS,
+    )
+
+
+def _fit_tsne(
+    inputs: Dict[str, Any], parameters: Dict[str, Any], cores: int
+) -> Estimate:
+    # pylint: disable=unused-argument
+    x, kwargs = _known(inputs["x"]), inputs["kwargs"]["TSNE_kwargs"]
+    rows, columns = x.shape
+    components = kwargs.get("n_components", 2)
+    iterations = kwargs.get("n_iter", kwargs.get("max_iter", 1000))
+    threads = _threads(n_jobs=kwargs.get("n_jobs"), cores=cores)
+    output = ArraySpec(shape=(rows, components), dtype=np.float32)
+    initialisation = rows * columns * 8
+    optimisation = 4 * rows * components * 8
+    if kwargs.get("method", "barnes_hut") == "exact":
+        return Estimate(
+            outputs=output,
+            working=initialisation + 3 * rows * rows * 8 + optimisation,
+            seconds=(2 * rows * rows * columns + 20 * iterations * rows * rows) / FLOPS,
+        )
+    neighbours = min(rows - 1, int(3 * kwargs.get("perplexity", 30.0) + 1))
+    return Estimate(
+        outputs=output,
+        working=initialisation
+        + min(rows * rows * 8, WORKING_MEMORY)
+        + 5 * rows * neighbours * 8
+        + optimisation,
+        seconds=2 * rows * rows * columns / FLOPS
+        + TSNE_COST * iterations * rows * math.log2(max(rows, 2)) / threads,
+    )
+
+
+def _generate(
+    inputs: Dict[str, Any], parameters: Dict[str, Any], cores: int
+) -> Estimate:
+    # pylint: disable=unused-argument
+    real, kwargs = _known(inputs["real"]), inputs["kwargs"]
+    bands = real["x_train"].shape[1]
+    samples = _n_classes(parameters=parameters) * kwargs["samples_per_class"]
+    generator = parameters["train_gan"]["Generator_kwargs"]
+    widths = [2 * generator["latent_dim"], *generator["hidden_dims"], bands]
+    outputs = dict(
+        x=ArraySpec(shape=(samples, bands), dtype=np.float32),
+        y=ArraySpec(shape=(samples,), dtype=real["y_train"].dtype),
+    )
+    return Estimate(
+        outputs=outputs,
+        seconds=samples * 2 * sum(a * b for a, b in zip(widths, widths[1:])) / FLOPS,
+        chunk=Chunk(
+            path=("batch_size",),
+            value=kwargs["batch_size"],
+            working=lambda size: 2 * _nbytes(outputs) + size * 8 * sum(widths),
+        ),
+    )
+
+
+def _classify_image(
+    inputs: Dict[str, Any], parameters: Dict[str, Any], cores: int
+) -> Estimate:
+    # pylint: disable=unused-argument
+    image, kwargs = _known(inputs["image"]), inputs["kwargs"]
+    pixels, bands = int(np.prod(image.shape[:-1])), image.shape[-1]
+    classifier = parameters["train_classifier"]["Classifier_kwargs"]
+    channels = [1, *classifier["channels"]]
+    activations = sum(
+        channel * bands / 2**layer for layer, channel in enumerate(channels)
+    )
+    flops = sum(
+        2 * classifier["kernel_size"] * a * b * bands / 2**layer
+        for layer, (a, b) in enumerate(zip(channels, channels[1:]))
+    )
+    return Estimate(
+        outputs=ArraySpec(shape=image.shape[:-1], dtype=np.uint8),
+        seconds=4 * pixels * flops / FLOPS,
+        chunk=Chunk(
+            path=("batch_size",),
+            value=kwargs["batch_size"],
+            working=lambda size: pixels + size * 4 * (bands + 3 * activations),
+        ),
+    )
+
+
+def _build_spectral_index(
+    inputs: Dict[str, Any], parameters: Dict[str, Any], cores: int
+) -> Estimate:
+    # pylint: disable=unused-argument
+    rows, bands = _known(inputs["real"])["x_train"].shape
+    kwargs = inputs["kwargs"]["SpectralIndex_kwargs"]
+    outputs = dict(
+        unit=ArraySpec(shape=(rows, bands), dtype=np.float32),
+        norms=ArraySpec(shape=(rows,), dtype=np.float32),
+    )
+    if kwargs.get("candidates", 16) is None:
+        return Estimate(outputs=outputs, working=_nbytes(outputs), seconds=0.0)
+    components = kwargs.get("n_components", 15)
+    return Estimate(
+        outputs=outputs,
+        working=_nbytes(outputs) + 3 * rows * (components + 10) * 8,
+        seconds=20 * rows * bands * (components + 10) / FLOPS,
+    )
+
+
+def _screen_samples(
+    inputs: Dict[str, Any], parameters: Dict[str, Any], cores: int
+) -> Estimate:
+    # pylint: disable=unused-argument
+    synthetic, kwargs = _known(inputs["synthetic"]), inputs["kwargs"]
+    samples, bands = synthetic["x"].shape
+    candidates = parameters["build_spectral_index"]["SpectralIndex_kwargs"].get(
+        "candidates", 16
+    )
+    if candidates is None:
+        real = _known(inputs["index"])["unit"].shape[0]
+        block = min(real, 4096)
+        seconds = 2 * samples * real * bands / FLOPS
+        per_sample = 2 * block * 4 + 4 * bands * 8
+    else:
+        seconds = 8 * samples * (candidates + 15) * bands * 2 / FLOPS
+        per_sample = (candidates + 4) * bands * 8
+    outputs = dict(
+        deepcopy(synthetic),
+        nearest_angle=ArraySpec(shape=(samples,), dtype=np.float32),
+        nearest_distance=ArraySpec(shape=(samples,), dtype=np.float32),
+        memorised=ArraySpec(shape=(samples,), dtype=bool),
+    )
+    _mark_bound(outputs)
+    return Estimate(
+        outputs=outputs,
+        seconds=seconds,
+        chunk=Chunk(
+            path=("batch_size",),
+            value=kwargs["batch_size"],
+            working=lambda size: size * per_sample,
+        ),
+    )
+
+
+def _evaluate_samples(
+    inputs: Dict[str, Any], parameters: Dict[str, Any], cores: int
+) -> Estimate:
+    real, synthetic = _known(inputs["real"]), _known(inputs["synthetic"])
+    kwargs = inputs["kwargs"]["score_samples_kwargs"]
+    bands = synthetic["x"].shape[1]
+    classes = _n_classes(parameters=parameters)
+    largest = max(
+        real[f'x_{inputs["kwargs"]["split"]}'].shape[0], synthetic["x"].shape[0]
+    )
+    samples = min(kwargs.get("max_samples", 2000), largest)
+    threads = _threads(n_jobs=kwargs.get("n_jobs", -1), cores=cores)
+    return Estimate(
+        outputs=None,
+        seconds=classes * 8 * samples * samples * bands * 2 / FLOPS,
+        chunk=Chunk(
+            path=("score_samples_kwargs", "chunk_size"),
+            value=kwargs.get("chunk_size", 1024),
+            working=lambda size: 4 * samples * bands * 8
+            + threads * 3 * size * size * 8,
+        ),
+    )
+
+
+def _pyramid_working(height: int, width: int, tile_size: int) -> float:
+    levels = max(math.ceil(math.log2(max(height, width, 1) / tile_size)), 0) + 1
+    return levels * 4 * tile_size * tile_size * 3 * 4
+
+
+def _render_false_colour(
+    inputs: Dict[str, Any], parameters: Dict[str, Any], cores: int
+) -> Estimate:
+    # pylint: disable=unused-argument
+    image = _known(inputs["image"])
+    kwargs = inputs["kwargs"]["false_colour_pyramid_kwargs"]
+    height, width = image.shape[:2]
+    tile_size = kwargs.get("tile_size", 256)
+    return Estimate(
+        working=kwargs.get("max_samples", 10**6) * 3 * 8 * 2
+        + _pyramid_working(height=height, width=width, tile_size=tile_size),
+        seconds=height * width * 3 * (16 / BANDWIDTH + 4 / 3 / PNG_THROUGHPUT),
+    )
+
+
+def _render_label_map(
+    inputs: Dict[str, Any], parameters: Dict[str, Any], cores: int
+) -> Estimate:
+    # pylint: disable=unused-argument
+    labels = _known(inputs["labels"])
+    kwargs = inputs["kwargs"]["label_pyramid_kwargs"]
+    height, width = labels.shape[:2]
+    return Estimate(
+        working=_pyramid_working(
+            height=height, width=width, tile_size=kwargs.get("tile_size", 256)
+        ),
+        seconds=height * width * 3 * (8 / BANDWIDTH + 4 / 3 / PNG_THROUGHPUT),
+    )
+
+
+COST_MODELS: Dict[str, CostModel] = dict(
+    extract=_extract,
+    scale=_scale,
+    separate=_separate,
+    split=_split,
+    fit_pca=_fit_pca,
+    fit_tsne=_fit_tsne,
+    generate=_generate,
+    classify_image=_classify_image,
+    build_spectral_index=_build_spectral_index,
+    screen_samples=_screen_samples,
+    evaluate_samples=_evaluate_samples,
+    render_false_colour=_render_false_colour,
+    render_label_map=_render_label_map,
+)
+
+
+def _node_inputs(node: Node) -> Dict[str, str]:
+    # Dict inputs name their arguments; other inputs bind to them by position.
+    inputs = node._inputs  # pylint: disable=protected-access
+    if isinstance(inputs, dict):
+        return dict(inputs)
+    bound = inspect.signature(node.func).bind(*node.inputs).arguments
+    arguments: Dict[str, str] = {}
+    for argument, value in bound.items():
+        if isinstance(value, tuple):
+            arguments.update(
+                (f"{argument}[{index}]", name) for index, name in enumerate(value)
+            )
+        else:
+            arguments[argument] = value
+    return arguments
+
+
+def _node_outputs(node: Node, outputs: Any) -> Dict[str, Any]:
+    if outputs is None:
+        return dict.fromkeys(node.outputs)
+    # Let Kedro map the predicted return value to datasets, as for a real run.
+    predictor = copy(node)
+    predictor.func = lambda *args, **kwargs: outputs
+    return predictor.run(inputs=dict.fromkeys(node.inputs))
+
+
+def _parameter(name: str, parameters: Dict[str, Any]) -> Any:
+    if name == "parameters":
+        return parameters
+    return parameters.get(name[len("params:") :])
+
+
+def _set_path(value: Dict[str, Any], path: Sequence[str], size: int) -> Dict[str, Any]:
+    value = deepcopy(value)
+    target = value
+    for key in path[:-1]:
+        target = target[key]
+    target[path[-1]] = size
+    return value
+
+
+def available_memory() -> int:
+    """Return the memory available to this process in bytes.
+
+    Container limits from cgroups are taken into account, as these are what
+    trigger the OOM killer in production.
+    """
+    available = os.sysconf("SC_AVPHYS_PAGES") * os.sysconf("SC_PAGE_SIZE")
+    try:
+        with open("/proc/meminfo", encoding="utf-8") as meminfo:
+            for line in meminfo:
+                if line.startswith("MemAvailable:"):
+                    available = int(line.split()[1]) * 2**10
+    except OSError:
+        pass
+    for limit_path, usage_path in [
+        ("/sys/fs/cgroup/memory.max", "/sys/fs/cgroup/memory.current"),
+        (
+            "/sys/fs/cgroup/memory/memory.limit_in_bytes",
+            "/sys/fs/cgroup/memory/memory.usage_in_bytes",
+        ),
+    ]:
+        try:
+            limit = Path(limit_path).read_text(encoding="utf-8").strip()
+            usage = int(Path(usage_path).read_text(encoding="utf-8").strip())
+        except (OSError, ValueError):
+            continue
+        if limit.isdigit():
+            available = min(available, int(limit) - usage)
+        break
+    return max(available, 0)
+
+
+def available_cores() -> int:
+    """Return the number of cores available to this process."""
+    cores = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else 0
+    cores = cores or os.cpu_count() or 1
+    try:
+        quota, period = (
+            Path("/sys/fs/cgroup/cpu.max").read_text(encoding="utf-8").split()
+        )
+        if quota != "max":
+            cores = min(cores, max(math.ceil(int(quota) / int(period)), 1))
+    except (OSError, ValueError):
+        pass
+    return cores
+
+
+def parse_size(size: str) -> int:
+    """Parse a size such as `"512M"` or `"16GiB"` into bytes."""
+    match = re.fullmatch(r"\s*(\d+(?:\.\d+)?)\s*([kmgt]?)(?:i?b)?\s*", size.lower())
+    if match is None:
+        raise ValueError(f"Invalid size '{size}'.")
+    number, unit = match.groups()
+    return int(float(number) * _UNITS.get(unit, 1))
+
+
+def _format_bytes(size: float) -> str:
+    for unit in ["B", "KiB", "MiB", "GiB"]:
+        if size < 1024:
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} TiB"
+
+
+def _format_seconds(seconds: Optional[float]) -> str:
+    if seconds is None:
+        return "?"
+    if seconds < 1:
+        return "<1 s"
+    if seconds < 60:
+        return f"{seconds:.0f} s"
+    if seconds < 3600:
+        return f"{seconds / 60:.1f} min"
+    return f"{seconds / 3600:.1f} h"
+
+
+def _makespan(seconds: List[float], workers: int) -> float:
+    finish = [0.0] * workers
+    for duration in sorted(seconds, reverse=True):
+        heapq.heapreplace(finish, finish[0] + duration)
+    return max(finish)
+
+
+class Plan:  # pylint: disable=too-many-instance-attributes
+    """Predicted peak memory and runtime of every node of a pipeline.
+
+    Nodes whose estimate is not known are reported as unknown; only their
+    inputs count towards the predicted peak memory.
+    """
+
+    def __init__(  # pylint: disable=too-many-arguments
+        self,
+        estimates: Dict[str, Estimate],
+        memory: int,
+        cores: int,
+        budget: float,
+        runner: str,
+        runner_kwargs: Dict[str, Any],
+        parameters: Dict[str, Any],
+        changes: List[Tuple[str, int, int]],
+    ) -> None:
+        self.estimates = estimates
+        self.memory = memory
+        self.cores = cores
+        self.budget = budget
+        self.runner = runner
+        self.runner_kwargs = runner_kwargs
+        self.parameters = parameters
+        self.changes = changes
+
+    @property
+    def peak(self) -> float:
+        """Return the predicted peak memory of a sequential run in bytes."""
+        return max((estimate.peak for estimate in self.estimates.values()), default=0)
+
+    @property
+    def seconds(self) -> float:
+        """Return the predicted runtime of a sequential run in seconds."""
+        return sum(estimate.seconds or 0.0 for estimate in self.estimates.values())
+
+    def report(self) -> str:
+        """Format the plan as a table of nodes followed by recommendations."""
+        width = max([len(name) for name in self.estimates] + [4])
+        lines = [f"{'Node':<{width}}  {'Peak memory':>12}  {'Runtime':>8}  Notes"]
+        for name, estimate in self.estimates.items():
+            peak = ("<= " if estimate.bound else "") + _format_bytes(estimate.peak)
+            if not estimate.known:
+                peak = "unknown"
+            notes = list(estimate.notes)
+            if estimate.peak > self.budget:
+                notes.insert(0, "EXCEEDS BUDGET")
+            lines.append(
+                f"{name:<{width}}  {peak:>12}  "
+                f"{_format_seconds(estimate.seconds):>8}  {'; '.join(notes)}"
+            )
+        lines += [
+            "",
+            f"Predicted peak memory: {_format_bytes(self.peak)} "
+            f"(budget {_format_bytes(self.budget)} of "
+            f"{_format_bytes(self.memory)} available)",
+            f"Predicted runtime: {_format_seconds(self.seconds)} (sequential)",
+            f"Recommended runner: {self.runner}"
+            + "".join(f", {key}={value}" for key, value in self.runner_kwargs.items())
+            + f" ({self.cores} cores)",
+        ]
+        unknown = [
+            name for name, estimate in self.estimates.items() if not estimate.known
+        ]
+        if unknown:
+            lines.append(f"Unknown peak memory and runtime: {', '.join(unknown)}")
+        if self.changes:
+            lines.append("Recommended parameters:")
+            lines += [f"  {key}: {old} -> {new}" for key, old, new in self.changes]
+        return "\n".join(lines)
+
+
+def _recommend_runner(
+    pipeline: Pipeline,
+    estimates: Dict[str, Estimate],
+    budget: float,
+    cores: int,
+    spawning: bool,
+) -> Tuple[str, Dict[str, Any]]:
+    layers = [
+        [estimates[node.name] for node in layer] for layer in pipeline.grouped_nodes
+    ]
+    workers = min(cores, max((len(layer) for layer in layers), default=1))
+
+    def fits(workers: int) -> bool:
+        return all(
+            sum(heapq.nlargest(workers, [estimate.peak for estimate in layer]))
+            + workers * PROCESS_OVERHEAD
+            <= budget
+            for layer in layers
+        )
+
+    while workers > 1 and not fits(workers):
+        workers -= 1
+    if workers < 2 or spawning:
+        return "SequentialRunner", {}
+    durations = [[estimate.seconds or 0.0 for estimate in layer] for layer in layers]
+    sequential = sum(sum(layer) for layer in durations)
+    parallel = sum(_makespan(layer, workers=workers) for layer in durations)
+    if parallel >= 0.9 * sequential:
+        return "SequentialRunner", {}
+    return "ParallelRunner", dict(max_workers=workers)
+
+
+def plan_pipeline(  # pylint: disable=too-many-arguments,too-many-locals
+    pipeline: Pipeline,
+    catalog: Dict[str, Dict[str, Any]],
+    parameters: Dict[str, Any],
+    memory: int,
+    cores: int,
+    memory_fraction: float = 0.8,
+    project_path: Union[str, Path] = ".",
+) -> Plan:
+    """Plan a run of `pipeline` with the catalog configuration `catalog`.
+
+    Nodes whose peak memory depends on a batch or chunk size get the largest
+    halving of the configured size that fits within `memory_fraction` of
+    `memory`. The recommended values are collected in `Plan.parameters`,
+    ready to be passed to a run as extra parameters.
+    """
+    budget = memory * memory_fraction
+    specs: Dict[str, Any] = {
+        name: read_spec(config=catalog[name], project_path=project_path)
+        for name in pipeline.inputs()
+        if name in catalog
+    }
+    consumers = {
+        name: sum(name in node.inputs for node in pipeline.nodes)
+        for name in pipeline.all_outputs()
+    }
+    overrides: Dict[str, Any] = {}
+    changes: List[Tuple[str, int, int]] = []
+    estimates: Dict[str, Estimate] = {}
+    spawning = False
+    for node in pipeline.nodes:
+        arguments = _node_inputs(node=node)
+        inputs = {
+            argument: _parameter(name=name, parameters=parameters)
+            if name.startswith("params:") or name == "parameters"
+            else specs.get(name)
+            for argument, name in arguments.items()
+        }
+        spawning = spawning or any(
+            isinstance(value, dict) and value.get("world_size", 1) > 1
+            for value in inputs.values()
+        )
+        loaded = sum(
+            _nbytes(specs.get(name)) for name in arguments.values() if name in specs
+        )
+        resident = sum(
+            _nbytes(specs.get(name))
+            for name in specs
+            if name not in catalog and name not in node.inputs and consumers.get(name)
+        )
+        cost_model = COST_MODELS.get(getattr(node.func, "__name__", ""))
+        try:
+            if cost_model is None:
+                raise _UnknownSize
+            estimate = cost_model(inputs, parameters, cores)
+        except _UnknownSize:
+            estimate = Estimate(
+                notes=[
+                    "no cost model" if cost_model is None else "input sizes unknown"
+                ],
+                known=False,
+            )
+        chunk = estimate.chunk
+        if chunk is not None:
+            size = chunk.fit(budget=budget - loaded - resident)
+            estimate.working = chunk.working(size)
+            name = arguments[chunk.argument][len("params:") :]
+            if size != chunk.value:
+                overrides[name] = _set_path(
+                    value=overrides.get(name, parameters[name]),
+                    path=chunk.path,
+                    size=size,
+                )
+                changes.append((".".join([name, *chunk.path]), chunk.value, size))
+        estimate.bound = estimate.bound or any(
+            _bound(value) for value in inputs.values()
+        )
+        estimate.peak = loaded + resident + estimate.working
+        if estimate.seconds is not None:
+            estimate.seconds += (
+                sum(
+                    _nbytes(specs.get(name))
+                    for name in arguments.values()
+                    if name in catalog
+                )
+                / IO_THROUGHPUT
+            )
+        outputs = _node_outputs(node=node, outputs=estimate.outputs)
+        for name, value in outputs.items():
+            if estimate.bound:
+                _mark_bound(value)
+            specs[name] = value
+            if name in catalog and estimate.seconds is not None:
+                estimate.seconds += _nbytes(value) / IO_THROUGHPUT
+        for name in node.inputs:
+            if name in consumers:
+                consumers[name] -= 1
+        estimates[node.name] = estimate
+    runner, runner_kwargs = _recommend_runner(
+        pipeline=pipeline,
+        estimates=estimates,
+        budget=budget,
+        cores=cores,
+        spawning=spawning,
+    )
+    return Plan(
+        estimates=estimates,
+        memory=memory,
+        cores=cores,
+        budget=budget,
+        runner=runner,
+        runner_kwargs=runner_kwargs,
+        parameters=overrides,
+        changes=changes,
+    )
@@ -0,0 +1,241 @@
+# Copyright 2021 QuantumBlack Visual Analytics Limited
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES
+# OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE, AND
+# NONINFRINGEMENT. IN NO EVENT WILL THE LICENSOR OR OTHER CONTRIBUTORS
+# BE LIABLE FOR ANY CLAIM, DAMAGES, OR OTHER LIABILITY, WHETHER IN AN
+# ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF, OR IN
+# CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+#
+# The QuantumBlack Visual Analytics Limited ("QuantumBlack") name and logo
+# (either separately or in combination, "QuantumBlack Trademarks") are
+# trademarks of QuantumBlack. The License does not grant you any right or
+# license to the QuantumBlack Trademarks. You may not use the QuantumBlack
+# Trademarks or any confusingly similar mark as a trademark for your product,
+# or use the QuantumBlack Trademarks in any other manner that might cause
+# confusion in the marketplace, including but not limited to in advertising,
+# on websites, or on software.
+#
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Class-balanced mini-batch sampling from real and synthetic spectra.
+
+Real and synthetic samples share one index space: indices below the number of
+real samples address the real arrays and the remaining indices address the
+synthetic arrays. `MixedBatchSampler` draws whole batches of such indices and
+`MixedDataset` gathers them, so neither array is ever concatenated or copied.
+
+Example::
+
+    dataset = MixedDataset(x_real=bundle["x_train"], y_real=bundle["y_train"],
+                           x_synthetic=synthetic["x"], y_synthetic=synthetic["y"])
+    sampler = MixedBatchSampler(y_real=bundle["y_train"],
+                                y_synthetic=synthetic["y"], synthetic_ratio=0.5)
+    loader = DataLoader(dataset, sampler=sampler, batch_size=None, num_workers=4)
+"""
+
+import mmap
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple, Union
+
+import numpy as np
+import torch
+from torch.utils.data import Dataset, Sampler
+
+Transform = Callable[[np.ndarray, np.ndarray], Tuple[np.ndarray, np.ndarray]]
+
+
+def _class_index(
+    y: np.ndarray, classes: np.ndarray, offset: int
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    order = np.argsort(y, kind="stable")
+    start = np.searchsorted(y[order], classes, side="left")
+    stop = np.searchsorted(y[order], classes, side="right")
+    return order + offset, start, stop - start
+
+
+def _stream_index(
+    y_real: np.ndarray, y_synthetic: np.ndarray, classes: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    real_order, real_start, real_count = _class_index(
+        y=y_real, classes=classes, offset=0
+    )
+    synthetic_order, synthetic_start, synthetic_count = _class_index(
+        y=y_synthetic.astype(y_real.dtype), classes=classes, offset=len(y_real)
+    )
+    return (
+        np.concatenate([real_order, synthetic_order]),
+        np.stack([real_start, synthetic_start + len(y_real)]),
+        np.stack([real_count, synthetic_count]),
+    )
+
+
+class MixedBatchSampler(
+    Sampler[np.ndarray]
+):  # pylint: disable=too-many-instance-attributes
+    """Yield batches of indices into real and synthetic samples.
+
+    Each sample's class is drawn from `class_weights`, which is `"balanced"`
+    (equal weights), `"proportional"` (real class frequencies), or a mapping
+    from class label to weight, with unlisted classes weighted 1. The sample
+    is then synthetic with probability `synthetic_ratio`, given either once
+    for all classes or per class label. Batches depend only on `seed` and the
+    epoch set with `set_epoch`.
+
+    For data-parallel training, each of `world_size` ranks draws its own
+    stream of `batch_size // world_size` samples per batch, so the global
+    batch size and the number of batches per epoch stay the same. `batch_size`
+    must be divisible by `world_size`.
+    """
+
+    def __init__(  # pylint: disable=super-init-not-called,too-many-arguments
+        self,
+        y_real: np.ndarray,
+        y_synthetic: Optional[np.ndarray] = None,
+        batch_size: int = 64,
+        num_batches: Optional[int] = None,
+        synthetic_ratio: Union[float, Dict[int, float]] = 0.0,
+        class_weights: Union[str, Dict[int, float]] = "balanced",
+        seed: int = 42,
+        rank: int = 0,
+        world_size: int = 1,
+    ) -> None:
+        y_real = np.asarray(y_real)
+        y_synthetic = np.asarray(y_synthetic if y_synthetic is not None else [])
+        self._classes = np.unique(y_real)
+        self._order, self._start, self._count = _stream_index(
+            y_real=y_real, y_synthetic=y_synthetic, classes=self._classes
+        )
+
+        if isinstance(class_weights, dict):
+            weights = np.array([class_weights.get(c, 1.0) for c in self._classes])
+        elif class_weights == "balanced":
+            weights = np.ones(len(self._classes))
+        elif class_weights == "proportional":
+            weights = self._count[0].astype(np.float64)
+        else:
+            raise ValueError(f"Unknown class_weights '{class_weights}'.")
+        self._weights = weights / weights.sum()
+
+        if isinstance(synthetic_ratio, dict):
+            ratios = np.array([synthetic_ratio.get(c, 0.0) for c in self._classes])
+        else:
+            ratios = np.full(len(self._classes), synthetic_ratio)
+        self._ratios = np.where(self._count[1] > 0, ratios, 0.0)
+
+        if batch_size % world_size:
+            raise ValueError(
+                f"batch_size {batch_size} is not divisible by world_size "
+                f"{world_size}."
+            )
+        self._batch_size = batch_size // world_size
+        self._num_batches = num_batches or -(-len(y_real) // batch_size)
+        self._seed = seed
+        self._rank = rank
+        self._epoch = 0
+
+    def set_epoch(self, epoch: int) -> None:
+        """Set the epoch used to seed the next pass over the sampler."""
+        self._epoch = epoch
+
+    def __len__(self) -> int:
+        return self._num_batches
+
+    def __iter__(self) -> Iterator[np.ndarray]:
+        rng = np.random.default_rng([self._seed, self._epoch, self._rank])
+        for _ in range(self._num_batches):
+            yield self._sample(rng=rng)
+
+    def _sample(self, rng: np.random.Generator) -> np.ndarray:
+        classes = rng.choice(len(self._classes), size=self._batch_size, p=self._weights)
+        source = (rng.random(self._batch_size) < self._ratios[classes]).astype(int)
+        start = self._start[source, classes]
+        count = self._count[source, classes]
+        offset = (rng.random(self._batch_size) * count).astype(np.int64)
+        return np.sort(self._order[start + offset])
+
+
+def _share(array: np.ndarray) -> Any:
+    if isinstance(array, np.memmap) and isinstance(array.base, mmap.mmap):
+        return ("memmap", array.filename, array.dtype, array.shape, array.offset)
+    return array
+
+
+def _unshare(state: Any) -> np.ndarray:
+    if isinstance(state, tuple) and state[0] == "memmap":
+        _, filename, dtype, shape, offset = state
+        return np.memmap(filename, dtype=dtype, mode="r", offset=offset, shape=shape)
+    array: np.ndarray = state
+    return array
+
+
+class MixedDataset(Dataset[Tuple[torch.Tensor, torch.Tensor]]):
+    """Gather batches of real and synthetic samples by index.
+
+    Memory-mapped arrays are reopened rather than copied when the dataset is
+    pickled for DataLoader worker processes.
+    """
+
+    _ARRAYS = ("_x_real", "_y_real", "_x_synthetic", "_y_synthetic")
+
+    def __init__(
+        self,
+        x_real: np.ndarray,
+        y_real: np.ndarray,
+        x_synthetic: Optional[np.ndarray] = None,
+        y_synthetic: Optional[np.ndarray] = None,
+        transform: Optional[Transform] = None,
+    ) -> None:
+        self._x_real = x_real
+        self._y_real = y_real
+        self._x_synthetic = (
+            x_synthetic
+            if x_synthetic is not None
+            else np.empty((0, x_real.shape[1]), dtype=np.float32)
+        )
+        self._y_synthetic = (
+            y_synthetic if y_synthetic is not None else np.empty(0, dtype=np.int64)
+        )
+        self._transform = transform
+
+    def set_epoch(self, epoch: int) -> None:
+        """Pass the epoch on to the transform, if it is seeded per epoch."""
+        set_epoch = getattr(self._transform, "set_epoch", None)
+        if set_epoch is not None:
+            set_epoch(epoch)
+
+    def __len__(self) -> int:
+        return len(self._y_real) + len(self._y_synthetic)
+
+    def __getitem__(self, indices: np.ndarray) -> Tuple[torch.Tensor, torch.Tensor]:
+        indices = np.asarray(indices)
+        real = indices < len(self._y_real)
+        x = np.empty((len(indices), self._x_real.shape[1]), dtype=np.float32)
+        y = np.empty(len(indices), dtype=np.int64)
+        x[real] = self._x_real[indices[real]]
+        y[real] = self._y_real[indices[real]]
+        if not real.all():
+            synthetic = indices[~real] - len(self._y_real)
+            x[~real] = self._x_synthetic[synthetic]
+            y[~real] = self._y_synthetic[synthetic]
+        if self._transform is not None:
+            x, y = self._transform(x, y)
+        return torch.from_numpy(x), torch.from_numpy(y)
+
+    def __getstate__(self) -> Dict[str, Any]:
+        state = dict(self.__dict__)
+        for name in self._ARRAYS:
+            state[name] = _share(array=state[name])
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        for name in self._ARRAYS:
+            state[name] = _unshare(state=state[name])
+        self.__dict__.update(state)
@@ -0,0 +1,360 @@
+# Copyright 2021 QuantumBlack Visual Analytics Limited
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES
+# OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE, AND
+# NONINFRINGEMENT. IN NO EVENT WILL THE LICENSOR OR OTHER CONTRIBUTORS
+# BE LIABLE FOR ANY CLAIM, DAMAGES, OR OTHER LIABILITY, WHETHER IN AN
+# ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF, OR IN
+# CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+#
+# The QuantumBlack Visual Analytics Limited ("QuantumBlack") name and logo
+# (either separately or in combination, "QuantumBlack Trademarks") are
+# trademarks of QuantumBlack. The License does not grant you any right or
+# license to the QuantumBlack Trademarks. You may not use the QuantumBlack
+# Trademarks or any confusingly similar mark as a trademark for your product,
+# or use the QuantumBlack Trademarks in any other manner that might cause
+# confusion in the marketplace, including but not limited to in advertising,
+# on websites, or on software.
+#
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Local HTTP service generating synthetic spectra on demand.
+
+Requests for `count` spectra of a class are queued and coalesced into
+micro-batches: the first queued request opens a batch that collects further
+requests until `max_delay` seconds pass or `max_batch_size` spectra are
+queued. A request that would overflow the batch opens the next one instead,
+and a single request larger than `max_batch_size` runs in several forward
+passes of at most `max_batch_size` spectra each.
+
+Request bodies are never read, so the connection is closed after any request
+that is not a GET without a body. Endpoints::
+
+    GET /generate?class=<label>&count=<count>  spectra as a .npy float32 array
+    GET /metrics                               queue depth and latency as JSON
+"""
+
+import asyncio
+import collections
+import io
+import json
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Deque, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+import numpy as np
+import torch
+from torch import nn
+
+logger = logging.getLogger(__name__)
+
+_REASONS = {
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    431: "Request Header Fields Too Large",
+    500: "Internal Server Error",
+}
+
+
+class _Request:
+    def __init__(self, label: int, count: int) -> None:
+        self.label = label
+        self.count = count
+        self.queued = time.perf_counter()
+        self.future: "asyncio.Future[np.ndarray]" = (
+            asyncio.get_running_loop().create_future()
+        )
+
+
+class MicroBatcher:  # pylint: disable=too-many-instance-attributes
+    """Coalesce generation requests into batches for a `NoiseSampler`.
+
+    `sampler` maps zero-based class labels to spectra, as the exported
+    generators do. Forward passes run one at a time in a worker thread, so the
+    event loop keeps accepting requests while a batch is generated.
+    """
+
+    def __init__(
+        self,
+        sampler: nn.Module,
+        max_batch_size: int = 4096,
+        max_delay: float = 0.005,
+        window: int = 10000,
+    ) -> None:
+        self._sampler = sampler
+        self._max_batch_size = max_batch_size
+        self._max_delay = max_delay
+        self._queue: Deque[_Request] = collections.deque()
+        self._ready = asyncio.Event()
+        self._executor = ThreadPoolExecutor(max_workers=1)
+        self._latencies: Deque[float] = collections.deque(maxlen=window)
+        self._queued_samples = 0
+        self._requests = 0
+        self._batches = 0
+        self._samples = 0
+
+    async def generate(self, label: int, count: int) -> np.ndarray:
+        """Return `count` spectra of class `label`, once their batch has run."""
+        request = _Request(label=label, count=count)
+        self._queued_samples += count
+        self._queue.append(request)
+        self._ready.set()
+        return await request.future
+
+    async def _wait(self, timeout: Optional[float] = None) -> bool:
+        """Wait until a request is queued; return False after `timeout`."""
+        while not self._queue:
+            self._ready.clear()
+            try:
+                await asyncio.wait_for(self._ready.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                return False
+        return True
+
+    async def _collect(self) -> List[_Request]:
+        await self._wait()
+        batch = [self._queue.popleft()]
+        size = batch[0].count
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self._max_delay
+        while size < self._max_batch_size:
+            timeout = deadline - loop.time()
+            if timeout <= 0 or not await self._wait(timeout=timeout):
+                break
+            if size + self._queue[0].count > self._max_batch_size:
+                break
+            request = self._queue.popleft()
+            batch.append(request)
+            size += request.count
+        return batch
+
+    def _forward(self, labels: np.ndarray) -> np.ndarray:
+        step = self._max_batch_size
+        with torch.no_grad():
+            parts = [
+                self._sampler(torch.from_numpy(labels[start : start + step])).numpy()
+                for start in range(0, len(labels), step)
+            ]
+        return np.concatenate(parts)
+
+    async def run(self) -> None:
+        """Serve queued requests batch by batch until cancelled."""
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect()
+            counts = [request.count for request in batch]
+            labels = np.repeat([request.label for request in batch], counts)
+            self._queued_samples -= len(labels)
+            try:
+                x = await loop.run_in_executor(self._executor, self._forward, labels)
+            except Exception as error:  # pylint: disable=broad-except
+                logger.exception("Generation failed for a batch of %d", len(labels))
+                for request in batch:
+                    if not request.future.done():
+                        request.future.set_exception(error)
+                continue
+            finished = time.perf_counter()
+            for request, part in zip(batch, np.split(x, np.cumsum(counts)[:-1])):
+                if not request.future.done():
+                    request.future.set_result(part)
+                self._latencies.append(finished - request.queued)
+            self._requests += len(batch)
+            self._batches += 1
+            self._samples += len(labels)
+
+    def metrics(self) -> Dict[str, Any]:
+        """Return queue depth, batching, and latency statistics."""
+        latencies = np.array(self._latencies) * 1000.0
+        percentiles = (
+            np.percentile(latencies, [50, 90, 99]) if len(latencies) else [0.0] * 3
+        )
+        return dict(
+            queue_depth=len(self._queue),
+            queued_samples=self._queued_samples,
+            requests=self._requests,
+            batches=self._batches,
+            mean_batch_size=self._samples / self._batches if self._batches else 0.0,
+            latency_ms=dict(zip(["p50", "p90", "p99"], map(float, percentiles))),
+        )
+
+    def close(self) -> None:
+        """Stop the worker thread."""
+        self._executor.shutdown(wait=False)
+
+
+def _npy_header(shape: Tuple[int, ...], dtype: np.dtype) -> bytes:
+    buffer = io.BytesIO()
+    np.lib.format.write_array_header_1_0(
+        buffer,
+        dict(
+            descr=np.lib.format.dtype_to_descr(dtype), fortran_order=False, shape=shape
+        ),
+    )
+    return buffer.getvalue()
+
+
+class GenerationServer:
+    """HTTP/1.1 front end of a `MicroBatcher`, with keep-alive connections.
+
+    Class labels in requests follow the ground truth, from 1 to `n_classes`.
+    Spectra are streamed in chunks of `chunk_size` bytes, so a slow client
+    holds back only its own connection.
+    """
+
+    def __init__(
+        self,
+        batcher: MicroBatcher,
+        n_classes: int,
+        max_count: int = 100000,
+        chunk_size: int = 2**20,
+    ) -> None:
+        self._batcher = batcher
+        self._n_classes = n_classes
+        self._max_count = max_count
+        self._chunk_size = chunk_size
+
+    async def _respond(
+        self,
+        writer: asyncio.StreamWriter,
+        status: int,
+        body: bytes = b"",
+        content_type: str = "application/json",
+        length: Optional[int] = None,
+    ) -> None:
+        headers = [
+            f"HTTP/1.1 {status} {_REASONS[status]}",
+            f"Content-Type: {content_type}",
+            f"Content-Length: {len(body) if length is None else length}",
+        ]
+        writer.write(("\r\n".join(headers) + "\r\n\r\n").encode("latin-1") + body)
+        await writer.drain()
+
+    async def _error(
+        self, writer: asyncio.StreamWriter, status: int, message: str
+    ) -> None:
+        await self._respond(
+            writer=writer, status=status, body=json.dumps(dict(error=message)).encode()
+        )
+
+    async def _generate(
+        self, writer: asyncio.StreamWriter, query: Dict[str, List[str]]
+    ) -> None:
+        try:
+            label = int(query["class"][0])
+            count = int(query.get("count", ["1"])[0])
+        except (KeyError, ValueError):
+            await self._error(writer, 400, "Expected integer 'class' and 'count'.")
+            return
+        if not 1 <= label <= self._n_classes or not 1 <= count <= self._max_count:
+            await self._error(
+                writer,
+                400,
+                f"Expected 1 <= class <= {self._n_classes} "
+                f"and 1 <= count <= {self._max_count}.",
+            )
+            return
+        try:
+            x = np.ascontiguousarray(
+                await self._batcher.generate(label=label - 1, count=count),
+                dtype=np.float32,
+            )
+        except Exception:  # pylint: disable=broad-except
+            await self._error(writer, 500, "Generation failed.")
+            return
+        header = _npy_header(shape=x.shape, dtype=x.dtype)
+        data = x.data.cast("B")
+        await self._respond(
+            writer=writer,
+            status=200,
+            body=header,
+            content_type="application/octet-stream",
+            length=len(header) + len(data),
+        )
+        for start in range(0, len(data), self._chunk_size):
+            writer.write(data[start : start + self._chunk_size])
+            await writer.drain()
+
+    async def _handle(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        try:
+            while True:
+                try:
+                    request = await reader.readuntil(b"\r\n\r\n")
+                except asyncio.LimitOverrunError:
+                    await self._error(writer, 431, "Request headers are too large.")
+                    break
+                lines = request.decode("latin-1").split("\r\n")
+                method, target, version = lines[0].split(" ", 2)
+                headers = dict(
+                    line.lower().split(": ", 1) for line in lines[1:] if ": " in line
+                )
+                url = urlsplit(target)
+                if method != "GET":
+                    await self._error(writer, 405, "Only GET is supported.")
+                elif url.path == "/generate":
+                    await self._generate(writer=writer, query=parse_qs(url.query))
+                elif url.path == "/metrics":
+                    body = json.dumps(self._batcher.metrics()).encode("utf-8")
+                    await self._respond(writer=writer, status=200, body=body)
+                else:
+                    await self._error(writer, 404, f"No endpoint at '{url.path}'.")
+                if (
+                    method != "GET"
+                    or "transfer-encoding" in headers
+                    or headers.get("content-length", "0") != "0"
+                    or version == "HTTP/1.0"
+                    or headers.get("connection") == "close"
+                ):
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host: str, port: int) -> None:
+        """Accept connections on `host` and `port` until cancelled."""
+        server = await asyncio.start_server(self._handle, host=host, port=port)
+        worker = asyncio.create_task(self._batcher.run())
+        logger.info("Serving synthetic spectra on http://%s:%d", host, port)
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            worker.cancel()
+            self._batcher.close()
+
+
+def serve(  # pylint: disable=invalid-name,too-many-arguments
+    sampler: nn.Module,
+    n_classes: int,
+    host: str = "127.0.0.1",
+    port: int = 8000,
+    MicroBatcher_kwargs: Optional[Dict[str, Any]] = None,
+    GenerationServer_kwargs: Optional[Dict[str, Any]] = None,
+) -> None:
+    """Serve spectra from `sampler` over HTTP until interrupted."""
+
+    async def main() -> None:
+        batcher = MicroBatcher(sampler=sampler, **(MicroBatcher_kwargs or {}))
+        server = GenerationServer(
+            batcher=batcher, n_classes=n_classes, **(GenerationServer_kwargs or {})
+        )
+        await server.serve(host=host, port=port)
+
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        logger.info("Stopped serving")
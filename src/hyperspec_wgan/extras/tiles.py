@@ -0,0 +1,208 @@
+# Copyright 2021 QuantumBlack Visual Analytics Limited
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES
+# OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE, AND
+# NONINFRINGEMENT. IN NO EVENT WILL THE LICENSOR OR OTHER CONTRIBUTORS
+# BE LIABLE FOR ANY CLAIM, DAMAGES, OR OTHER LIABILITY, WHETHER IN AN
+# ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF, OR IN
+# CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+#
+# The QuantumBlack Visual Analytics Limited ("QuantumBlack") name and logo
+# (either separately or in combination, "QuantumBlack Trademarks") are
+# trademarks of QuantumBlack. The License does not grant you any right or
+# license to the QuantumBlack Trademarks. You may not use the QuantumBlack
+# Trademarks or any confusingly similar mark as a trademark for your product,
+# or use the QuantumBlack Trademarks in any other manner that might cause
+# confusion in the marketplace, including but not limited to in advertising,
+# on websites, or on software.
+#
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tiled image pyramids for browsing large scenes.
+
+A `TilePyramid` renders full-resolution tiles on demand and builds each
+coarser level by downsampling 2 x 2 blocks of tiles of the level below, down
+to a single tile. Tiles are produced by a depth-first walk of the quadtree,
+so at most a few tiles per level are held in memory at once, whatever the
+size of the scene. Level 0 is full resolution.
+"""
+
+import math
+import sys
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Generator,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+)
+
+import numpy as np
+
+Tile = Tuple[Tuple[int, int, int], np.ndarray]
+
+
+def _reduce(tile: np.ndarray, resample: str) -> np.ndarray:
+    if resample == "nearest":
+        return tile[::2, ::2]
+    height, width = tile.shape[:2]
+    padded = np.pad(
+        tile.astype(np.float32),
+        ((0, height % 2), (0, width % 2), (0, 0)),
+        mode="edge",
+    )
+    blocks: np.ndarray = padded.reshape(
+        ((height + 1) // 2, 2, (width + 1) // 2, 2, tile.shape[2])
+    ).mean(axis=(1, 3))
+    return np.round(blocks).astype(tile.dtype)
+
+
+class TilePyramid:
+    """Lazily rendered quadtree of RGB tiles.
+
+    `render` maps the row and column slices of a full-resolution tile to a
+    `(rows, columns, 3)` uint8 array. Coarser levels are averaged, or, with
+    `resample="nearest"`, subsampled so that categorical colours are kept.
+    """
+
+    def __init__(
+        self,
+        render: Callable[[slice, slice], np.ndarray],
+        height: int,
+        width: int,
+        tile_size: int = 256,
+        resample: str = "mean",
+    ) -> None:
+        self._render = render
+        self.tile_size = tile_size
+        self._resample = resample
+        self.shapes: List[Tuple[int, int]] = [(height, width)]
+        while max(self.shapes[-1]) > tile_size:
+            rows, columns = self.shapes[-1]
+            self.shapes.append(((rows + 1) // 2, (columns + 1) // 2))
+
+    @property
+    def levels(self) -> int:
+        """Return the number of levels, including full resolution."""
+        return len(self.shapes)
+
+    def grid(self, level: int) -> Tuple[int, int]:
+        """Return the number of tile rows and columns of a level."""
+        height, width = self.shapes[level]
+        return math.ceil(height / self.tile_size), math.ceil(width / self.tile_size)
+
+    def manifest(self) -> Dict[str, Any]:
+        """Describe the pyramid for viewers of its saved tiles."""
+        return dict(
+            tile_size=self.tile_size,
+            levels=[
+                dict(height=height, width=width, grid=list(self.grid(level)))
+                for level, (height, width) in enumerate(self.shapes)
+            ],
+        )
+
+    def _walk(
+        self, level: int, row: int, column: int
+    ) -> Generator[Tile, None, np.ndarray]:
+        if level == 0:
+            size = self.tile_size
+            tile = self._render(
+                slice(row * size, (row + 1) * size),
+                slice(column * size, (column + 1) * size),
+            )
+        else:
+            rows, columns = self.grid(level - 1)
+            children: List[List[Optional[np.ndarray]]] = [[None, None], [None, None]]
+            for i in range(2):
+                for j in range(2):
+                    if 2 * row + i < rows and 2 * column + j < columns:
+                        children[i][j] = yield from self._walk(
+                            level - 1, 2 * row + i, 2 * column + j
+                        )
+            block = np.concatenate(
+                [
+                    np.concatenate(
+                        [child for child in pair if child is not None], axis=1
+                    )
+                    for pair in children
+                    if pair[0] is not None
+                ],
+                axis=0,
+            )
+            tile = _reduce(tile=block, resample=self._resample)
+        yield (level, row, column), tile
+        return tile
+
+    def __iter__(self) -> Iterator[Tile]:
+        yield from self._walk(level=self.levels - 1, row=0, column=0)
+
+
+def stretch_limits(
+    image: np.ndarray,
+    bands: Sequence[int],
+    percentiles: Sequence[float] = (2.0, 98.0),
+    max_samples: int = 1000000,
+) -> np.ndarray:
+    """Return per-band `(low, high)` limits from a strided sample of pixels."""
+    step = max(1, math.ceil(math.sqrt(image.shape[0] * image.shape[1] / max_samples)))
+    sample = np.asarray(image[::step, ::step][..., list(bands)], dtype=np.float64)
+    return np.percentile(sample.reshape(-1, len(bands)), percentiles, axis=0)
+
+
+def false_colour_pyramid(
+    image: np.ndarray,
+    bands: Sequence[int],
+    tile_size: int = 256,
+    percentiles: Sequence[float] = (2.0, 98.0),
+    max_samples: int = 1000000,
+) -> TilePyramid:
+    """Build a pyramid of a false-colour composite of three bands."""
+    low, high = stretch_limits(image, bands, percentiles, max_samples)
+    scale = 255.0 / np.maximum(high - low, sys.float_info.epsilon)
+
+    def render(rows: slice, columns: slice) -> np.ndarray:
+        tile = np.asarray(image[rows, columns][..., list(bands)], dtype=np.float64)
+        stretched: np.ndarray = np.clip((tile - low) * scale, 0, 255)
+        return stretched.round().astype(np.uint8)
+
+    return TilePyramid(
+        render=render, height=image.shape[0], width=image.shape[1], tile_size=tile_size
+    )
+
+
+def _hex_to_rgb(colour: str) -> Tuple[int, int, int]:
+    colour = colour.lstrip("#")
+    return int(colour[0:2], 16), int(colour[2:4], 16), int(colour[4:6], 16)
+
+
+def label_pyramid(
+    labels: np.ndarray, palette: Dict[int, str], tile_size: int = 256
+) -> TilePyramid:
+    """Build a pyramid of a label map, coloured with a `{label: "#RRGGBB"}` palette."""
+    lookup = np.zeros((int(max(palette)) + 1, 3), dtype=np.uint8)
+    for label, colour in palette.items():
+        lookup[int(label)] = _hex_to_rgb(colour=colour)
+
+    def render(rows: slice, columns: slice) -> np.ndarray:
+        colours: np.ndarray = lookup[np.asarray(labels[rows, columns])]
+        return colours
+
+    return TilePyramid(
+        render=render,
+        height=labels.shape[0],
+        width=labels.shape[1],
+        tile_size=tile_size,
+        resample="nearest",
+    )
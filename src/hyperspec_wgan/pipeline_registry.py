@@ -35,8 +35,22 @@ from kedro.pipeline.pipeline import Pipeline
 from hyperspec_wgan.pipelines.data_engineering.pipeline import data_engineering_pipeline
 from hyperspec_wgan.pipelines.data_science.pipeline import data_science_pipeline
 from hyperspec_wgan.pipelines.data_visualization.pipeline import (
+    classification_map_pipeline,
     data_visualization_pipeline,
 )
+from hyperspec_wgan.pipelines.model_evaluation.pipeline import (
+    baseline_evaluation_pipeline,
+    model_evaluation_pipeline,
+)
+from hyperspec_wgan.pipelines.model_inference.pipeline import (
+    inference_benchmark_pipeline,
+    model_inference_pipeline,
+)
+from hyperspec_wgan.pipelines.model_training.pipeline import (
+    augmentation_pipeline,
+    model_training_pipeline,
+    scaling_benchmark_pipeline,
+)
 
 
 def register_pipelines() -> Dict[str, Pipeline]:
@@ -45,7 +59,19 @@ def register_pipelines() -> Dict[str, Pipeline]:
         "__default__": data_engineering_pipeline()
         + data_science_pipeline()
         + data_visualization_pipeline(),
+        "training": model_training_pipeline()
+        + model_evaluation_pipeline()
+        + model_inference_pipeline()
+        + classification_map_pipeline(),
         "data_engineering": data_engineering_pipeline(),
         "data_science": data_science_pipeline(),
         "data_visualization": data_visualization_pipeline(),
+        "model_training": model_training_pipeline(),
+        "model_evaluation": model_evaluation_pipeline(),
+        "model_inference": model_inference_pipeline(),
+        "classification_map": classification_map_pipeline(),
+        "augmentation": augmentation_pipeline(),
+        "baselines": augmentation_pipeline() + baseline_evaluation_pipeline(),
+        "scaling_benchmark": scaling_benchmark_pipeline(),
+        "inference_benchmark": inference_benchmark_pipeline(),
     }
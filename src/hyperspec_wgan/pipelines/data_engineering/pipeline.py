@@ -81,14 +81,7 @@ def data_engineering_pipeline() -> Pipeline:
                     "y": "primary_classified_y",
                     "kwargs": "params:split",
                 },
-                outputs={
-                    "x_train": "model_input_classified_x_train",
-                    "x_test": "model_input_classified_x_test",
-                    "x_valid": "model_input_classified_x_valid",
-                    "y_train": "model_input_classified_y_train",
-                    "y_test": "model_input_classified_y_test",
-                    "y_valid": "model_input_classified_y_valid",
-                },
+                outputs="model_input_classified",
                 name="split-dataset",
                 tags="tcn",
             ),
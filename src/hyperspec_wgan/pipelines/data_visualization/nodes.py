@@ -36,6 +36,8 @@ from matplotlib.cm import ScalarMappable
 from matplotlib.colors import ListedColormap
 from matplotlib.figure import Figure
 
+from hyperspec_wgan.extras.tiles import TilePyramid, false_colour_pyramid, label_pyramid
+
 
 def _plot_colorbar(figure: Figure, palette: List[str], labels: List[str]) -> None:
     colormap = ListedColormap(colors=palette)
@@ -112,3 +114,23 @@ def plot_tsne(
             yticks=[],
         )
     return graph
+
+
+def render_false_colour(
+    image: np.ndarray, metadata: Dict[str, Any], kwargs: Dict[str, Any]
+) -> TilePyramid:
+    """Render a false-colour composite of the scene as a tiled pyramid."""
+    return false_colour_pyramid(
+        image=image,
+        bands=metadata["rgb_bands"],
+        **kwargs["false_colour_pyramid_kwargs"],
+    )
+
+
+def render_label_map(
+    labels: np.ndarray, metadata: Dict[str, Any], kwargs: Dict[str, Any]
+) -> TilePyramid:
+    """Render a label map of the scene as a tiled pyramid."""
+    return label_pyramid(
+        labels=labels, palette=metadata["palette"], **kwargs["label_pyramid_kwargs"]
+    )
@@ -31,7 +31,7 @@
 from kedro.pipeline.node import node
 from kedro.pipeline.pipeline import Pipeline
 
-from .nodes import plot_pca, plot_tsne
+from .nodes import plot_pca, plot_tsne, render_false_colour, render_label_map
 
 
 def data_visualization_pipeline() -> Pipeline:
@@ -63,5 +63,46 @@ def data_visualization_pipeline() -> Pipeline:
                 name="plot-tsne",
                 tags="tsne",
             ),
+            node(
+                func=render_false_colour,
+                inputs={
+                    "image": "scale_image",
+                    "metadata": "params:metadata",
+                    "kwargs": "params:render_false_colour",
+                },
+                outputs="reporting_false_colour",
+                name="render-false-colour",
+                tags="scene",
+            ),
+            node(
+                func=render_label_map,
+                inputs={
+                    "labels": "intermediate_ground_truth",
+                    "metadata": "params:metadata",
+                    "kwargs": "params:render_label_map",
+                },
+                outputs="reporting_ground_truth_map",
+                name="render-ground-truth-map",
+                tags="scene",
+            ),
+        ]
+    )
+
+
+def classification_map_pipeline() -> Pipeline:
+    """Create the pipeline rendering the output of `model_inference`."""
+    return Pipeline(
+        nodes=[
+            node(
+                func=render_label_map,
+                inputs={
+                    "labels": "model_output_classification_map",
+                    "metadata": "params:metadata",
+                    "kwargs": "params:render_label_map",
+                },
+                outputs="reporting_classification_map",
+                name="render-classification-map",
+                tags="scene",
+            ),
         ]
     )
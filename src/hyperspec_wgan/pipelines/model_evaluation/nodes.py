@@ -0,0 +1,141 @@
+# Copyright 2021 QuantumBlack Visual Analytics Limited
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES
+# OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE, AND
+# NONINFRINGEMENT. IN NO EVENT WILL THE LICENSOR OR OTHER CONTRIBUTORS
+# BE LIABLE FOR ANY CLAIM, DAMAGES, OR OTHER LIABILITY, WHETHER IN AN
+# ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF, OR IN
+# CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+#
+# The QuantumBlack Visual Analytics Limited ("QuantumBlack") name and logo
+# (either separately or in combination, "QuantumBlack Trademarks") are
+# trademarks of QuantumBlack. The License does not grant you any right or
+# license to the QuantumBlack Trademarks. You may not use the QuantumBlack
+# Trademarks or any confusingly similar mark as a trademark for your product,
+# or use the QuantumBlack Trademarks in any other manner that might cause
+# confusion in the marketplace, including but not limited to in advertising,
+# on websites, or on software.
+#
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+"""Node definitions for model evaluation tasks."""
+
+from typing import Any, Dict, Iterator, Mapping
+
+import numpy as np
+import pandas as pd
+
+from hyperspec_wgan.extras.augmentation import Augmenter, augment_classes
+from hyperspec_wgan.extras.baselines import evaluate_baselines
+from hyperspec_wgan.extras.metrics import score_samples
+from hyperspec_wgan.extras.neighbors import SpectralIndex, screen_batches
+
+
+def evaluate_samples(
+    real: Mapping[str, np.ndarray],
+    synthetic: Mapping[str, np.ndarray],
+    kwargs: Dict[str, Any],
+) -> Dict[str, Dict[str, float]]:
+    """Score synthetic samples against a real split, class by class."""
+    return score_samples(
+        x_real=real[f'x_{kwargs["split"]}'],
+        y_real=real[f'y_{kwargs["split"]}'],
+        x_fake=synthetic["x"],
+        y_fake=synthetic["y"],
+        **kwargs["score_samples_kwargs"],
+    )
+
+
+def build_spectral_index(
+    real: Mapping[str, np.ndarray], kwargs: Dict[str, Any]
+) -> SpectralIndex:
+    """Build a nearest-neighbour index over the real training spectra."""
+    return SpectralIndex(**kwargs["SpectralIndex_kwargs"]).fit(x=real["x_train"])
+
+
+def screen_samples(
+    index: SpectralIndex,
+    synthetic: Mapping[str, np.ndarray],
+    kwargs: Dict[str, Any],
+) -> Iterator[Dict[str, np.ndarray]]:
+    """Flag or drop synthetic samples that nearly copy a training spectrum.
+
+    Batches are screened lazily as the returned generator is saved, so the
+    screened samples are never held in memory all at once. An empty synthetic
+    set gives a single empty batch. The check is exact only if `index` was
+    built with `candidates=None`.
+    """
+    x, y = synthetic["x"], synthetic["y"]
+    batch_size = kwargs["batch_size"]
+    batches = (
+        (x[start : start + batch_size], y[start : start + batch_size])
+        for start in range(0, max(len(y), 1), batch_size)
+    )
+    return screen_batches(
+        batches=batches, index=index, **kwargs["screen_batches_kwargs"]
+    )
+
+
+def report_memorisation(
+    synthetic: Mapping[str, np.ndarray], screened: Mapping[str, np.ndarray]
+) -> Dict[str, Dict[str, int]]:
+    """Count the synthetic samples per class that were flagged or dropped.
+
+    Counts are lower bounds if the spectral index searched approximately.
+    """
+    y, kept = np.asarray(synthetic["y"]), np.asarray(screened["y"])
+    flagged = np.asarray(screened["memorised"])
+    report = {}
+    for label in np.unique(y):
+        total = int((y == label).sum())
+        memorised = (
+            total - int((kept == label).sum()) + int(flagged[kept == label].sum())
+        )
+        report[str(label)] = dict(samples=total, memorised=memorised)
+    return report
+
+
+def compare_baselines(
+    real: Mapping[str, np.ndarray],
+    synthetic: Mapping[str, np.ndarray],
+    augmenter: Augmenter,
+    kwargs: Dict[str, Any],
+) -> Dict[str, pd.DataFrame]:
+    """Score classical baselines trained with GAN or classically augmented data.
+
+    The classically augmented samples are drawn from the training split with
+    `augmenter` here rather than stored. Returns one row per job, and the mean
+    and standard deviation over seeds for each model, source, and ratio.
+    """
+    x, y = augment_classes(
+        x=real["x_train"],
+        y=real["y_train"],
+        augmenter=augmenter,
+        **kwargs["augment_classes_kwargs"],
+    )
+    augmented = dict(x=x, y=y)
+    table = pd.DataFrame(
+        evaluate_baselines(
+            real=real,
+            synthetic=dict(gan=synthetic, augmentation=augmented),
+            **kwargs["evaluate_baselines_kwargs"],
+        )
+    )
+    summary = (
+        table.groupby(["model", "source", "ratio"])[["accuracy", "kappa", "wall_time"]]
+        .agg(["mean", "std"])
+        .reset_index()
+    )
+    summary.columns = [
+        "_".join(filter(None, column)) for column in summary.columns.to_flat_index()
+    ]
+    return dict(table=table, summary=summary)
@@ -0,0 +1,87 @@
+# Copyright 2021 QuantumBlack Visual Analytics Limited
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES
+# OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE, AND
+# NONINFRINGEMENT. IN NO EVENT WILL THE LICENSOR OR OTHER CONTRIBUTORS
+# BE LIABLE FOR ANY CLAIM, DAMAGES, OR OTHER LIABILITY, WHETHER IN AN
+# ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF, OR IN
+# CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+#
+# The QuantumBlack Visual Analytics Limited ("QuantumBlack") name and logo
+# (either separately or in combination, "QuantumBlack Trademarks") are
+# trademarks of QuantumBlack. The License does not grant you any right or
+# license to the QuantumBlack Trademarks. You may not use the QuantumBlack
+# Trademarks or any confusingly similar mark as a trademark for your product,
+# or use the QuantumBlack Trademarks in any other manner that might cause
+# confusion in the marketplace, including but not limited to in advertising,
+# on websites, or on software.
+#
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+"""Pipeline structure for model evaluation tasks."""
+
+from kedro.pipeline.node import node
+from kedro.pipeline.pipeline import Pipeline
+
+from .nodes import compare_baselines, evaluate_samples, report_memorisation
+
+
+def model_evaluation_pipeline() -> Pipeline:
+    """Create the model evaluation pipeline."""
+    return Pipeline(
+        nodes=[
+            node(
+                func=evaluate_samples,
+                inputs={
+                    "real": "model_input_classified",
+                    "synthetic": "model_output_synthetic",
+                    "kwargs": "params:evaluate_samples",
+                },
+                outputs="reporting_sample_quality",
+                name="evaluate-samples",
+                tags="gan",
+            ),
+            node(
+                func=report_memorisation,
+                inputs={
+                    "synthetic": "model_output_synthetic",
+                    "screened": "model_output_synthetic_screened",
+                },
+                outputs="reporting_memorisation",
+                name="report-memorisation",
+                tags="gan",
+            ),
+        ]
+    )
+
+
+def baseline_evaluation_pipeline() -> Pipeline:
+    """Create the classical baseline evaluation pipeline."""
+    return Pipeline(
+        nodes=[
+            node(
+                func=compare_baselines,
+                inputs={
+                    "real": "model_input_classified",
+                    "synthetic": "model_output_synthetic_screened",
+                    "augmenter": "model_augmenter",
+                    "kwargs": "params:compare_baselines",
+                },
+                outputs={
+                    "table": "reporting_baselines",
+                    "summary": "reporting_baselines_summary",
+                },
+                name="compare-baselines",
+                tags="baselines",
+            ),
+        ]
+    )
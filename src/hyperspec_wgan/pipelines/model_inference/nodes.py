@@ -0,0 +1,222 @@
+# Copyright 2021 QuantumBlack Visual Analytics Limited
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES
+# OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE, AND
+# NONINFRINGEMENT. IN NO EVENT WILL THE LICENSOR OR OTHER CONTRIBUTORS
+# BE LIABLE FOR ANY CLAIM, DAMAGES, OR OTHER LIABILITY, WHETHER IN AN
+# ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF, OR IN
+# CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+#
+# The QuantumBlack Visual Analytics Limited ("QuantumBlack") name and logo
+# (either separately or in combination, "QuantumBlack Trademarks") are
+# trademarks of QuantumBlack. The License does not grant you any right or
+# license to the QuantumBlack Trademarks. You may not use the QuantumBlack
+# Trademarks or any confusingly similar mark as a trademark for your product,
+# or use the QuantumBlack Trademarks in any other manner that might cause
+# confusion in the marketplace, including but not limited to in advertising,
+# on websites, or on software.
+#
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+"""Node definitions for model inference tasks.
+
+Trained models are exported by tracing them to TorchScript, optionally with
+dynamic int8 quantisation of their linear layers or with bfloat16 weights, so
+that batch inference runs without eager-mode Python overhead.
+"""
+
+import logging
+import time
+from typing import Any, Dict, Mapping, Optional, Union, cast
+
+import numpy as np
+import torch
+from torch import nn
+
+from hyperspec_wgan.extras.augmentation import Augmenter
+from hyperspec_wgan.pipelines.model_training.models import (
+    Cast,
+    NoiseSampler,
+    build_model,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def _optimise(
+    checkpoint: Dict[str, Any],
+    script: bool = True,
+    quantize: bool = False,
+    dtype: str = "float32",
+    freeze: bool = True,
+) -> nn.Module:
+    if quantize and dtype != "float32":
+        raise ValueError("Quantised models only run with float32 activations.")
+    model = build_model(checkpoint=checkpoint)
+    latent_dim: Optional[int] = getattr(model, "latent_dim", None)
+    if quantize:
+        model = torch.quantization.quantize_dynamic(  # type: ignore[attr-defined]
+            model, {nn.Linear}, dtype=torch.qint8
+        )
+    if dtype != "float32":
+        model = Cast(module=model, dtype=getattr(torch, dtype))
+    if latent_dim is not None:
+        model = NoiseSampler(generator=model, latent_dim=latent_dim)
+        example = torch.zeros(2, dtype=torch.long)
+    else:
+        example = torch.zeros(2, checkpoint["config"]["n_bands"])
+    model = model.eval()
+    if not script:
+        return model
+    with torch.no_grad():
+        traced: torch.jit.ScriptModule = torch.jit.trace(  # type: ignore[no-untyped-call]
+            model, example, check_trace=False
+        )
+    return torch.jit.freeze(traced) if freeze else traced
+
+
+def export_model(
+    checkpoint: Dict[str, Any], kwargs: Dict[str, Any]
+) -> torch.jit.ScriptModule:
+    """Trace a trained generator or classifier to TorchScript.
+
+    An exported generator maps zero-based class labels to spectra, drawing its
+    noise from the global PyTorch random number generator.
+    """
+    return cast(
+        torch.jit.ScriptModule, _optimise(checkpoint=checkpoint, script=True, **kwargs)
+    )
+
+
+def _load(model: Union[Dict[str, Any], torch.jit.ScriptModule]) -> nn.Module:
+    if isinstance(model, torch.jit.ScriptModule):
+        return model
+    return build_model(checkpoint=model)
+
+
+def classify_image(
+    classifier: Union[Dict[str, Any], torch.jit.ScriptModule],
+    image: np.ndarray,
+    kwargs: Dict[str, Any],
+) -> np.ndarray:
+    """Predict a label for every pixel of an image, one batch at a time."""
+    model = _load(model=classifier)
+    x = image.reshape(-1, image.shape[2])
+    y = np.empty(len(x), dtype=np.uint8)
+    batch_size = kwargs["batch_size"]
+    with torch.no_grad():
+        for start in range(0, len(x), batch_size):
+            batch = np.asarray(x[start : start + batch_size], dtype=np.float32)
+            logits = model(torch.from_numpy(batch))
+            y[start : start + batch_size] = logits.argmax(dim=1).numpy() + 1
+    return y.reshape(image.shape[:2])
+
+
+def _run(
+    model: nn.Module, inputs: torch.Tensor, batch_size: int, repeats: int
+) -> Dict[str, Any]:
+    with torch.no_grad():
+        for _ in range(2):
+            model(inputs[:batch_size])
+        started = time.perf_counter()
+        for _ in range(repeats):
+            outputs = torch.cat(
+                [
+                    model(inputs[start : start + batch_size])
+                    for start in range(0, len(inputs), batch_size)
+                ]
+            )
+        seconds = time.perf_counter() - started
+    return dict(outputs=outputs, samples_per_second=len(inputs) * repeats / seconds)
+
+
+def _benchmark_augmentation(
+    x: np.ndarray, y: np.ndarray, kwargs: Dict[str, Any]
+) -> Dict[str, Dict[str, float]]:
+    augmentations = kwargs["Augmenter_kwargs"]["augmentations"]
+    chains = {name: {name: augmentations[name]} for name in augmentations}
+    chains["all"] = augmentations
+    batch_size = kwargs["batch_size"]
+    report = {}
+    for name, chain in chains.items():
+        augmenter = Augmenter(
+            augmentations=chain, seed=kwargs["Augmenter_kwargs"]["seed"]
+        )
+        started = time.perf_counter()
+        for _ in range(kwargs["repeats"]):
+            for start in range(0, len(x), batch_size):
+                augmenter(
+                    x=x[start : start + batch_size], y=y[start : start + batch_size]
+                )
+        seconds = time.perf_counter() - started
+        report[name] = dict(samples_per_second=len(x) * kwargs["repeats"] / seconds)
+        logger.info("Augmentation with %s: %s", name, report[name])
+    return report
+
+
+def benchmark_inference(  # pylint: disable=too-many-locals
+    generator: Dict[str, Any],
+    classifier: Dict[str, Any],
+    real: Mapping[str, np.ndarray],
+    kwargs: Dict[str, Any],
+) -> Dict[str, Dict[str, Dict[str, float]]]:
+    """Compare throughput and drift of model variants on the test split.
+
+    Each variant in `kwargs["variants"]` sets the export options of the
+    models. Drift is measured against the first variant: the change in
+    classifier accuracy and the fraction of changed predictions, and the mean
+    absolute difference of generated spectra from the same noise. The
+    throughput of each classical augmentation, and of all of them chained, is
+    reported alongside the generator's for comparison.
+    """
+    x = torch.from_numpy(np.asarray(real["x_test"], dtype=np.float32))
+    y = torch.from_numpy(np.asarray(real["y_test"], dtype=np.int64) - 1)
+    run = dict(batch_size=kwargs["batch_size"], repeats=kwargs["repeats"])
+    report: Dict[str, Dict[str, Dict[str, float]]] = dict(classifier={}, generator={})
+    baseline: Dict[str, Any] = {}
+    for name, variant in kwargs["variants"].items():
+        result = _run(_optimise(checkpoint=classifier, **variant), inputs=x, **run)
+        predictions = result["outputs"].argmax(dim=1)
+        accuracy = float((predictions == y).float().mean())
+        baseline.setdefault("accuracy", accuracy)
+        baseline.setdefault("predictions", predictions)
+        report["classifier"][name] = dict(
+            samples_per_second=result["samples_per_second"],
+            accuracy=accuracy,
+            accuracy_drift=accuracy - baseline["accuracy"],
+            changed_predictions=float(
+                (predictions != baseline["predictions"]).float().mean()
+            ),
+        )
+
+        sampler = _optimise(checkpoint=generator, **variant)
+        torch.manual_seed(kwargs["seed"])
+        result = _run(sampler, inputs=y, **run)
+        baseline.setdefault("spectra", result["outputs"])
+        report["generator"][name] = dict(
+            samples_per_second=result["samples_per_second"],
+            mean_absolute_drift=float(
+                (result["outputs"] - baseline["spectra"]).abs().mean()
+            ),
+        )
+        logger.info(
+            "Inference with %s models: classifier %s, generator %s",
+            name,
+            report["classifier"][name],
+            report["generator"][name],
+        )
+    report["augmentation"] = _benchmark_augmentation(
+        x=np.asarray(real["x_test"], dtype=np.float32),
+        y=np.asarray(real["y_test"]),
+        kwargs=kwargs,
+    )
+    return report
@@ -0,0 +1,94 @@
+# Copyright 2021 QuantumBlack Visual Analytics Limited
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES
+# OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE, AND
+# NONINFRINGEMENT. IN NO EVENT WILL THE LICENSOR OR OTHER CONTRIBUTORS
+# BE LIABLE FOR ANY CLAIM, DAMAGES, OR OTHER LIABILITY, WHETHER IN AN
+# ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF, OR IN
+# CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+#
+# The QuantumBlack Visual Analytics Limited ("QuantumBlack") name and logo
+# (either separately or in combination, "QuantumBlack Trademarks") are
+# trademarks of QuantumBlack. The License does not grant you any right or
+# license to the QuantumBlack Trademarks. You may not use the QuantumBlack
+# Trademarks or any confusingly similar mark as a trademark for your product,
+# or use the QuantumBlack Trademarks in any other manner that might cause
+# confusion in the marketplace, including but not limited to in advertising,
+# on websites, or on software.
+#
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+"""Pipeline structure for model inference tasks."""
+
+from kedro.pipeline.node import node
+from kedro.pipeline.pipeline import Pipeline
+
+from .nodes import benchmark_inference, classify_image, export_model
+
+
+def model_inference_pipeline() -> Pipeline:
+    """Create the model inference pipeline."""
+    return Pipeline(
+        nodes=[
+            node(
+                func=export_model,
+                inputs={
+                    "checkpoint": "model_generator",
+                    "kwargs": "params:export_generator",
+                },
+                outputs="model_generator_scripted",
+                name="export-generator",
+                tags="gan",
+            ),
+            node(
+                func=export_model,
+                inputs={
+                    "checkpoint": "model_classifier",
+                    "kwargs": "params:export_classifier",
+                },
+                outputs="model_classifier_scripted",
+                name="export-classifier",
+                tags="tcn",
+            ),
+            node(
+                func=classify_image,
+                inputs={
+                    "classifier": "model_classifier_scripted",
+                    "image": "scale_image",
+                    "kwargs": "params:classify_image",
+                },
+                outputs="model_output_classification_map",
+                name="classify-image",
+                tags="tcn",
+            ),
+        ]
+    )
+
+
+def inference_benchmark_pipeline() -> Pipeline:
+    """Create the eager, scripted, and quantised inference benchmark pipeline."""
+    return Pipeline(
+        nodes=[
+            node(
+                func=benchmark_inference,
+                inputs={
+                    "generator": "model_generator",
+                    "classifier": "model_classifier",
+                    "real": "model_input_classified",
+                    "kwargs": "params:benchmark_inference",
+                },
+                outputs="reporting_inference",
+                name="benchmark-inference",
+                tags=["gan", "tcn"],
+            ),
+        ]
+    )
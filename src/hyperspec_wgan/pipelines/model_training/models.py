@@ -0,0 +1,185 @@
+# Copyright 2021 QuantumBlack Visual Analytics Limited
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES
+# OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE, AND
+# NONINFRINGEMENT. IN NO EVENT WILL THE LICENSOR OR OTHER CONTRIBUTORS
+# BE LIABLE FOR ANY CLAIM, DAMAGES, OR OTHER LIABILITY, WHETHER IN AN
+# ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF, OR IN
+# CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+#
+# The QuantumBlack Visual Analytics Limited ("QuantumBlack") name and logo
+# (either separately or in combination, "QuantumBlack Trademarks") are
+# trademarks of QuantumBlack. The License does not grant you any right or
+# license to the QuantumBlack Trademarks. You may not use the QuantumBlack
+# Trademarks or any confusingly similar mark as a trademark for your product,
+# or use the QuantumBlack Trademarks in any other manner that might cause
+# confusion in the marketplace, including but not limited to in advertising,
+# on websites, or on software.
+#
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+"""Model definitions for model training tasks.
+
+Class labels are zero-based inside the models, i.e. label `1` in the ground
+truth is class `0` here, since label `0` marks unclassified pixels.
+"""
+
+from typing import Any, Dict, Sequence, Type
+
+import torch
+from torch import nn
+
+
+def _mlp(dims: Sequence[int]) -> nn.Sequential:
+    layers = []
+    for in_features, out_features in zip(dims[:-1], dims[1:]):
+        layers += [nn.Linear(in_features, out_features), nn.LeakyReLU(0.2)]
+    return nn.Sequential(*layers)
+
+
+class Generator(nn.Module):
+    """Generate spectra from noise, conditioned on a class."""
+
+    def __init__(
+        self,
+        n_bands: int,
+        n_classes: int,
+        latent_dim: int = 64,
+        hidden_dims: Sequence[int] = (256, 512),
+    ) -> None:
+        super().__init__()
+        self.latent_dim = latent_dim
+        self.embedding = nn.Embedding(n_classes, latent_dim)
+        self.body = _mlp(dims=[2 * latent_dim, *hidden_dims])
+        self.head = nn.Sequential(nn.Linear(hidden_dims[-1], n_bands), nn.Tanh())
+
+    def forward(self, z: torch.Tensor, y: torch.Tensor) -> torch.Tensor:
+        """Map noise `z` and classes `y` to spectra."""
+        spectra: torch.Tensor = self.head(
+            self.body(torch.cat([z, self.embedding(y)], dim=1))
+        )
+        return spectra
+
+
+class Critic(nn.Module):
+    """Score how real spectra look, conditioned on a class."""
+
+    def __init__(
+        self,
+        n_bands: int,
+        n_classes: int,
+        hidden_dims: Sequence[int] = (512, 256),
+    ) -> None:
+        super().__init__()
+        self.body = _mlp(dims=[n_bands, *hidden_dims])
+        self.head = nn.Linear(hidden_dims[-1], 1)
+        self.projection = nn.Embedding(n_classes, hidden_dims[-1])
+
+    def forward(self, x: torch.Tensor, y: torch.Tensor) -> torch.Tensor:
+        """Score spectra `x` of classes `y` with a projection critic."""
+        features = self.body(x)
+        projection = (self.projection(y) * features).sum(dim=1, keepdim=True)
+        scores: torch.Tensor = (self.head(features) + projection).squeeze(dim=1)
+        return scores
+
+
+class Classifier(nn.Module):
+    """Classify spectra with a 1D convolutional network."""
+
+    def __init__(
+        self,
+        n_bands: int,  # pylint: disable=unused-argument
+        n_classes: int,
+        channels: Sequence[int] = (16, 32, 64),
+        kernel_size: int = 7,
+    ) -> None:
+        super().__init__()
+        layers = []
+        for in_channels, out_channels in zip([1, *channels[:-1]], channels):
+            layers += [
+                nn.Conv1d(
+                    in_channels, out_channels, kernel_size, padding=kernel_size // 2
+                ),
+                nn.BatchNorm1d(out_channels),
+                nn.ReLU(),
+                nn.MaxPool1d(2),
+            ]
+        self.body = nn.Sequential(*layers, nn.AdaptiveAvgPool1d(1), nn.Flatten())
+        self.head = nn.Linear(channels[-1], n_classes)
+
+    def forward(self, x: torch.Tensor) -> torch.Tensor:
+        """Map spectra `x` to class logits."""
+        logits: torch.Tensor = self.head(self.body(x.unsqueeze(dim=1)))
+        return logits
+
+
+class NoiseSampler(nn.Module):
+    """Generate spectra for classes `y`, drawing the noise inside the model.
+
+    Wrapping a generator this way gives it a single tensor input, so it can be
+    traced and used without knowing its latent dimension.
+    """
+
+    def __init__(self, generator: nn.Module, latent_dim: int) -> None:
+        super().__init__()
+        self.generator = generator
+        self.latent_dim = latent_dim
+
+    def forward(self, y: torch.Tensor) -> torch.Tensor:
+        """Map classes `y` to spectra from fresh noise."""
+        spectra: torch.Tensor = self.generator(
+            torch.randn(y.shape[0], self.latent_dim), y
+        )
+        return spectra
+
+
+class Cast(nn.Module):
+    """Run a model in another floating-point `dtype`, such as `bfloat16`."""
+
+    def __init__(self, module: nn.Module, dtype: torch.dtype) -> None:
+        super().__init__()
+        self.module = module.to(dtype)
+        self.dtype = dtype
+
+    def forward(self, *inputs: torch.Tensor) -> torch.Tensor:
+        """Cast floating-point inputs to `dtype` and outputs back to float32."""
+        inputs = tuple(x.to(self.dtype) if x.is_floating_point() else x for x in inputs)
+        outputs: torch.Tensor = self.module(*inputs)
+        return outputs.float()
+
+
+MODELS: Dict[str, Type[nn.Module]] = dict(
+    generator=Generator, critic=Critic, classifier=Classifier
+)
+
+
+def build_model(checkpoint: Dict[str, Any]) -> nn.Module:
+    """Rebuild a trained model from its checkpoint."""
+    model = MODELS[checkpoint["model"]](**checkpoint["config"])
+    model.load_state_dict(checkpoint["state_dict"])
+    return model.eval()
+
+
+def as_sampler(generator: Any) -> nn.Module:
+    """Return a `NoiseSampler` for a generator checkpoint or exported generator."""
+    if isinstance(generator, torch.jit.ScriptModule):
+        return generator
+    model = build_model(checkpoint=generator)
+    latent_dim: int = getattr(model, "latent_dim")
+    return NoiseSampler(generator=model, latent_dim=latent_dim)
+
+
+def to_checkpoint(
+    name: str, model: nn.Module, config: Dict[str, Any]
+) -> Dict[str, Any]:
+    """Bundle a trained model with the config needed to rebuild it."""
+    return dict(model=name, config=config, state_dict=model.state_dict())
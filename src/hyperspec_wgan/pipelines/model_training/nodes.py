@@ -0,0 +1,383 @@
+# Copyright 2021 QuantumBlack Visual Analytics Limited
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES
+# OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE, AND
+# NONINFRINGEMENT. IN NO EVENT WILL THE LICENSOR OR OTHER CONTRIBUTORS
+# BE LIABLE FOR ANY CLAIM, DAMAGES, OR OTHER LIABILITY, WHETHER IN AN
+# ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF, OR IN
+# CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+#
+# The QuantumBlack Visual Analytics Limited ("QuantumBlack") name and logo
+# (either separately or in combination, "QuantumBlack Trademarks") are
+# trademarks of QuantumBlack. The License does not grant you any right or
+# license to the QuantumBlack Trademarks. You may not use the QuantumBlack
+# Trademarks or any confusingly similar mark as a trademark for your product,
+# or use the QuantumBlack Trademarks in any other manner that might cause
+# confusion in the marketplace, including but not limited to in advertising,
+# on websites, or on software.
+#
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+"""Node definitions for model training tasks.
+
+Both training nodes run in `world_size` data-parallel processes when their
+`world_size` parameter is above 1; see `hyperspec_wgan.extras.distributed`.
+"""
+
+import logging
+import tempfile
+import time
+from typing import Any, Dict, List, Mapping, Tuple, Union, cast
+
+import numpy as np
+import torch
+import torch.nn.functional as F
+from torch import nn
+from torch.utils.data import DataLoader
+
+from hyperspec_wgan.extras import distributed
+from hyperspec_wgan.extras.augmentation import Augmenter
+from hyperspec_wgan.extras.checkpoint import Checkpointer
+from hyperspec_wgan.extras.metrics import score_samples
+from hyperspec_wgan.extras.sampling import MixedBatchSampler, MixedDataset
+
+from .models import (
+    Classifier,
+    Critic,
+    Generator,
+    NoiseSampler,
+    as_sampler,
+    to_checkpoint,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def _gradient_penalty(
+    critic: Critic, real: torch.Tensor, fake: torch.Tensor, labels: torch.Tensor
+) -> torch.Tensor:
+    alpha = torch.rand(len(real), 1)
+    mixed = (alpha * real + (1 - alpha) * fake).requires_grad_(True)
+    (gradients,) = torch.autograd.grad(
+        outputs=critic(mixed, labels).sum(), inputs=mixed, create_graph=True
+    )
+    penalty: torch.Tensor = ((gradients.norm(p=2, dim=1) - 1) ** 2).mean()
+    return penalty
+
+
+def _sample(sampler: nn.Module, labels: np.ndarray, batch_size: int) -> np.ndarray:
+    labels = np.asarray(labels, dtype=np.int64) - 1
+    batches = []
+    with torch.no_grad():
+        for start in range(0, len(labels), batch_size):
+            y = torch.from_numpy(labels[start : start + batch_size])
+            batches.append(sampler(y).numpy())
+    return np.concatenate(batches) if batches else np.empty((0, 0), np.float32)
+
+
+def _loader(
+    dataset: MixedDataset,
+    y_real: np.ndarray,
+    y_synthetic: Any,
+    kwargs: Dict[str, Any],
+) -> "DataLoader[Tuple[torch.Tensor, torch.Tensor]]":
+    sampler = MixedBatchSampler(
+        y_real=y_real,
+        y_synthetic=y_synthetic,
+        rank=distributed.rank(),
+        world_size=distributed.world_size(),
+        **kwargs["MixedBatchSampler_kwargs"],
+    )
+    return DataLoader(
+        dataset, sampler=sampler, batch_size=None, **kwargs["DataLoader_kwargs"]
+    )
+
+
+def _start_epoch(
+    loader: "DataLoader[Tuple[torch.Tensor, torch.Tensor]]",
+    kwargs: Dict[str, Any],
+    epoch: int,
+) -> None:
+    cast(MixedBatchSampler, loader.sampler).set_epoch(epoch)
+    cast(MixedDataset, loader.dataset).set_epoch(epoch)
+    distributed.seed_rank(seed=kwargs["MixedBatchSampler_kwargs"]["seed"], epoch=epoch)
+
+
+def _fit_gan(  # pylint: disable=too-many-arguments,too-many-locals
+    dataset: MixedDataset,
+    y: np.ndarray,
+    x_valid: np.ndarray,
+    y_valid: np.ndarray,
+    config: Dict[str, Any],
+    kwargs: Dict[str, Any],
+    checkpoints: Dict[str, Any],
+) -> Dict[str, Any]:
+    generator = Generator(**config, **kwargs["Generator_kwargs"])
+    critic = Critic(**config, **kwargs["Critic_kwargs"])
+    distributed.broadcast_module(module=generator)
+    distributed.broadcast_module(module=critic)
+    generator_optimizer = torch.optim.Adam(
+        generator.parameters(), **kwargs["Adam_kwargs"]
+    )
+    critic_optimizer = torch.optim.Adam(critic.parameters(), **kwargs["Adam_kwargs"])
+    objects = dict(
+        generator=generator,
+        critic=critic,
+        generator_optimizer=generator_optimizer,
+        critic_optimizer=critic_optimizer,
+    )
+    loader = _loader(dataset=dataset, y_real=y, y_synthetic=None, kwargs=kwargs)
+    checkpointer = Checkpointer(
+        directory=f'{checkpoints["directory"]}/gan',
+        config=dict(config, **kwargs),
+        **checkpoints["Checkpointer_kwargs"],
+    )
+    samples, started = 0, time.perf_counter()
+    for epoch in range(checkpointer.restore(objects=objects), kwargs["epochs"]):
+        _start_epoch(loader=loader, kwargs=kwargs, epoch=epoch)
+        generator.train()
+        for step, (x_batch, y_batch) in enumerate(loader):
+            samples += len(y_batch)
+            labels = y_batch - 1
+            z = torch.randn(len(labels), generator.latent_dim)
+            fake = generator(z, labels).detach()
+            critic_loss = (
+                critic(fake, labels).mean()
+                - critic(x_batch, labels).mean()
+                + kwargs["gradient_penalty"]
+                * _gradient_penalty(critic, x_batch, fake, labels)
+            )
+            critic_optimizer.zero_grad()
+            critic_loss.backward()
+            distributed.all_reduce_gradients(parameters=critic.parameters())
+            critic_optimizer.step()
+            if (step + 1) % kwargs["critic_steps"]:
+                continue
+            z = torch.randn(len(labels), generator.latent_dim)
+            generator_loss = -critic(generator(z, labels), labels).mean()
+            generator_optimizer.zero_grad()
+            generator_loss.backward()
+            distributed.all_reduce_gradients(parameters=generator.parameters())
+            generator_optimizer.step()
+        if distributed.rank() != 0:
+            continue
+        if kwargs["validate_every"] and (epoch + 1) % kwargs["validate_every"] == 0:
+            generator.eval()
+            scores = score_samples(
+                x_real=x_valid,
+                y_real=y_valid,
+                x_fake=_sample(
+                    NoiseSampler(generator, generator.latent_dim),
+                    labels=y_valid,
+                    batch_size=len(y_valid),
+                ),
+                y_fake=y_valid,
+                **kwargs["score_samples_kwargs"],
+            )
+            logger.info("Epoch %d validation: %s", epoch + 1, scores.get("mean"))
+        checkpointer.save(epoch=epoch, objects=objects)
+    seconds = time.perf_counter() - started
+    if distributed.rank() == 0:
+        checkpointer.save(epoch=kwargs["epochs"] - 1, objects=objects, complete=True)
+    return dict(
+        generator=to_checkpoint(
+            "generator", generator, dict(config, **kwargs["Generator_kwargs"])
+        ),
+        critic=to_checkpoint("critic", critic, dict(config, **kwargs["Critic_kwargs"])),
+        samples_per_second=samples * distributed.world_size() / seconds,
+    )
+
+
+def train_gan(
+    real: Mapping[str, np.ndarray],
+    metadata: Dict[str, Any],
+    kwargs: Dict[str, Any],
+    checkpoints: Dict[str, Any],
+) -> Dict[str, Dict[str, Any]]:
+    """Train a conditional Wasserstein GAN with gradient penalty."""
+    x, y = real["x_train"], np.asarray(real["y_train"])
+    result = distributed.launch(
+        _fit_gan,
+        kwargs["world_size"],
+        MixedDataset(x_real=x, y_real=y),
+        y,
+        np.asarray(real["x_valid"]),
+        np.asarray(real["y_valid"]),
+        dict(n_bands=x.shape[1], n_classes=len(metadata["labels"]) - 1),
+        kwargs,
+        checkpoints,
+    )
+    logger.info("GAN training: %.1f samples/s", result["samples_per_second"])
+    return dict(generator=result["generator"], critic=result["critic"])
+
+
+def generate(
+    generator: Union[Dict[str, Any], torch.jit.ScriptModule],
+    real: Mapping[str, np.ndarray],
+    kwargs: Dict[str, Any],
+) -> Dict[str, np.ndarray]:
+    """Generate synthetic samples for every class in the training split.
+
+    `generator` is either a checkpoint, as produced by `train_gan`, or a
+    generator exported by the model inference pipeline.
+    """
+    sampler = as_sampler(generator)
+    torch.manual_seed(kwargs["seed"])
+    labels = np.repeat(np.unique(real["y_train"]), kwargs["samples_per_class"])
+    x = _sample(sampler, labels=labels, batch_size=kwargs["batch_size"])
+    return dict(x=x, y=labels)
+
+
+def build_augmenter(kwargs: Dict[str, Any]) -> Augmenter:
+    """Build the classical augmentation transform.
+
+    The transform augments batches as they are drawn, as in `MixedDataset`,
+    so no augmented samples are stored.
+    """
+    return Augmenter(**kwargs["Augmenter_kwargs"])
+
+
+def _fit_classifier(  # pylint: disable=too-many-arguments,too-many-locals
+    dataset: MixedDataset,
+    y: np.ndarray,
+    y_synthetic: np.ndarray,
+    x_valid: np.ndarray,
+    y_valid: np.ndarray,
+    config: Dict[str, Any],
+    kwargs: Dict[str, Any],
+    checkpoints: Dict[str, Any],
+) -> Dict[str, Any]:
+    classifier = Classifier(**config, **kwargs["Classifier_kwargs"])
+    distributed.broadcast_module(module=classifier)
+    optimizer = torch.optim.Adam(classifier.parameters(), **kwargs["Adam_kwargs"])
+    objects = dict(classifier=classifier, optimizer=optimizer)
+    loader = _loader(dataset=dataset, y_real=y, y_synthetic=y_synthetic, kwargs=kwargs)
+    checkpointer = Checkpointer(
+        directory=f'{checkpoints["directory"]}/classifier',
+        config=dict(config, **kwargs),
+        **checkpoints["Checkpointer_kwargs"],
+    )
+    inputs = torch.from_numpy(np.asarray(x_valid, dtype=np.float32))
+    targets = torch.from_numpy(np.asarray(y_valid, dtype=np.int64) - 1)
+    samples, started = 0, time.perf_counter()
+    for epoch in range(checkpointer.restore(objects=objects), kwargs["epochs"]):
+        _start_epoch(loader=loader, kwargs=kwargs, epoch=epoch)
+        classifier.train()
+        for x_batch, y_batch in loader:
+            samples += len(y_batch)
+            loss = F.cross_entropy(classifier(x_batch), y_batch - 1)
+            optimizer.zero_grad()
+            loss.backward()  # type: ignore[no-untyped-call]
+            distributed.all_reduce_gradients(parameters=classifier.parameters())
+            optimizer.step()
+        distributed.all_reduce_buffers(module=classifier)
+        if distributed.rank() != 0:
+            continue
+        classifier.eval()
+        with torch.no_grad():
+            accuracy = (classifier(inputs).argmax(dim=1) == targets).float().mean()
+        logger.info("Epoch %d validation accuracy: %.4f", epoch + 1, accuracy)
+        checkpointer.save(epoch=epoch, objects=objects)
+    seconds = time.perf_counter() - started
+    if distributed.rank() == 0:
+        checkpointer.save(epoch=kwargs["epochs"] - 1, objects=objects, complete=True)
+    return dict(
+        classifier=to_checkpoint(
+            "classifier", classifier, dict(config, **kwargs["Classifier_kwargs"])
+        ),
+        samples_per_second=samples * distributed.world_size() / seconds,
+    )
+
+
+def train_classifier(
+    real: Mapping[str, np.ndarray],
+    synthetic: Mapping[str, np.ndarray],
+    metadata: Dict[str, Any],
+    kwargs: Dict[str, Any],
+    checkpoints: Dict[str, Any],
+) -> Dict[str, Any]:
+    """Train a classifier on a mix of real and synthetic samples."""
+    x, y = real["x_train"], np.asarray(real["y_train"])
+    x_synthetic, y_synthetic = synthetic["x"], np.asarray(synthetic["y"])
+    result = distributed.launch(
+        _fit_classifier,
+        kwargs["world_size"],
+        MixedDataset(
+            x_real=x,
+            y_real=y,
+            x_synthetic=x_synthetic,
+            y_synthetic=y_synthetic,
+            transform=(
+                Augmenter(**kwargs["Augmenter_kwargs"])
+                if kwargs["Augmenter_kwargs"]
+                else None
+            ),
+        ),
+        y,
+        y_synthetic,
+        np.asarray(real["x_valid"]),
+        np.asarray(real["y_valid"]),
+        dict(n_bands=x.shape[1], n_classes=len(metadata["labels"]) - 1),
+        kwargs,
+        checkpoints,
+    )
+    logger.info("Classifier training: %.1f samples/s", result["samples_per_second"])
+    classifier: Dict[str, Any] = result["classifier"]
+    return classifier
+
+
+def benchmark_scaling(
+    real: Mapping[str, np.ndarray],
+    metadata: Dict[str, Any],
+    train_kwargs: Dict[str, Any],
+    kwargs: Dict[str, Any],
+) -> List[Dict[str, float]]:
+    """Measure GAN training throughput and scaling efficiency per worker count.
+
+    Efficiency is the throughput with `n` workers divided by `n` times the
+    throughput with one worker.
+    """
+    if kwargs["world_sizes"][:1] != [1]:
+        raise ValueError(
+            f"The first of world_sizes must be 1, got {kwargs['world_sizes']}."
+        )
+    x, y = real["x_train"], np.asarray(real["y_train"])
+    epochs = kwargs["epochs"]
+    report: List[Dict[str, float]] = []
+    per_worker = 0.0
+    for size in kwargs["world_sizes"]:
+        with tempfile.TemporaryDirectory() as directory:
+            result = distributed.launch(
+                _fit_gan,
+                size,
+                MixedDataset(x_real=x, y_real=y),
+                y,
+                np.asarray(real["x_valid"]),
+                np.asarray(real["y_valid"]),
+                dict(n_bands=x.shape[1], n_classes=len(metadata["labels"]) - 1),
+                dict(train_kwargs, epochs=epochs, validate_every=0),
+                dict(
+                    directory=directory,
+                    Checkpointer_kwargs=dict(every=epochs + 1, resume=False),
+                ),
+            )
+        throughput = result["samples_per_second"]
+        per_worker = per_worker or throughput
+        report.append(
+            dict(
+                world_size=size,
+                samples_per_second=throughput,
+                efficiency=throughput / (size * per_worker),
+            )
+        )
+        logger.info("Scaling with %d workers: %s", size, report[-1])
+    return report
@@ -0,0 +1,153 @@
+# Copyright 2021 QuantumBlack Visual Analytics Limited
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES
+# OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE, AND
+# NONINFRINGEMENT. IN NO EVENT WILL THE LICENSOR OR OTHER CONTRIBUTORS
+# BE LIABLE FOR ANY CLAIM, DAMAGES, OR OTHER LIABILITY, WHETHER IN AN
+# ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF, OR IN
+# CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+#
+# The QuantumBlack Visual Analytics Limited ("QuantumBlack") name and logo
+# (either separately or in combination, "QuantumBlack Trademarks") are
+# trademarks of QuantumBlack. The License does not grant you any right or
+# license to the QuantumBlack Trademarks. You may not use the QuantumBlack
+# Trademarks or any confusingly similar mark as a trademark for your product,
+# or use the QuantumBlack Trademarks in any other manner that might cause
+# confusion in the marketplace, including but not limited to in advertising,
+# on websites, or on software.
+#
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+"""Pipeline structure for model training tasks."""
+
+from kedro.pipeline.node import node
+from kedro.pipeline.pipeline import Pipeline
+
+from hyperspec_wgan.pipelines.model_evaluation.nodes import (
+    build_spectral_index,
+    screen_samples,
+)
+
+from .nodes import (
+    benchmark_scaling,
+    build_augmenter,
+    generate,
+    train_classifier,
+    train_gan,
+)
+
+
+def model_training_pipeline() -> Pipeline:
+    """Create the model training pipeline.
+
+    Synthetic samples are screened for memorised training spectra before the
+    classifier is trained on them.
+    """
+    return Pipeline(
+        nodes=[
+            node(
+                func=train_gan,
+                inputs={
+                    "real": "model_input_classified",
+                    "metadata": "params:metadata",
+                    "kwargs": "params:train_gan",
+                    "checkpoints": "params:checkpoints",
+                },
+                outputs={
+                    "generator": "model_generator",
+                    "critic": "model_critic",
+                },
+                name="train-gan",
+                tags="gan",
+            ),
+            node(
+                func=generate,
+                inputs={
+                    "generator": "model_generator",
+                    "real": "model_input_classified",
+                    "kwargs": "params:generate",
+                },
+                outputs="model_output_synthetic",
+                name="generate-samples",
+                tags="gan",
+            ),
+            node(
+                func=build_spectral_index,
+                inputs={
+                    "real": "model_input_classified",
+                    "kwargs": "params:build_spectral_index",
+                },
+                outputs="model_spectral_index",
+                name="build-spectral-index",
+                tags="gan",
+            ),
+            node(
+                func=screen_samples,
+                inputs={
+                    "index": "model_spectral_index",
+                    "synthetic": "model_output_synthetic",
+                    "kwargs": "params:screen_samples",
+                },
+                outputs="model_output_synthetic_screened",
+                name="screen-samples",
+                tags="gan",
+            ),
+            node(
+                func=train_classifier,
+                inputs={
+                    "real": "model_input_classified",
+                    "synthetic": "model_output_synthetic_screened",
+                    "metadata": "params:metadata",
+                    "kwargs": "params:train_classifier",
+                    "checkpoints": "params:checkpoints",
+                },
+                outputs="model_classifier",
+                name="train-classifier",
+                tags="tcn",
+            ),
+        ]
+    )
+
+
+def augmentation_pipeline() -> Pipeline:
+    """Create the classical augmentation baseline pipeline."""
+    return Pipeline(
+        nodes=[
+            node(
+                func=build_augmenter,
+                inputs="params:augment",
+                outputs="model_augmenter",
+                name="build-augmenter",
+                tags="augmentation",
+            ),
+        ]
+    )
+
+
+def scaling_benchmark_pipeline() -> Pipeline:
+    """Create the data-parallel scaling benchmark pipeline."""
+    return Pipeline(
+        nodes=[
+            node(
+                func=benchmark_scaling,
+                inputs={
+                    "real": "model_input_classified",
+                    "metadata": "params:metadata",
+                    "train_kwargs": "params:train_gan",
+                    "kwargs": "params:benchmark_scaling",
+                },
+                outputs="reporting_scaling",
+                name="benchmark-scaling",
+                tags="gan",
+            ),
+        ]
+    )
@@ -0,0 +1,103 @@
+# Copyright 2021 QuantumBlack Visual Analytics Limited
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES
+# OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE, AND
+# NONINFRINGEMENT. IN NO EVENT WILL THE LICENSOR OR OTHER CONTRIBUTORS
+# BE LIABLE FOR ANY CLAIM, DAMAGES, OR OTHER LIABILITY, WHETHER IN AN
+# ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF, OR IN
+# CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+#
+# The QuantumBlack Visual Analytics Limited ("QuantumBlack") name and logo
+# (either separately or in combination, "QuantumBlack Trademarks") are
+# trademarks of QuantumBlack. The License does not grant you any right or
+# license to the QuantumBlack Trademarks. You may not use the QuantumBlack
+# Trademarks or any confusingly similar mark as a trademark for your product,
+# or use the QuantumBlack Trademarks in any other manner that might cause
+# confusion in the marketplace, including but not limited to in advertising,
+# on websites, or on software.
+#
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+"""Tests for `BundleDataSet`."""
+
+import numpy as np
+import pytest
+from kedro.io.core import DataSetError
+
+from hyperspec_wgan.extras.datasets.bundle import ALIGNMENT, BundleDataSet
+
+
+@pytest.fixture
+def arrays():
+    rng = np.random.default_rng(seed=0)
+    return dict(
+        x_train=rng.random((50, 7), dtype=np.float32),
+        y_train=rng.integers(1, 5, size=50).astype(np.uint8),
+        x_test=rng.random((20, 7)),
+        empty=np.empty((0, 7), dtype=np.float32),
+    )
+
+
+def test_round_trip(tmp_path, arrays):
+    dataset = BundleDataSet(
+        filepath=str(tmp_path / "split.bundle"), uncompressed=["x_train", "y_train"]
+    )
+    dataset.save(arrays)
+    bundle = dataset.load()
+    assert set(bundle) == set(arrays)
+    for key, array in arrays.items():
+        assert bundle[key].dtype == array.dtype
+        np.testing.assert_array_equal(bundle[key], array)
+
+
+def test_raw_members_are_aligned_and_memory_mapped(tmp_path, arrays):
+    dataset = BundleDataSet(
+        filepath=str(tmp_path / "split.bundle"), uncompressed=["x_train"]
+    )
+    dataset.save(arrays)
+    bundle = dataset.load()
+    assert bundle.header("x_train")["codec"] == "raw"
+    assert bundle.header("x_train")["offset"] % ALIGNMENT == 0
+    assert isinstance(bundle["x_train"], np.memmap)
+    assert bundle.header("x_test")["codec"] == "zlib"
+
+
+def test_load_rejects_other_files(tmp_path):
+    filepath = tmp_path / "split.bundle"
+    filepath.write_bytes(b"not a bundle" * 4)
+    with pytest.raises(DataSetError, match="not a bundle file"):
+        BundleDataSet(filepath=str(filepath)).load()
+
+
+def test_save_batches_streams_members(tmp_path):
+    rng = np.random.default_rng(seed=1)
+    batches = [
+        dict(x=rng.random((n, 3), dtype=np.float32), y=np.full(n, n, dtype=np.int64))
+        for n in (4, 0, 7)
+    ]
+    dataset = BundleDataSet(
+        filepath=str(tmp_path / "screened.bundle"), uncompressed=["x"]
+    )
+    dataset.save(iter(batches))
+    bundle = dataset.load()
+    for key in ("x", "y"):
+        expected = np.concatenate([batch[key] for batch in batches])
+        np.testing.assert_array_equal(bundle[key], expected)
+    assert bundle.header("x")["codec"] == "raw"
+    assert bundle.header("y")["codec"] == "zlib"
+
+
+def test_save_batches_rejects_mismatched_batches(tmp_path):
+    batches = [dict(x=np.zeros((2, 3))), dict(x=np.zeros((2, 4)))]
+    dataset = BundleDataSet(filepath=str(tmp_path / "screened.bundle"))
+    with pytest.raises(DataSetError, match="does not match"):
+        dataset.save(iter(batches))
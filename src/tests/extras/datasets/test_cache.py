@@ -0,0 +1,152 @@
+# Copyright 2021 QuantumBlack Visual Analytics Limited
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES
+# OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE, AND
+# NONINFRINGEMENT. IN NO EVENT WILL THE LICENSOR OR OTHER CONTRIBUTORS
+# BE LIABLE FOR ANY CLAIM, DAMAGES, OR OTHER LIABILITY, WHETHER IN AN
+# ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF, OR IN
+# CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+#
+# The QuantumBlack Visual Analytics Limited ("QuantumBlack") name and logo
+# (either separately or in combination, "QuantumBlack Trademarks") are
+# trademarks of QuantumBlack. The License does not grant you any right or
+# license to the QuantumBlack Trademarks. You may not use the QuantumBlack
+# Trademarks or any confusingly similar mark as a trademark for your product,
+# or use the QuantumBlack Trademarks in any other manner that might cause
+# confusion in the marketplace, including but not limited to in advertising,
+# on websites, or on software.
+#
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+"""Tests for the read-through cache, on fsspec's in-memory file system."""
+
+import os
+from unittest import mock
+
+import fsspec
+import numpy as np
+import pytest
+
+from hyperspec_wgan.extras.datasets.cache import ReadThroughCache, open_cached
+from hyperspec_wgan.extras.datasets.numpy import NumpyDataSet
+
+
+@pytest.fixture
+def filesystem():
+    filesystem = fsspec.filesystem("memory")
+    yield filesystem
+    filesystem.store.clear()
+    filesystem.pseudo_dirs[:] = [""]
+
+
+def _write(filesystem, path, data):
+    with filesystem.open(path, mode="wb") as openfile:
+        openfile.write(data)
+
+
+def _cached_files(directory):
+    return sorted(
+        path.name
+        for path in directory.rglob("*")
+        if path.is_file() and not path.name.endswith((".lock", ".tmp"))
+    )
+
+
+def test_whole_file_hit_and_miss(tmp_path, filesystem):
+    cache = ReadThroughCache(directory=str(tmp_path))
+    _write(filesystem, "/scene/image.bin", b"a" * 100)
+    with mock.patch.object(filesystem, "open", wraps=filesystem.open) as remote:
+        for _ in range(2):
+            with open_cached(filesystem, "/scene/image.bin", cache) as openfile:
+                assert openfile.read() == b"a" * 100
+        assert remote.call_count == 1
+        _write(filesystem, "/scene/image.bin", b"b" * 120)
+        remote.reset_mock()
+        with open_cached(filesystem, "/scene/image.bin", cache) as openfile:
+            assert openfile.read() == b"b" * 120
+        assert remote.call_count == 1
+
+
+def test_eviction_keeps_cache_within_max_size(tmp_path, filesystem):
+    cache = ReadThroughCache(directory=str(tmp_path), max_size=250)
+    for name in "abc":
+        _write(filesystem, f"/scene/{name}.bin", name.encode() * 100)
+        with open_cached(filesystem, f"/scene/{name}.bin", cache) as openfile:
+            openfile.read()
+    sizes = [
+        path.stat().st_size for path in tmp_path.iterdir() if ".lock" not in path.name
+    ]
+    assert sum(sizes) <= 250
+    assert len(_cached_files(tmp_path)) == 2
+
+
+def test_evicted_entries_take_their_lock_files(tmp_path, filesystem):
+    cache = ReadThroughCache(directory=str(tmp_path), max_size=250)
+    for name in "abcde":
+        _write(filesystem, f"/scene/{name}.bin", name.encode() * 100)
+        with open_cached(filesystem, f"/scene/{name}.bin", cache) as openfile:
+            openfile.read()
+    locks = {path.stem for path in tmp_path.glob("*.lock")}
+    assert locks == {"cache", *_cached_files(tmp_path)}
+
+
+def test_block_reads_scan_the_cache_only_when_full(tmp_path, filesystem):
+    cache = ReadThroughCache(directory=str(tmp_path), block_size=16, max_size=200)
+    data = bytes(range(256))
+    _write(filesystem, "/scene/image.bin", data)
+    walk = "hyperspec_wgan.extras.datasets.cache.os.walk"
+    with mock.patch(walk, wraps=os.walk) as scans:
+        with open_cached(filesystem, "/scene/image.bin", cache) as openfile:
+            assert openfile.read() == data
+        assert scans.call_count == 5
+    blocks = [path for path in tmp_path.glob("*.blocks/*") if path.name.isdigit()]
+    assert sum(path.stat().st_size for path in blocks) <= 200
+
+
+def test_files_in_use_are_not_evicted(tmp_path, filesystem):
+    cache = ReadThroughCache(directory=str(tmp_path), max_size=150)
+    for name in "abc":
+        _write(filesystem, f"/scene/{name}.bin", name.encode() * 100)
+    with cache.local_copy(filesystem, "/scene/a.bin") as local_path:
+        for name in "bc":
+            with open_cached(filesystem, f"/scene/{name}.bin", cache) as openfile:
+                openfile.read()
+        with open(local_path, mode="rb") as openfile:
+            assert openfile.read() == b"a" * 100
+
+
+def test_block_reads_open_the_remote_file_once_per_span(tmp_path, filesystem):
+    cache = ReadThroughCache(directory=str(tmp_path), block_size=16)
+    data = bytes(range(100))
+    _write(filesystem, "/scene/image.bin", data)
+    with mock.patch.object(filesystem, "open", wraps=filesystem.open) as remote:
+        with open_cached(filesystem, "/scene/image.bin", cache) as openfile:
+            openfile.seek(20)
+            assert openfile.read(40) == data[20:60]
+        assert remote.call_count == 1
+        with open_cached(filesystem, "/scene/image.bin", cache) as openfile:
+            openfile.seek(20)
+            assert openfile.read(40) == data[20:60]
+            assert openfile.read() == data[60:]
+        assert remote.call_count == 2
+    assert _cached_files(tmp_path) == ["1", "2", "3", "4", "5", "6"]
+
+
+def test_numpy_dataset_reads_through_cache(tmp_path, filesystem):
+    array = np.arange(60, dtype=np.float32).reshape(3, 4, 5)
+    cache = dict(directory=str(tmp_path / "cache"))
+    NumpyDataSet(filepath="memory://scene/image.npy").save(array)
+    loaded = NumpyDataSet(
+        filepath="memory://scene/image.npy", cache=cache, mmap_mode="r"
+    )
+    np.testing.assert_array_equal(loaded.load(), array)
+    assert len(_cached_files(tmp_path / "cache")) == 1
@@ -0,0 +1,114 @@
+# Copyright 2021 QuantumBlack Visual Analytics Limited
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES
+# OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE, AND
+# NONINFRINGEMENT. IN NO EVENT WILL THE LICENSOR OR OTHER CONTRIBUTORS
+# BE LIABLE FOR ANY CLAIM, DAMAGES, OR OTHER LIABILITY, WHETHER IN AN
+# ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF, OR IN
+# CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+#
+# The QuantumBlack Visual Analytics Limited ("QuantumBlack") name and logo
+# (either separately or in combination, "QuantumBlack Trademarks") are
+# trademarks of QuantumBlack. The License does not grant you any right or
+# license to the QuantumBlack Trademarks. You may not use the QuantumBlack
+# Trademarks or any confusingly similar mark as a trademark for your product,
+# or use the QuantumBlack Trademarks in any other manner that might cause
+# confusion in the marketplace, including but not limited to in advertising,
+# on websites, or on software.
+#
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+"""Tests for the classical spectral augmentations."""
+
+import pickle
+from unittest import mock
+
+import numpy as np
+import pytest
+import torch
+
+from hyperspec_wgan.extras.augmentation import (
+    AUGMENTATIONS,
+    Augmenter,
+    augment_classes,
+    mixup,
+)
+from hyperspec_wgan.extras.sampling import MixedDataset
+
+
+@pytest.fixture
+def batch():
+    rng = np.random.default_rng(seed=0)
+    x = rng.random((40, 25), dtype=np.float32) + 0.5
+    y = np.repeat(np.array([1, 2, 3, 4], dtype=np.uint8), [15, 15, 9, 1])
+    return x, y
+
+
+@pytest.mark.parametrize("name", sorted(AUGMENTATIONS))
+def test_augmentations_keep_shape_dtype_and_labels(batch, name):
+    x, y = batch
+    x_out, y_out = AUGMENTATIONS[name](x, y, rng=np.random.default_rng(seed=1))
+    assert x_out.shape == x.shape
+    assert x_out.dtype == np.float32
+    np.testing.assert_array_equal(y_out, y)
+    assert np.isfinite(x_out).all()
+    assert not np.allclose(x_out, x)
+
+
+def test_mixup_stays_within_class(batch):
+    x, y = batch
+    x = np.repeat(y[:, None], x.shape[1], axis=1).astype(np.float32)
+    x_out, _ = mixup(x, y, rng=np.random.default_rng(seed=1))
+    np.testing.assert_allclose(x_out, x, rtol=1e-6)
+
+
+def _augmenter():
+    return Augmenter(
+        augmentations=dict(gaussian_noise=dict(std=0.1), illumination=None), seed=3
+    )
+
+
+def test_augmenter_streams_depend_on_seed_rank_and_epoch(batch):
+    x, y = batch
+    first = _augmenter()(x, y)[0]
+    np.testing.assert_array_equal(first, _augmenter()(x, y)[0])
+    augmenter = pickle.loads(pickle.dumps(_augmenter()))
+    with mock.patch("hyperspec_wgan.extras.distributed.rank", return_value=1):
+        other_rank = augmenter(x, y)[0]
+    assert not np.allclose(first, other_rank)
+    augmenter = _augmenter()
+    augmenter.set_epoch(1)
+    other_epoch = augmenter(x, y)[0]
+    assert not np.allclose(first, other_epoch)
+    augmenter.set_epoch(0)
+    np.testing.assert_array_equal(augmenter(x, y)[0], first)
+
+
+def test_mixed_dataset_passes_epochs_to_augmenter(batch):
+    x, y = batch
+    augmenter = _augmenter()
+    dataset = MixedDataset(x_real=x, y_real=y, transform=augmenter)
+    indices = np.arange(10)
+    first = dataset[indices][0]
+    dataset.set_epoch(1)
+    assert not torch.allclose(dataset[indices][0], first)
+    dataset.set_epoch(0)
+    torch.testing.assert_close(dataset[indices][0], first)
+
+
+def test_augment_classes_draws_each_class(batch):
+    x, y = batch
+    x_out, y_out = augment_classes(
+        x=x, y=y, augmenter=_augmenter(), samples_per_class=7, batch_size=6
+    )
+    assert x_out.shape == (28, x.shape[1])
+    np.testing.assert_array_equal(np.bincount(y_out)[1:], [7, 7, 7, 7])
@@ -0,0 +1,86 @@
+# Copyright 2021 QuantumBlack Visual Analytics Limited
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES
+# OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE, AND
+# NONINFRINGEMENT. IN NO EVENT WILL THE LICENSOR OR OTHER CONTRIBUTORS
+# BE LIABLE FOR ANY CLAIM, DAMAGES, OR OTHER LIABILITY, WHETHER IN AN
+# ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF, OR IN
+# CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+#
+# The QuantumBlack Visual Analytics Limited ("QuantumBlack") name and logo
+# (either separately or in combination, "QuantumBlack Trademarks") are
+# trademarks of QuantumBlack. The License does not grant you any right or
+# license to the QuantumBlack Trademarks. You may not use the QuantumBlack
+# Trademarks or any confusingly similar mark as a trademark for your product,
+# or use the QuantumBlack Trademarks in any other manner that might cause
+# confusion in the marketplace, including but not limited to in advertising,
+# on websites, or on software.
+#
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+"""Tests for the classical baselines."""
+
+import logging
+from collections import Counter
+
+import numpy as np
+import pytest
+
+from hyperspec_wgan.extras.baselines import evaluate_baselines
+
+
+@pytest.fixture
+def real():
+    rng = np.random.default_rng(seed=0)
+    centres = rng.random((3, 10)) * 4
+
+    def split(n):
+        y = np.resize(np.array([1, 2, 3], dtype=np.uint8), n)
+        return centres[y - 1] + rng.standard_normal((n, 10)), y
+
+    (x_train, y_train), (x_test, y_test) = split(60), split(30)
+    return dict(x_train=x_train, y_train=y_train, x_test=x_test, y_test=y_test)
+
+
+def _evaluate(real, synthetic, **kwargs):
+    return evaluate_baselines(
+        real=real,
+        synthetic=synthetic,
+        models=dict(
+            knn=dict(n_neighbors=3), svm={}, random_forest=dict(n_estimators=5)
+        ),
+        seeds=[0, 1, 2],
+        PCA_kwargs=dict(n_components=4),
+        Parallel_kwargs=dict(n_jobs=1),
+        **kwargs,
+    )
+
+
+def test_deterministic_jobs_run_once(real):
+    synthetic = dict(gan=dict(x=real["x_train"] + 0.1, y=real["y_train"]))
+    rows = _evaluate(real, synthetic, ratios=[0.0, 0.5, 1.0])
+    runs = Counter((row["model"], row["source"], row["ratio"]) for row in rows)
+    assert runs[("knn", "real", 0.0)] == 1
+    assert runs[("svm", "real", 0.0)] == 1
+    assert runs[("random_forest", "real", 0.0)] == 3
+    assert runs[("knn", "gan", 0.5)] == 3
+    assert runs[("knn", "gan", 1.0)] == 1
+    assert all(0.0 <= row["accuracy"] <= 1.0 for row in rows)
+    assert all(row["samples"] == 60 * (1 + row["ratio"]) for row in rows)
+
+
+def test_small_synthetic_pool_warns(real, caplog):
+    synthetic = dict(gan=dict(x=real["x_train"][:20], y=real["y_train"][:20]))
+    with caplog.at_level(logging.WARNING):
+        rows = _evaluate(real, synthetic, ratios=[0.0, 1.0])
+    assert "fewer than the 60 needed" in caplog.text
+    assert {row["samples"] for row in rows if row["source"] == "gan"} == {80}
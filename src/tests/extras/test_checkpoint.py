@@ -0,0 +1,120 @@
+# Copyright 2021 QuantumBlack Visual Analytics Limited
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES
+# OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE, AND
+# NONINFRINGEMENT. IN NO EVENT WILL THE LICENSOR OR OTHER CONTRIBUTORS
+# BE LIABLE FOR ANY CLAIM, DAMAGES, OR OTHER LIABILITY, WHETHER IN AN
+# ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF, OR IN
+# CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+#
+# The QuantumBlack Visual Analytics Limited ("QuantumBlack") name and logo
+# (either separately or in combination, "QuantumBlack Trademarks") are
+# trademarks of QuantumBlack. The License does not grant you any right or
+# license to the QuantumBlack Trademarks. You may not use the QuantumBlack
+# Trademarks or any confusingly similar mark as a trademark for your product,
+# or use the QuantumBlack Trademarks in any other manner that might cause
+# confusion in the marketplace, including but not limited to in advertising,
+# on websites, or on software.
+#
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+"""Tests for resumable training checkpoints."""
+
+import random
+from unittest import mock
+
+import numpy as np
+import pytest
+import torch
+
+from hyperspec_wgan.extras.checkpoint import Checkpointer, fingerprint
+
+CONFIG = dict(hidden_dims=[8], lr=0.1)
+
+
+def _objects(seed):
+    torch.manual_seed(seed)
+    module = torch.nn.Linear(3, 2)
+    return dict(module=module, optimizer=torch.optim.SGD(module.parameters(), lr=0.1))
+
+
+def _checkpointer(directory, run, config=None, **kwargs):
+    with mock.patch(
+        "hyperspec_wgan.extras.checkpoint.generate_timestamp", return_value=run
+    ):
+        return Checkpointer(directory=str(directory), config=config or CONFIG, **kwargs)
+
+
+def _runs(directory, config=None):
+    return sorted(
+        path.name for path in (directory / fingerprint(config or CONFIG)).iterdir()
+    )
+
+
+@pytest.mark.parametrize("resume", [True, False])
+def test_restore_resumes_incomplete_run(tmp_path, resume):
+    objects = _objects(seed=0)
+    checkpointer = _checkpointer(tmp_path, run="run-1", keep=2)
+    for epoch in range(3):
+        checkpointer.save(epoch=epoch, objects=objects)
+    assert len(list((tmp_path / fingerprint(CONFIG) / "run-1").iterdir())) == 2
+    random.seed(1)
+    checkpointer.save(epoch=3, objects=objects)
+    expected = random.random(), np.random.random(), torch.rand(1).item()
+
+    restored = _objects(seed=1)
+    start = _checkpointer(tmp_path, run="run-2", resume=resume).restore(
+        objects=restored
+    )
+    if not resume:
+        assert start == 0
+        return
+    assert start == 4
+    torch.testing.assert_close(
+        restored["module"].weight, objects["module"].weight, rtol=0, atol=0
+    )
+    assert (random.random(), np.random.random(), torch.rand(1).item()) == pytest.approx(
+        expected
+    )
+
+
+def test_complete_run_is_not_resumed_and_prunes_earlier_runs(tmp_path):
+    objects = _objects(seed=0)
+    _checkpointer(tmp_path, run="run-1").save(epoch=0, objects=objects)
+    checkpointer = _checkpointer(tmp_path, run="run-2", every=2)
+    assert checkpointer.restore(objects=objects) == 1
+    checkpointer.save(epoch=1, objects=objects, complete=True)
+    assert _runs(tmp_path) == ["run-2"]
+    assert _checkpointer(tmp_path, run="run-3").restore(objects=objects) == 0
+
+
+def test_complete_run_keeps_later_runs_and_other_configs(tmp_path):
+    objects = _objects(seed=0)
+    other = dict(CONFIG, lr=0.01)
+    _checkpointer(tmp_path, run="run-1", config=other).save(epoch=0, objects=objects)
+    _checkpointer(tmp_path, run="run-3").save(epoch=0, objects=objects)
+    checkpointer = _checkpointer(tmp_path, run="run-2", resume=False)
+    checkpointer.save(epoch=0, objects=objects, complete=True)
+    assert _runs(tmp_path) == ["run-2", "run-3"]
+    assert _runs(tmp_path, config=other) == ["run-1"]
+
+
+def test_restore_skips_checkpoints_of_other_configs(tmp_path):
+    objects = _objects(seed=0)
+    _checkpointer(tmp_path, run="run-1").save(epoch=0, objects=objects)
+    other = _checkpointer(tmp_path, run="run-2", config=dict(CONFIG, lr=0.01))
+    assert other.restore(objects=_objects(seed=1)) == 0
+
+
+def test_keep_must_be_positive(tmp_path):
+    with pytest.raises(ValueError, match="keep must be at least 1"):
+        _checkpointer(tmp_path, run="run-1", keep=0)
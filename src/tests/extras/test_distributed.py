@@ -0,0 +1,74 @@
+# Copyright 2021 QuantumBlack Visual Analytics Limited
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES
+# OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE, AND
+# NONINFRINGEMENT. IN NO EVENT WILL THE LICENSOR OR OTHER CONTRIBUTORS
+# BE LIABLE FOR ANY CLAIM, DAMAGES, OR OTHER LIABILITY, WHETHER IN AN
+# ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF, OR IN
+# CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+#
+# The QuantumBlack Visual Analytics Limited ("QuantumBlack") name and logo
+# (either separately or in combination, "QuantumBlack Trademarks") are
+# trademarks of QuantumBlack. The License does not grant you any right or
+# license to the QuantumBlack Trademarks. You may not use the QuantumBlack
+# Trademarks or any confusingly similar mark as a trademark for your product,
+# or use the QuantumBlack Trademarks in any other manner that might cause
+# confusion in the marketplace, including but not limited to in advertising,
+# on websites, or on software.
+#
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+"""Tests for gloo data-parallel training helpers."""
+
+import torch
+from torch import nn
+
+from hyperspec_wgan.extras import distributed
+
+
+def _step():
+    torch.manual_seed(distributed.rank())
+    module = nn.Sequential(nn.Linear(3, 2), nn.BatchNorm1d(2))
+    distributed.broadcast_module(module=module)
+    initial = [tensor.clone() for tensor in module.parameters()]
+    module(torch.randn(8, 3) + distributed.rank()).sum().backward()
+    distributed.all_reduce_gradients(parameters=module.parameters())
+    distributed.all_reduce_buffers(module=module)
+    return dict(
+        rank=distributed.rank(),
+        world_size=distributed.world_size(),
+        initial=initial,
+        gradients=[tensor.grad for tensor in module.parameters()],
+        buffers=[buffer.clone() for buffer in module.buffers()],
+    )
+
+
+def _gather():
+    result = _step()
+    gathered = [None, None]
+    torch.distributed.all_gather_object(gathered, result)
+    return gathered
+
+
+def test_ranks_stay_in_step_with_gloo():
+    results = distributed.launch(_gather, 2)
+    assert [result["rank"] for result in results] == [0, 1]
+    assert all(result["world_size"] == 2 for result in results)
+    for key in ("initial", "gradients", "buffers"):
+        for first, second in zip(results[0][key], results[1][key]):
+            torch.testing.assert_close(first, second)
+
+
+def test_helpers_fall_back_outside_a_process_group():
+    result = distributed.launch(_step, 1)
+    assert result["rank"] == 0
+    assert result["world_size"] == 1
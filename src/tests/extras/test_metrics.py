@@ -0,0 +1,104 @@
+# Copyright 2021 QuantumBlack Visual Analytics Limited
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES
+# OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE, AND
+# NONINFRINGEMENT. IN NO EVENT WILL THE LICENSOR OR OTHER CONTRIBUTORS
+# BE LIABLE FOR ANY CLAIM, DAMAGES, OR OTHER LIABILITY, WHETHER IN AN
+# ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF, OR IN
+# CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+#
+# The QuantumBlack Visual Analytics Limited ("QuantumBlack") name and logo
+# (either separately or in combination, "QuantumBlack Trademarks") are
+# trademarks of QuantumBlack. The License does not grant you any right or
+# license to the QuantumBlack Trademarks. You may not use the QuantumBlack
+# Trademarks or any confusingly similar mark as a trademark for your product,
+# or use the QuantumBlack Trademarks in any other manner that might cause
+# confusion in the marketplace, including but not limited to in advertising,
+# on websites, or on software.
+#
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+"""Tests for sample-quality metrics."""
+
+import numpy as np
+import pytest
+
+from hyperspec_wgan.extras.metrics import (
+    knn_precision_recall,
+    mmd_rbf,
+    nearest_spectral_angles,
+    score_samples,
+)
+
+
+@pytest.fixture
+def samples():
+    rng = np.random.default_rng(seed=0)
+    return rng.normal(size=(300, 8)), rng.normal(size=(200, 8))
+
+
+def _exact_mmd(x, y, gamma):
+    def kernel(a, b):
+        return np.exp(-gamma * ((a[:, None] - b[None]) ** 2).sum(axis=2))
+
+    n, m = len(x), len(y)
+    xx = (kernel(x, x).sum() - n) / (n * (n - 1))
+    yy = (kernel(y, y).sum() - m) / (m * (m - 1))
+    return xx + yy - 2 * kernel(x, y).mean()
+
+
+@pytest.mark.parametrize("chunk_size,n_jobs", [(1024, 1), (64, 1), (37, 3)])
+def test_mmd_matches_dense_computation(samples, chunk_size, n_jobs):
+    x, y = samples
+    expected = _exact_mmd(x, y, gamma=0.1)
+    actual = mmd_rbf(x, y, gamma=0.1, chunk_size=chunk_size, n_jobs=n_jobs)
+    assert actual == pytest.approx(expected, rel=1e-9, abs=1e-12)
+
+
+def test_mmd_separates_shifted_samples(samples):
+    x, y = samples
+    assert mmd_rbf(x, y + 3.0) > 10 * abs(mmd_rbf(x, y))
+
+
+def test_mmd_needs_two_samples_per_set(samples):
+    x, y = samples
+    with pytest.raises(ValueError, match="at least two samples"):
+        mmd_rbf(x, y[:1])
+
+
+def test_nearest_spectral_angles(samples):
+    x, _ = samples
+    angles = nearest_spectral_angles(x=2.0 * x[:50], y=x, chunk_size=16)
+    np.testing.assert_allclose(angles, 0.0, atol=1e-6)
+
+
+def test_knn_precision_recall_of_identical_sets(samples):
+    x, _ = samples
+    scores = knn_precision_recall(real=x, fake=x.copy(), k=3, chunk_size=50)
+    assert scores == dict(precision=1.0, recall=1.0)
+
+
+def test_score_samples_skips_small_classes(samples):
+    x, y = samples
+    y_real = np.repeat([1, 2], [299, 1])
+    y_fake = np.repeat([1, 2], [199, 1])
+    scores = score_samples(x, y_real, y, y_fake, max_samples=100, chunk_size=32)
+    assert set(scores) == {"1", "mean"}
+    assert set(scores["mean"]) == {
+        "mmd",
+        "sam_mean_spectrum",
+        "sam_nearest_mean",
+        "sam_nearest_median",
+        "sam_nearest_p95",
+        "precision",
+        "recall",
+    }
@@ -0,0 +1,87 @@
+# Copyright 2021 QuantumBlack Visual Analytics Limited
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES
+# OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE, AND
+# NONINFRINGEMENT. IN NO EVENT WILL THE LICENSOR OR OTHER CONTRIBUTORS
+# BE LIABLE FOR ANY CLAIM, DAMAGES, OR OTHER LIABILITY, WHETHER IN AN
+# ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF, OR IN
+# CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+#
+# The QuantumBlack Visual Analytics Limited ("QuantumBlack") name and logo
+# (either separately or in combination, "QuantumBlack Trademarks") are
+# trademarks of QuantumBlack. The License does not grant you any right or
+# license to the QuantumBlack Trademarks. You may not use the QuantumBlack
+# Trademarks or any confusingly similar mark as a trademark for your product,
+# or use the QuantumBlack Trademarks in any other manner that might cause
+# confusion in the marketplace, including but not limited to in advertising,
+# on websites, or on software.
+#
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+"""Tests for the spectral nearest-neighbour index."""
+
+import numpy as np
+import pytest
+
+from hyperspec_wgan.extras.neighbors import SpectralIndex, screen_batches
+
+
+@pytest.fixture
+def spectra():
+    rng = np.random.default_rng(seed=0)
+    return rng.random((400, 30)) + 0.1, rng.random((50, 30)) + 0.1
+
+
+def _angles(x, y):
+    x = x / np.linalg.norm(x, axis=1, keepdims=True)
+    y = y / np.linalg.norm(y, axis=1, keepdims=True)
+    return np.arccos(np.clip(x @ y.T, -1.0, 1.0))
+
+
+@pytest.mark.parametrize("candidates", [400, None])
+def test_query_matches_brute_force(spectra, candidates):
+    real, fake = spectra
+    index = SpectralIndex(n_components=5, candidates=candidates).fit(x=real)
+    nearest = index.query(x=fake, chunk_size=16)
+    angles = _angles(fake, real)
+    np.testing.assert_array_equal(nearest["index"], angles.argmin(axis=1))
+    np.testing.assert_allclose(nearest["angle"], angles.min(axis=1), atol=1e-3)
+    distances = np.linalg.norm(fake - real[nearest["index"]], axis=1)
+    np.testing.assert_allclose(nearest["distance"], distances, rtol=1e-4)
+
+
+@pytest.mark.parametrize("candidates", [16, None])
+def test_query_empty_batch(spectra, candidates):
+    real, _ = spectra
+    index = SpectralIndex(n_components=5, candidates=candidates).fit(x=real)
+    nearest = index.query(x=real[:0])
+    assert all(len(values) == 0 for values in nearest.values())
+
+
+@pytest.mark.parametrize("drop", [True, False])
+def test_screen_batches_flags_scaled_copies(spectra, drop):
+    real, fake = spectra
+    x = np.concatenate([real[:5] * 2.0, fake])
+    y = np.arange(len(x))
+    index = SpectralIndex(n_components=5).fit(x=real)
+    batches = [(x[:20], y[:20]), (x[20:], y[20:])]
+    screened = list(
+        screen_batches(batches=batches, index=index, max_angle=1e-3, drop=drop)
+    )
+    kept = np.concatenate([batch["y"] for batch in screened])
+    memorised = np.concatenate([batch["memorised"] for batch in screened])
+    if drop:
+        np.testing.assert_array_equal(kept, y[5:])
+        assert not memorised.any()
+    else:
+        np.testing.assert_array_equal(kept, y)
+        np.testing.assert_array_equal(np.flatnonzero(memorised), np.arange(5))
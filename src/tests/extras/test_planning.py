@@ -0,0 +1,212 @@
+# Copyright 2021 QuantumBlack Visual Analytics Limited
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES
+# OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE, AND
+# NONINFRINGEMENT. IN NO EVENT WILL THE LICENSOR OR OTHER CONTRIBUTORS
+# BE LIABLE FOR ANY CLAIM, DAMAGES, OR OTHER LIABILITY, WHETHER IN AN
+# ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF, OR IN
+# CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+#
+# The QuantumBlack Visual Analytics Limited ("QuantumBlack") name and logo
+# (either separately or in combination, "QuantumBlack Trademarks") are
+# trademarks of QuantumBlack. The License does not grant you any right or
+# license to the QuantumBlack Trademarks. You may not use the QuantumBlack
+# Trademarks or any confusingly similar mark as a trademark for your product,
+# or use the QuantumBlack Trademarks in any other manner that might cause
+# confusion in the marketplace, including but not limited to in advertising,
+# on websites, or on software.
+#
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+"""Tests for static memory and runtime planning."""
+
+import numpy as np
+import pytest
+from kedro.pipeline.node import node
+from kedro.pipeline.pipeline import Pipeline
+
+from hyperspec_wgan.extras.datasets.bundle import BundleDataSet
+from hyperspec_wgan.extras.planning import (
+    Chunk,
+    _node_inputs,
+    parse_size,
+    plan_pipeline,
+)
+from hyperspec_wgan.pipelines.data_science.pipeline import data_science_pipeline
+from hyperspec_wgan.pipelines.model_training.pipeline import (
+    model_training_pipeline,
+)
+
+
+@pytest.mark.parametrize(
+    "size, expected",
+    [
+        ("512", 512),
+        ("512B", 512),
+        ("4k", 4 * 2**10),
+        ("1.5 GiB", 3 * 2**29),
+        (" 16gb ", 16 * 2**30),
+        ("2T", 2 * 2**40),
+    ],
+)
+def test_parse_size(size, expected):
+    assert parse_size(size) == expected
+
+
+@pytest.mark.parametrize("size", ["", "GiB", "-1G", "12 apples"])
+def test_parse_size_rejects_invalid_sizes(size):
+    with pytest.raises(ValueError, match="Invalid size"):
+        parse_size(size)
+
+
+def test_chunk_fit_halves_until_the_working_memory_fits():
+    chunk = Chunk(path=("batch_size",), value=4096, working=lambda size: size * 100)
+    assert chunk.fit(budget=1e6) == 4096
+    assert chunk.fit(budget=1e5) == 512
+    assert chunk.fit(budget=0) == 64
+
+
+def summarise(x, variance):  # pylint: disable=unused-argument
+    """A node without a cost model."""
+
+
+@pytest.fixture
+def pipeline():
+    return data_science_pipeline() + Pipeline(
+        [
+            node(
+                func=summarise,
+                inputs={
+                    "variance": "model_output_pca_variance",
+                    "x": "model_output_pca_x",
+                },
+                outputs="summary",
+                name="summarise",
+            )
+        ]
+    )
+
+
+@pytest.fixture
+def catalog(tmp_path):
+    np.save(tmp_path / "x.npy", np.zeros((1000, 40), dtype=np.float32))
+    return dict(
+        primary_classified_x=dict(
+            type="hyperspec_wgan.extras.datasets.numpy.NumpyDataSet", filepath="x.npy"
+        ),
+        model_output_pca_x=dict(
+            type="hyperspec_wgan.extras.datasets.numpy.NumpyDataSet",
+            filepath="pca_x.npy",
+        ),
+    )
+
+
+PARAMETERS = dict(
+    fit_pca=dict(PCA_kwargs=dict(n_components=15)),
+    fit_tsne=dict(TSNE_kwargs=dict(n_iter=500)),
+)
+
+
+def _combine(x, scale=1.0, y=None, *others):
+    return x, scale, y, others
+
+
+def test_node_inputs_map_datasets_to_arguments():
+    named = node(func=_combine, inputs=dict(x="a", y="b"), outputs="c")
+    assert _node_inputs(node=named) == dict(x="a", y="b")
+    positional = node(func=_combine, inputs=["a", "b", "c", "d", "e"], outputs="f")
+    assert _node_inputs(node=positional) == {
+        "x": "a",
+        "scale": "b",
+        "y": "c",
+        "others[0]": "d",
+        "others[1]": "e",
+    }
+
+
+def test_plan_propagates_shapes_through_nodes(tmp_path, pipeline, catalog):
+    plan = plan_pipeline(
+        pipeline=pipeline,
+        catalog=catalog,
+        parameters=PARAMETERS,
+        memory=2**34,
+        cores=4,
+        project_path=tmp_path,
+    )
+    assert set(plan.estimates) == {"fit-pca", "fit-tsne", "summarise"}
+    pca, tsne = plan.estimates["fit-pca"], plan.estimates["fit-tsne"]
+    assert pca.known and tsne.known
+    assert pca.outputs["x"].shape == (1000, 15)
+    assert pca.outputs["variance"].shape == (15,)
+    assert tsne.outputs.shape == (1000, 2)
+    assert pca.peak >= 1000 * 40 * 4 + pca.outputs["x"].nbytes
+    unknown = plan.estimates["summarise"]
+    assert not unknown.known
+    assert unknown.notes == ["no cost model"]
+    assert unknown.peak >= pca.outputs["x"].nbytes
+    assert plan.peak == max(estimate.peak for estimate in plan.estimates.values())
+    assert plan.runner in {"SequentialRunner", "ParallelRunner"}
+    assert plan.parameters == {}
+    report = plan.report()
+    assert "Unknown peak memory and runtime: summarise" in report
+    assert report.splitlines()[3].split()[:3] == ["summarise", "unknown", "?"]
+
+
+def test_plan_flags_nodes_over_budget(tmp_path, pipeline, catalog):
+    plan = plan_pipeline(
+        pipeline=pipeline,
+        catalog=catalog,
+        parameters=PARAMETERS,
+        memory=2**20,
+        cores=1,
+        project_path=tmp_path,
+    )
+    assert plan.runner == "SequentialRunner"
+    assert "EXCEEDS BUDGET" in plan.report()
+
+
+@pytest.mark.parametrize("candidates", [16, None])
+def test_plan_screening_with_exact_and_approximate_index(tmp_path, candidates):
+    rng = np.random.default_rng(seed=0)
+    BundleDataSet(filepath=str(tmp_path / "real.bundle")).save(
+        dict(x_train=rng.random((500, 20)), y_train=np.ones(500, dtype=np.uint8))
+    )
+    BundleDataSet(filepath=str(tmp_path / "synthetic.bundle")).save(
+        dict(x=rng.random((300, 20), dtype=np.float32), y=np.ones(300, np.uint8))
+    )
+    catalog = dict(
+        model_input_classified=dict(type="BundleDataSet", filepath="real.bundle"),
+        model_output_synthetic=dict(type="BundleDataSet", filepath="synthetic.bundle"),
+    )
+    pipeline = model_training_pipeline().only_nodes(
+        "build-spectral-index", "screen-samples"
+    )
+    parameters = dict(
+        build_spectral_index=dict(SpectralIndex_kwargs=dict(candidates=candidates)),
+        screen_samples=dict(batch_size=4096),
+    )
+    plan = plan_pipeline(
+        pipeline=pipeline,
+        catalog=catalog,
+        parameters=parameters,
+        memory=2**34,
+        cores=1,
+        project_path=tmp_path,
+    )
+    index, screen = (
+        plan.estimates["build-spectral-index"],
+        plan.estimates["screen-samples"],
+    )
+    assert index.known and screen.known
+    assert index.outputs["unit"].shape == (500, 20)
+    assert screen.outputs["memorised"].shape == (300,)
+    assert screen.seconds > 0
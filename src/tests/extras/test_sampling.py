@@ -0,0 +1,106 @@
+# Copyright 2021 QuantumBlack Visual Analytics Limited
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES
+# OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE, AND
+# NONINFRINGEMENT. IN NO EVENT WILL THE LICENSOR OR OTHER CONTRIBUTORS
+# BE LIABLE FOR ANY CLAIM, DAMAGES, OR OTHER LIABILITY, WHETHER IN AN
+# ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF, OR IN
+# CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+#
+# The QuantumBlack Visual Analytics Limited ("QuantumBlack") name and logo
+# (either separately or in combination, "QuantumBlack Trademarks") are
+# trademarks of QuantumBlack. The License does not grant you any right or
+# license to the QuantumBlack Trademarks. You may not use the QuantumBlack
+# Trademarks or any confusingly similar mark as a trademark for your product,
+# or use the QuantumBlack Trademarks in any other manner that might cause
+# confusion in the marketplace, including but not limited to in advertising,
+# on websites, or on software.
+#
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+"""Tests for class-balanced sampling of real and synthetic spectra."""
+
+import pickle
+
+import numpy as np
+import pytest
+
+from hyperspec_wgan.extras.sampling import MixedBatchSampler, MixedDataset
+
+
+@pytest.fixture
+def labels():
+    y_real = np.repeat(np.array([1, 2, 3], dtype=np.uint8), [90, 9, 1])
+    y_synthetic = np.repeat(np.array([1, 2, 3], dtype=np.uint8), 50)
+    return y_real, y_synthetic
+
+
+def test_balanced_batches_cover_every_class_equally(labels):
+    y_real, _ = labels
+    sampler = MixedBatchSampler(y_real=y_real, batch_size=300, num_batches=20)
+    drawn = np.concatenate([y_real[batch] for batch in sampler])
+    assert len(drawn) == 6000
+    np.testing.assert_allclose(np.bincount(drawn)[1:] / len(drawn), 1 / 3, atol=0.03)
+
+
+def test_synthetic_ratio_per_class(labels):
+    y_real, y_synthetic = labels
+    sampler = MixedBatchSampler(
+        y_real=y_real,
+        y_synthetic=y_synthetic,
+        batch_size=300,
+        num_batches=20,
+        synthetic_ratio={3: 1.0},
+    )
+    index = np.concatenate(list(sampler))
+    y = np.concatenate([y_real, y_synthetic])[index]
+    synthetic = index >= len(y_real)
+    assert synthetic[y == 3].all()
+    assert not synthetic[y != 3].any()
+
+
+def test_batches_depend_only_on_seed_and_epoch(labels):
+    y_real, _ = labels
+    first = MixedBatchSampler(y_real=y_real, batch_size=32, seed=1)
+    second = MixedBatchSampler(y_real=y_real, batch_size=32, seed=1)
+    assert all(np.array_equal(a, b) for a, b in zip(first, second))
+    second.set_epoch(1)
+    assert not all(np.array_equal(a, b) for a, b in zip(first, second))
+
+
+def test_ranks_split_the_global_batch(labels):
+    y_real, _ = labels
+    ranks = [
+        MixedBatchSampler(y_real=y_real, batch_size=32, rank=rank, world_size=4)
+        for rank in range(4)
+    ]
+    assert all(len(sampler) == 4 for sampler in ranks)
+    assert all(len(batch) == 8 for sampler in ranks for batch in sampler)
+    with pytest.raises(ValueError, match="not divisible"):
+        MixedBatchSampler(y_real=y_real, batch_size=30, world_size=4)
+
+
+def test_dataset_gathers_real_and_synthetic_samples(tmp_path, labels):
+    y_real, y_synthetic = labels
+    x_real = np.lib.format.open_memmap(
+        tmp_path / "x.npy", mode="w+", dtype=np.float32, shape=(len(y_real), 4)
+    )
+    x_real[:] = np.arange(len(y_real))[:, None]
+    x_real.flush()
+    x_real = np.load(tmp_path / "x.npy", mmap_mode="r")
+    x_synthetic = -np.ones((len(y_synthetic), 4), dtype=np.float32)
+    dataset = pickle.loads(
+        pickle.dumps(MixedDataset(x_real, y_real, x_synthetic, y_synthetic))
+    )
+    x, y = dataset[np.array([0, 5, len(y_real) + 2])]
+    np.testing.assert_array_equal(x[:, 0].numpy(), [0.0, 5.0, -1.0])
+    np.testing.assert_array_equal(y.numpy(), [1, 1, 1])
@@ -0,0 +1,164 @@
+# Copyright 2021 QuantumBlack Visual Analytics Limited
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES
+# OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE, AND
+# NONINFRINGEMENT. IN NO EVENT WILL THE LICENSOR OR OTHER CONTRIBUTORS
+# BE LIABLE FOR ANY CLAIM, DAMAGES, OR OTHER LIABILITY, WHETHER IN AN
+# ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF, OR IN
+# CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+#
+# The QuantumBlack Visual Analytics Limited ("QuantumBlack") name and logo
+# (either separately or in combination, "QuantumBlack Trademarks") are
+# trademarks of QuantumBlack. The License does not grant you any right or
+# license to the QuantumBlack Trademarks. You may not use the QuantumBlack
+# Trademarks or any confusingly similar mark as a trademark for your product,
+# or use the QuantumBlack Trademarks in any other manner that might cause
+# confusion in the marketplace, including but not limited to in advertising,
+# on websites, or on software.
+#
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+"""Tests for the synthetic spectra service."""
+
+import asyncio
+import io
+import json
+import socket
+
+import numpy as np
+import torch
+from torch import nn
+
+from hyperspec_wgan.extras.serving import GenerationServer, MicroBatcher
+
+
+class _Recorder(nn.Module):
+    """Return each label as a spectrum, and record the batch sizes seen."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.sizes = []
+
+    def forward(self, y: torch.Tensor) -> torch.Tensor:
+        self.sizes.append(len(y))
+        return y.float().unsqueeze(1).repeat(1, 3)
+
+
+class _Failing(nn.Module):
+    def forward(self, y: torch.Tensor) -> torch.Tensor:
+        raise RuntimeError("out of memory")
+
+
+def test_batches_coalesce_without_exceeding_max_batch_size():
+    sampler = _Recorder()
+
+    async def main():
+        batcher = MicroBatcher(sampler=sampler, max_batch_size=10, max_delay=0.05)
+        worker = asyncio.create_task(batcher.run())
+        counts = [4, 4, 4, 25, 1]
+        results = await asyncio.gather(
+            *[
+                batcher.generate(label=label, count=count)
+                for label, count in enumerate(counts)
+            ]
+        )
+        worker.cancel()
+        batcher.close()
+        return counts, results, batcher.metrics()
+
+    counts, results, metrics = asyncio.run(main())
+    for label, (count, x) in enumerate(zip(counts, results)):
+        np.testing.assert_array_equal(x, np.full((count, 3), label))
+    assert max(sampler.sizes) <= 10
+    assert sum(sampler.sizes) == sum(counts)
+    assert metrics["requests"] == len(counts)
+    assert metrics["queue_depth"] == 0
+
+
+async def _send(port, request):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(request)
+    response = await reader.read()
+    writer.close()
+    head, body = response.split(b"\r\n\r\n", 1)
+    return int(head.split(b" ")[1]), body
+
+
+def _serve_and_send(sampler, requests):
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+
+    async def main():
+        server = GenerationServer(
+            batcher=MicroBatcher(sampler=sampler), n_classes=3, chunk_size=8
+        )
+        serving = asyncio.create_task(server.serve(host="127.0.0.1", port=port))
+        for _ in range(100):
+            try:
+                _, writer = await asyncio.open_connection("127.0.0.1", port)
+                writer.close()
+                break
+            except OSError:
+                await asyncio.sleep(0.01)
+        responses = [await _send(port, request) for request in requests]
+        serving.cancel()
+        return responses
+
+    return asyncio.run(main())
+
+
+def _serve_and_get(sampler, targets):
+    requests = [
+        f"GET {target} HTTP/1.1\r\nConnection: close\r\n\r\n".encode()
+        for target in targets
+    ]
+    return _serve_and_send(sampler, requests)
+
+
+def test_generate_endpoint_streams_npy_arrays():
+    responses = _serve_and_get(
+        _Recorder(), ["/generate?class=2&count=5", "/generate?class=9", "/metrics"]
+    )
+    (status, body), (bad_status, _), (metrics_status, metrics) = responses
+    assert status == 200
+    np.testing.assert_array_equal(np.load(io.BytesIO(body)), np.ones((5, 3)))
+    assert bad_status == 400
+    assert metrics_status == 200
+    assert json.loads(metrics)["requests"] == 1
+
+
+def test_generation_errors_return_500():
+    [(status, body)] = _serve_and_get(_Failing(), ["/generate?class=1"])
+    assert status == 500
+    assert json.loads(body) == dict(error="Generation failed.")
+
+
+def test_oversized_headers_return_431():
+    request = b"GET /metrics HTTP/1.1\r\nX-Padding: " + b"a" * 70000 + b"\r\n\r\n"
+    [(status, _)] = _serve_and_send(_Recorder(), [request])
+    assert status == 431
+
+
+def test_connection_closes_after_requests_with_bodies():
+    body = b"GET /metrics HTTP/1.1\r\n\r\n"
+    requests = [
+        b"POST /metrics HTTP/1.1\r\nContent-Length: %d\r\n\r\n" % len(body) + body,
+        b"GET /metrics HTTP/1.1\r\nContent-Length: %d\r\n\r\n" % len(body) + body,
+    ]
+    (post_status, post_body), (get_status, get_body) = _serve_and_send(
+        _Recorder(), requests
+    )
+    assert post_status == 405
+    assert b"HTTP/1.1" not in post_body
+    assert get_status == 200
+    assert b"HTTP/1.1" not in get_body
@@ -0,0 +1,109 @@
+# Copyright 2021 QuantumBlack Visual Analytics Limited
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES
+# OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE, AND
+# NONINFRINGEMENT. IN NO EVENT WILL THE LICENSOR OR OTHER CONTRIBUTORS
+# BE LIABLE FOR ANY CLAIM, DAMAGES, OR OTHER LIABILITY, WHETHER IN AN
+# ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF, OR IN
+# CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+#
+# The QuantumBlack Visual Analytics Limited ("QuantumBlack") name and logo
+# (either separately or in combination, "QuantumBlack Trademarks") are
+# trademarks of QuantumBlack. The License does not grant you any right or
+# license to the QuantumBlack Trademarks. You may not use the QuantumBlack
+# Trademarks or any confusingly similar mark as a trademark for your product,
+# or use the QuantumBlack Trademarks in any other manner that might cause
+# confusion in the marketplace, including but not limited to in advertising,
+# on websites, or on software.
+#
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+"""Tests for tiled image pyramids."""
+
+import numpy as np
+import pytest
+
+from hyperspec_wgan.extras.tiles import (
+    TilePyramid,
+    false_colour_pyramid,
+    label_pyramid,
+)
+
+
+@pytest.fixture
+def rgb():
+    rng = np.random.default_rng(seed=0)
+    return rng.integers(0, 256, size=(37, 70, 3), dtype=np.uint8)
+
+
+def _pyramid(image, **kwargs):
+    return TilePyramid(
+        render=lambda rows, columns: image[rows, columns],
+        height=image.shape[0],
+        width=image.shape[1],
+        tile_size=8,
+        **kwargs,
+    )
+
+
+def test_walk_yields_every_tile_once(rgb):
+    pyramid = _pyramid(rgb)
+    assert pyramid.shapes == [(37, 70), (19, 35), (10, 18), (5, 9), (3, 5)]
+    tiles = dict(pyramid)
+    expected = {
+        (level, row, column)
+        for level in range(pyramid.levels)
+        for row in range(pyramid.grid(level)[0])
+        for column in range(pyramid.grid(level)[1])
+    }
+    assert set(tiles) == expected
+    assert len(tiles) == sum(
+        rows * columns for rows, columns in map(pyramid.grid, range(pyramid.levels))
+    )
+    np.testing.assert_array_equal(tiles[0, 4, 8], rgb[32:40, 64:72])
+    for level, (height, width) in enumerate(pyramid.shapes):
+        rows, columns = pyramid.grid(level)
+        assembled = np.concatenate(
+            [
+                np.concatenate([tiles[level, i, j] for j in range(columns)], axis=1)
+                for i in range(rows)
+            ]
+        )
+        assert assembled.shape == (height, width, 3)
+
+
+def test_mean_and_nearest_reduction():
+    image = np.zeros((16, 16, 3), dtype=np.uint8)
+    image[::2, ::2] = 200
+    top = dict(_pyramid(image))[1, 0, 0]
+    np.testing.assert_array_equal(top, 50)
+    top = dict(_pyramid(image, resample="nearest"))[1, 0, 0]
+    np.testing.assert_array_equal(top, 200)
+
+
+def test_label_pyramid_keeps_palette_colours():
+    labels = np.repeat(np.arange(4), 25).reshape(10, 10)
+    palette = {0: "#000000", 1: "#ff0000", 2: "#00ff00", 3: "#0000ff"}
+    pyramid = label_pyramid(labels=labels, palette=palette, tile_size=4)
+    colours = {(0, 0, 0), (255, 0, 0), (0, 255, 0), (0, 0, 255)}
+    for _, tile in pyramid:
+        assert {tuple(pixel) for pixel in tile.reshape(-1, 3)} <= colours
+
+
+def test_false_colour_pyramid_stretches_bands():
+    rng = np.random.default_rng(seed=0)
+    image = rng.random((20, 20, 5)) * 1000
+    pyramid = false_colour_pyramid(image=image, bands=[4, 2, 0], tile_size=32)
+    [(_, tile)] = list(pyramid)
+    assert tile.dtype == np.uint8
+    assert tile.shape == (20, 20, 3)
+    assert tile.min() == 0 and tile.max() == 255
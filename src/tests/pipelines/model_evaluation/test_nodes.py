@@ -0,0 +1,78 @@
+# Copyright 2021 QuantumBlack Visual Analytics Limited
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES
+# OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE, AND
+# NONINFRINGEMENT. IN NO EVENT WILL THE LICENSOR OR OTHER CONTRIBUTORS
+# BE LIABLE FOR ANY CLAIM, DAMAGES, OR OTHER LIABILITY, WHETHER IN AN
+# ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF, OR IN
+# CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+#
+# The QuantumBlack Visual Analytics Limited ("QuantumBlack") name and logo
+# (either separately or in combination, "QuantumBlack Trademarks") are
+# trademarks of QuantumBlack. The License does not grant you any right or
+# license to the QuantumBlack Trademarks. You may not use the QuantumBlack
+# Trademarks or any confusingly similar mark as a trademark for your product,
+# or use the QuantumBlack Trademarks in any other manner that might cause
+# confusion in the marketplace, including but not limited to in advertising,
+# on websites, or on software.
+#
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+"""Tests for the model evaluation nodes."""
+
+import numpy as np
+import pytest
+
+from hyperspec_wgan.extras.datasets.bundle import BundleDataSet
+from hyperspec_wgan.extras.neighbors import SpectralIndex
+from hyperspec_wgan.pipelines.model_evaluation.nodes import (
+    report_memorisation,
+    screen_samples,
+)
+
+
+@pytest.fixture
+def real():
+    rng = np.random.default_rng(seed=0)
+    return rng.random((100, 10)) + 0.1
+
+
+@pytest.mark.parametrize("drop", [True, False])
+def test_screen_and_report(tmp_path, real, drop):
+    rng = np.random.default_rng(seed=1)
+    index = SpectralIndex(n_components=3, candidates=None).fit(x=real)
+    x = np.concatenate([real[:3] * 5.0, rng.random((20, 10)) + 0.1])
+    y = np.repeat(np.array([1, 2], dtype=np.uint8), [10, 13])
+    synthetic = dict(x=x.astype(np.float32), y=y)
+    kwargs = dict(batch_size=8, screen_batches_kwargs=dict(drop=drop, max_angle=1e-3))
+    dataset = BundleDataSet(filepath=str(tmp_path / "screened.bundle"))
+    dataset.save(screen_samples(index=index, synthetic=synthetic, kwargs=kwargs))
+    screened = dataset.load()
+    assert len(screened["y"]) == (20 if drop else 23)
+    report = report_memorisation(synthetic=synthetic, screened=screened)
+    assert report == {
+        "1": dict(samples=10, memorised=3),
+        "2": dict(samples=13, memorised=0),
+    }
+
+
+def test_screen_empty_synthetic_set(tmp_path, real):
+    index = SpectralIndex(n_components=3, candidates=None).fit(x=real)
+    synthetic = dict(
+        x=np.empty((0, 10), dtype=np.float32), y=np.empty(0, dtype=np.uint8)
+    )
+    kwargs = dict(batch_size=8, screen_batches_kwargs=dict(drop=True, max_angle=1e-3))
+    dataset = BundleDataSet(filepath=str(tmp_path / "screened.bundle"))
+    dataset.save(screen_samples(index=index, synthetic=synthetic, kwargs=kwargs))
+    screened = dataset.load()
+    assert screened["x"].shape == (0, 10)
+    assert report_memorisation(synthetic=synthetic, screened=screened) == {}
@@ -0,0 +1,107 @@
+# Copyright 2021 QuantumBlack Visual Analytics Limited
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES
+# OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE, AND
+# NONINFRINGEMENT. IN NO EVENT WILL THE LICENSOR OR OTHER CONTRIBUTORS
+# BE LIABLE FOR ANY CLAIM, DAMAGES, OR OTHER LIABILITY, WHETHER IN AN
+# ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF, OR IN
+# CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+#
+# The QuantumBlack Visual Analytics Limited ("QuantumBlack") name and logo
+# (either separately or in combination, "QuantumBlack Trademarks") are
+# trademarks of QuantumBlack. The License does not grant you any right or
+# license to the QuantumBlack Trademarks. You may not use the QuantumBlack
+# Trademarks or any confusingly similar mark as a trademark for your product,
+# or use the QuantumBlack Trademarks in any other manner that might cause
+# confusion in the marketplace, including but not limited to in advertising,
+# on websites, or on software.
+#
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+"""Tests for the model inference nodes."""
+
+import numpy as np
+import pytest
+import torch
+
+from hyperspec_wgan.extras.datasets.torch import TorchScriptDataSet
+from hyperspec_wgan.pipelines.model_inference.nodes import classify_image, export_model
+from hyperspec_wgan.pipelines.model_training.models import (
+    Classifier,
+    Generator,
+    to_checkpoint,
+)
+
+VARIANTS = dict(
+    fp32=dict(dtype="float32", quantize=False),
+    int8=dict(dtype="float32", quantize=True),
+    bf16=dict(dtype="bfloat16", quantize=False),
+)
+
+
+@pytest.fixture
+def generator():
+    torch.manual_seed(0)
+    config = dict(n_bands=6, n_classes=3, latent_dim=4, hidden_dims=[8])
+    return to_checkpoint("generator", Generator(**config), config)
+
+
+@pytest.fixture
+def classifier():
+    torch.manual_seed(0)
+    config = dict(n_bands=6, n_classes=3, channels=[4], kernel_size=3)
+    return to_checkpoint("classifier", Classifier(**config).eval(), config)
+
+
+@pytest.mark.parametrize("variant", VARIANTS.values(), ids=VARIANTS.keys())
+def test_exported_models_round_trip(tmp_path, generator, classifier, variant):
+    x = torch.rand(5, 6)
+    y = torch.tensor([0, 1, 2, 2, 0])
+    for name, checkpoint, inputs in [
+        ("generator", generator, y),
+        ("classifier", classifier, x),
+    ]:
+        model = export_model(checkpoint=checkpoint, kwargs=dict(variant, freeze=True))
+        dataset = TorchScriptDataSet(filepath=str(tmp_path / f"{name}.pt"))
+        dataset.save(model)
+        loaded = dataset.load()
+        assert isinstance(loaded, torch.jit.ScriptModule)
+        torch.manual_seed(1)
+        expected = model(inputs)
+        torch.manual_seed(1)
+        outputs = loaded(inputs)
+        assert outputs.dtype == torch.float32
+        torch.testing.assert_close(outputs, expected)
+
+
+def test_export_rejects_quantised_bfloat16(generator):
+    kwargs = dict(dtype="bfloat16", quantize=True, freeze=True)
+    with pytest.raises(ValueError, match="float32 activations"):
+        export_model(checkpoint=generator, kwargs=kwargs)
+
+
+def test_frozen_generator_draws_fresh_noise(generator):
+    model = export_model(checkpoint=generator, kwargs=VARIANTS["fp32"])
+    y = torch.tensor([0, 1, 2])
+    assert not torch.equal(model(y), model(y))
+
+
+def test_classify_image_accepts_checkpoints_and_exported_models(classifier):
+    image = np.random.default_rng(seed=0).random((4, 5, 6), dtype=np.float32)
+    scripted = export_model(checkpoint=classifier, kwargs=VARIANTS["fp32"])
+    kwargs = dict(batch_size=7)
+    eager = classify_image(classifier=classifier, image=image, kwargs=kwargs)
+    traced = classify_image(classifier=scripted, image=image, kwargs=kwargs)
+    assert eager.shape == (4, 5)
+    assert eager.dtype == np.uint8
+    assert set(np.unique(eager)) <= {1, 2, 3}
+    np.testing.assert_array_equal(traced, eager)